@@ -1,60 +1,204 @@
+import argparse
+import os
+import time
+from typing import List
 
-import pandas as pd
 import joblib
-import os
+import pandas as pd
 
-# Evaluación de un nuevo cliente con K-Means
+import instrumentacion
+from artefactos import CompuertaRiesgo, compuerta_path
+from monitor_drift import MonitorDrift, ReferenciaDrift
+from scoring import MOTORES, ScorerKMeans, features, validar_columnas
+
+# Evaluación de nuevos clientes con K-Means
+# ------------------------------------------------------
+# Puede evaluarse un único cliente (Data/nuevo_cliente.csv, comportamiento por defecto)
+# o un fichero diario completo de solicitudes. El CSV de entrada se lee por bloques
+# (chunks) de tamaño acotado, cada bloque se transforma y predice de forma vectorizada
+# y el resultado se escribe de forma incremental en el CSV de salida.
+#
+# Antes del K-Means se aplica la compuerta z-score del preproceso (Modelos/artefactos/
+# compuerta_riesgo.json, ver `python artefactos.py compuerta`): los solicitantes
+# 'Very High' no pasan por el modelo, igual que en el entrenamiento.
+#
+# Con --monitor se compara cada bloque con la referencia de entrenamiento
+# (ver monitor_drift.py) y al final se muestra la deriva acumulada (PSI/KS,
+# categorías desconocidas y ocupación de clústeres).
+#
+# Con --instrumentar se mide cada etapa (preparación, compuerta, pipeline.transform,
+# kmeans.predict, escritura...) y se muestra la tabla de tiempos al terminar;
+# --perfilar añade el perfilador por muestreo y --metricas guarda lo medido en JSON
+# o en texto de Prometheus (.prom), ver instrumentacion.py.
+#
+# Ejemplos:
+#   python 05-Evaluacion_Nuevo_Cliente.py
+#   python 05-Evaluacion_Nuevo_Cliente.py --entrada cotizaciones.csv --salida resultado.csv
+#   python 05-Evaluacion_Nuevo_Cliente.py --entrada cotizaciones.csv --limite 1000
+#   python 05-Evaluacion_Nuevo_Cliente.py --entrada trimestre.csv --monitor ../Modelos/artefactos/referencia_drift.json
+#   python 05-Evaluacion_Nuevo_Cliente.py --entrada trimestre.csv --perfilar --metricas metricas.prom
 
 # Ruta base relativa al propio script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Definir rutas a los modelos
-modelo_kmeans_path = os.path.join(BASE_DIR, '..', 'Modelos', 'kmeans_model.pkl')
-pipeline_path = os.path.join(BASE_DIR, '..', 'Modelos', 'preprocessing_pipeline.pkl')
-
-# Cargar los modelos
-kmeans = joblib.load(modelo_kmeans_path)
-pipeline = joblib.load(pipeline_path)
-
-# Ruta al archivo del nuevo cliente
+# Rutas por defecto de entrada y salida
 nuevo_cliente_path = os.path.join(BASE_DIR, '..', 'Data', 'nuevo_cliente.csv')
+resultado_path = os.path.join(BASE_DIR, '..', 'Data', 'resultado_nuevo_cliente.csv')
 
-# Cargar datos del nuevo cliente
-nuevo_cliente = pd.read_csv(nuevo_cliente_path)
-
-# Definir las columnas que espera el modelo
-features = ['SEX', 'INSURED_VALUE', 'PREMIUM', 'SEATS_NUM',
-            'CARRYING_CAPACITY', 'CCM_TON', 'MAKE', 'USAGE', 'CLAIM_PAID']
-
-# Verificar que el nuevo cliente tiene exactamente esas columnas
-faltantes = set(features) - set(nuevo_cliente.columns)
-extras = set(nuevo_cliente.columns) - set(features)
-
-if faltantes:
-    raise ValueError(f"Faltan las siguientes columnas en el nuevo cliente: {faltantes}")
-if extras:
-    print(f"Advertencia: El nuevo cliente tiene columnas adicionales que serán ignoradas: {extras}")
-
-# Reordenar y filtrar columnas
-nuevo_cliente = nuevo_cliente[features]
-
-# Preprocesar los datos
-nuevo_cliente_processed = pipeline.transform(nuevo_cliente)
-
-# Asignar cluster
-cluster_asignado = kmeans.predict(nuevo_cliente_processed)[0]
-
-# Lógica simple de riesgo (ajusta según tu negocio)
-if cluster_asignado in [3, 4]:
-    nivel_riesgo = 'Muy Alto'
-else:
-    nivel_riesgo = 'Normal'
-
-# Guardar resultado
-resultado = nuevo_cliente.copy()
-resultado['Cluster_KMeans'] = cluster_asignado
-resultado['Nivel_Riesgo'] = nivel_riesgo
 
-resultado_path = os.path.join(BASE_DIR, '..', 'Data', 'resultado_nuevo_cliente.csv')
-resultado.to_csv(resultado_path, index=False)
-print(f'Evaluación completada. Resultado guardado en {resultado_path}')
+def evaluar_por_lotes(
+    entrada: str,
+    salida: str,
+    chunksize: int = 50_000,
+    limite: int = None,
+    motor: str = 'numpy',
+    preparadores: List[str] = None,
+    compuerta: str = compuerta_path,
+    monitor: str = None,
+    informe_drift: str = None,
+    normalizar_marcas: bool = True
+) -> int:
+    """
+    Evalúa todos los clientes de `entrada` leyendo el CSV por bloques de `chunksize`
+    filas y escribiendo cada bloque evaluado en `salida` según se procesa, de modo que
+    la memoria usada no depende del tamaño del fichero.
+
+    Parámetros
+    ----------
+    entrada : str
+        Ruta del CSV de clientes a evaluar.
+    salida : str
+        Ruta del CSV de resultados (se sobrescribe).
+    chunksize : int, opcional
+        Filas por bloque (por defecto 50.000).
+    limite : int, opcional
+        Número máximo de filas a evaluar (útil para pruebas rápidas). None = todas.
+    motor : str, opcional
+        'numpy' (kernel exportado, por defecto) o 'sklearn' (pickles originales).
+    preparadores : list[str], opcional
+        Rutas (joblib) de transformadores ajustados que se aplican a cada bloque antes
+        de evaluarlo, p.ej. un `data_utils.ImputadorJerarquico` guardado en el preproceso.
+    compuerta : str, opcional
+        Ruta de la compuerta z-score (por defecto Modelos/artefactos/compuerta_riesgo.json).
+        None desactiva la compuerta; si el fichero no existe se avisa y se evalúa sin ella.
+    monitor : str, opcional
+        Ruta de la referencia de drift (monitor_drift.py). Si se indica, se acumula
+        la deriva de cada bloque y se muestra el resumen al terminar.
+    informe_drift : str, opcional
+        CSV donde guardar el resumen de deriva acumulada (requiere `monitor`).
+    normalizar_marcas : bool, opcional
+        Normalizar MAKE como en el preproceso, con las marcas raras o no vistas
+        como 'OTRAS' (por defecto True).
+
+    Devuelve
+    -------
+    int
+        Número de filas evaluadas.
+    """
+    # Cargar los modelos (y la compuerta) una sola vez para todo el fichero
+    if compuerta is not None and not os.path.exists(compuerta):
+        print(f"Advertencia: no existe la compuerta {compuerta}; se evalúa sin filtro 'Very High'")
+        compuerta = None
+    scorer = ScorerKMeans(motor=motor, preparadores=[joblib.load(r) for r in preparadores or []],
+                          compuerta=CompuertaRiesgo.cargar(compuerta) if compuerta else None,
+                          monitor=MonitorDrift(ReferenciaDrift.cargar(monitor)) if monitor else None,
+                          normalizar_marcas=normalizar_marcas)
+
+    # Leer solo las filas necesarias si hay límite
+    lector = pd.read_csv(entrada, chunksize=chunksize, nrows=limite)
+
+    n_filas = 0
+    inicio = time.perf_counter()
+    for i, bloque in enumerate(lector):
+        if i == 0:
+            validar_columnas(bloque.columns)
+
+        resultado = scorer.puntuar(bloque)
+
+        # Escritura incremental: cabecera solo en el primer bloque
+        with instrumentacion.tramo('lotes.escritura', len(resultado)):
+            resultado.to_csv(salida, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        n_filas += len(resultado)
+
+    if n_filas == 0:
+        # Entrada sin filas: se escribe igualmente el CSV con las columnas de salida,
+        # para no dejar un resultado ausente o de una ejecución anterior
+        validar_columnas(pd.read_csv(entrada, nrows=0).columns)
+        columnas = features + ['Cluster_KMeans', 'Nivel_Riesgo'] + (['RISK_CATEGORY'] if scorer.compuerta is not None else [])
+        pd.DataFrame(columns=columnas).to_csv(salida, index=False)
+
+    duracion = time.perf_counter() - inicio
+    filas_seg = n_filas / duracion if duracion > 0 else float('nan')
+    print(f"Filas evaluadas: {n_filas} en {duracion:.2f} s ({filas_seg:,.0f} filas/s)")
+    conteos = scorer.conteos
+    print(f"  Compuerta z-score 'Very High': {conteos['compuerta_very_high']} | "
+          f"K-Means 'Muy Alto': {conteos['kmeans_muy_alto']} | K-Means 'Normal': {conteos['kmeans_normal']}")
+    if scorer.monitor is not None:
+        deriva = scorer.monitor.resumen()
+        print(f"Deriva frente a la referencia de entrenamiento ({scorer.monitor.n_lotes} bloques):")
+        print(deriva.round(4).to_string(index=False))
+        if informe_drift:
+            deriva.to_csv(informe_drift, index=False)
+    return n_filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Evalúa el riesgo de nuevos clientes con el modelo K-Means guardado.'
+    )
+    parser.add_argument('--entrada', default=nuevo_cliente_path,
+                        help='CSV de clientes a evaluar (por defecto Data/nuevo_cliente.csv)')
+    parser.add_argument('--salida', default=resultado_path,
+                        help='CSV de resultados (por defecto Data/resultado_nuevo_cliente.csv)')
+    parser.add_argument('--chunksize', type=int, default=50_000,
+                        help='Filas por bloque de lectura (por defecto 50000)')
+    parser.add_argument('--limite', type=int, default=None,
+                        help='Evaluar solo las primeras N filas')
+    parser.add_argument('--motor', choices=MOTORES, default='numpy',
+                        help='Kernel NumPy exportado (por defecto) o pipeline sklearn')
+    parser.add_argument('--preparador', action='append', default=[],
+                        help='Transformador ajustado (joblib) a aplicar antes de evaluar; repetible')
+    parser.add_argument('--compuerta', default=compuerta_path,
+                        help='Compuerta z-score de riesgo (por defecto Modelos/artefactos/compuerta_riesgo.json)')
+    parser.add_argument('--sin-compuerta', action='store_true',
+                        help="No aplicar la compuerta 'Very High' antes del K-Means")
+    parser.add_argument('--monitor', default=None,
+                        help='Referencia de drift (JSON de monitor_drift.py) para vigilar la deriva de la entrada')
+    parser.add_argument('--informe-drift', default=None,
+                        help='CSV donde guardar el resumen de deriva (con --monitor)')
+    parser.add_argument('--sin-normalizar-marcas', action='store_true',
+                        help="No agrupar las marcas raras o no vistas en 'OTRAS' (se evalúan como desconocidas)")
+    parser.add_argument('--instrumentar', action='store_true',
+                        help='Medir tiempo, filas y memoria de cada etapa y mostrar la tabla al terminar')
+    parser.add_argument('--perfilar', action='store_true',
+                        help='Activar además el perfilador por muestreo (implica --instrumentar)')
+    parser.add_argument('--metricas', default=None,
+                        help='Guardar las métricas de instrumentación en JSON o Prometheus (.prom)')
+    parser.add_argument('--perfil-plegado', default=None,
+                        help='Guardar las pilas muestreadas en formato plegado (con --perfilar)')
+    args = parser.parse_args(argv)
+
+    if args.instrumentar or args.perfilar or args.metricas:
+        instrumentacion.activar(perfilar=args.perfilar or bool(args.perfil_plegado))
+
+    evaluar_por_lotes(args.entrada, args.salida, chunksize=args.chunksize,
+                      limite=args.limite, motor=args.motor, preparadores=args.preparador,
+                      compuerta=None if args.sin_compuerta else args.compuerta,
+                      monitor=args.monitor, informe_drift=args.informe_drift,
+                      normalizar_marcas=not args.sin_normalizar_marcas)
+    print(f'Evaluación completada. Resultado guardado en {args.salida}')
+
+    if instrumentacion.activa():
+        instrumentacion.desactivar()
+        columnas = ['tramo', 'llamadas', 'segundos', 'segundos_propios', 'filas', 'filas_seg', 'rss_incremento_max_mb']
+        if args.perfilar:
+            columnas.append('muestras')
+        print(instrumentacion.tabla()[columnas].round(4).to_string(index=False))
+        if args.metricas:
+            print(f'Métricas guardadas en {instrumentacion.exportar(args.metricas)}')
+        if args.perfil_plegado:
+            print(f'Perfil plegado guardado en {instrumentacion.exportar_perfil_plegado(args.perfil_plegado)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+# ——————————————————————————————
+# Formato ligero de artefactos de modelo (sin pickle)
+# ——————————————————————————————
+# `kmeans_model.pkl` ocupa ~3 MB porque guarda `labels_` de todo el entrenamiento,
+# y cargar cualquiera de los pickles importa scikit-learn completo. En inferencia
+# solo hacen falta unos pocos arrays, así que cada modelo se guarda como:
+#
+#   Modelos/artefactos/
+#     metadata.json              cabecera versionada: orden de variables,
+#                                vocabularios categóricos, mapeo clúster -> riesgo
+#                                y descripción (forma/dtype) de cada array
+#     scaler_media.npy           StandardScaler.mean_
+#     scaler_escala.npy          StandardScaler.scale_
+#     kmeans_centros.npy         KMeans.cluster_centers_
+#     pca_componentes.npy        PCA.components_
+#     pca_media.npy              PCA.mean_
+#     pca_varianza.npy           PCA.explained_variance_
+#     pca_ratio_varianza.npy     PCA.explained_variance_ratio_
+#
+# Los .npy se abren con np.load(mmap_mode='r'), por lo que la carga es de
+# milisegundos y no copia datos hasta que se usan.
+#
+# Ejemplos:
+#   python artefactos.py convertir
+#   python artefactos.py verificar --filas 100000
+#   python artefactos.py compuerta --datos ../Data/motor_data_2011_2018_RISK.csv
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict
+
+import numpy as np
+
+# Ruta base relativa al propio módulo
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELOS_DIR = os.path.normpath(os.path.join(BASE_DIR, '..', 'Modelos'))
+artefactos_dir = os.path.join(MODELOS_DIR, 'artefactos')
+
+# Versión del formato. Se incrementa si cambia la estructura de metadata.json
+# o el significado de algún array; los lectores rechazan versiones mayores.
+FORMATO_VERSION = 1
+
+# Mapeo clúster -> riesgo vigente para el K-Means guardado
+CLUSTERS_MUY_ALTO = [3, 4]
+
+# Compuerta z-score de 02-Preproceso.ipynb (RISK_CATEGORY = 'Very High')
+compuerta_path = os.path.join(artefactos_dir, 'compuerta_riesgo.json')
+COLUMNAS_COMPUERTA = ['INSURED_VALUE', 'PREMIUM', 'CLAIM_PAID']
+
+
+class Artefactos:
+    """
+    Artefactos de inferencia cargados desde disco.
+
+    Atributos
+    ---------
+    metadata : dict
+        Contenido de metadata.json.
+    arrays : dict[str, np.ndarray]
+        Arrays por nombre (memory-mapped si se cargaron con `mmap=True`).
+    """
+
+    def __init__(self, metadata: Dict, arrays: Dict[str, np.ndarray]):
+        self.metadata = metadata
+        self.arrays = arrays
+
+    def __getitem__(self, nombre: str) -> np.ndarray:
+        return self.arrays[nombre]
+
+    @property
+    def num_features(self):
+        return self.metadata['preprocesamiento']['num_features']
+
+    @property
+    def cat_features(self):
+        return self.metadata['preprocesamiento']['cat_features']
+
+    @property
+    def categorias(self) -> Dict[str, list]:
+        return self.metadata['preprocesamiento']['categorias']
+
+    @property
+    def clusters_muy_alto(self):
+        return self.metadata['kmeans']['clusters_muy_alto']
+
+
+def _guardar_array(dir_salida: str, nombre: str, array: np.ndarray, indice: Dict) -> None:
+    array = np.ascontiguousarray(array, dtype=np.float64)
+    np.save(os.path.join(dir_salida, f'{nombre}.npy'), array)
+    indice[nombre] = {'fichero': f'{nombre}.npy', 'forma': list(array.shape), 'dtype': str(array.dtype)}
+
+
+def guardar_artefactos(
+    pipeline,
+    kmeans,
+    pca=None,
+    dir_salida: str = artefactos_dir,
+    clusters_muy_alto=CLUSTERS_MUY_ALTO
+) -> str:
+    """
+    Guarda los modelos ajustados en el formato ligero.
+
+    Parámetros
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Pipeline con un ColumnTransformer ('num': StandardScaler, 'cat': OneHotEncoder).
+    kmeans : sklearn.cluster.KMeans
+        Modelo K-Means ajustado sobre la salida del pipeline.
+    pca : sklearn.decomposition.PCA, opcional
+        PCA ajustado sobre la salida del pipeline (para visualización).
+    dir_salida : str, opcional
+        Directorio de salida (por defecto Modelos/artefactos).
+    clusters_muy_alto : list[int], opcional
+        Clústeres que se consideran de riesgo 'Muy Alto'.
+
+    Devuelve
+    -------
+    str
+        El directorio escrito.
+    """
+    os.makedirs(dir_salida, exist_ok=True)
+    preprocesador = pipeline.named_steps['preprocessor']
+    transformadores = {nombre: (t, cols) for nombre, t, cols in preprocesador.transformers_}
+    scaler, num_cols = transformadores['num']
+    encoder, cat_cols = transformadores['cat']
+
+    indice: Dict[str, Dict] = {}
+    _guardar_array(dir_salida, 'scaler_media', scaler.mean_, indice)
+    _guardar_array(dir_salida, 'scaler_escala', scaler.scale_, indice)
+    _guardar_array(dir_salida, 'kmeans_centros', kmeans.cluster_centers_, indice)
+    if pca is not None:
+        _guardar_array(dir_salida, 'pca_componentes', pca.components_, indice)
+        _guardar_array(dir_salida, 'pca_media', pca.mean_, indice)
+        _guardar_array(dir_salida, 'pca_varianza', pca.explained_variance_, indice)
+        _guardar_array(dir_salida, 'pca_ratio_varianza', pca.explained_variance_ratio_, indice)
+
+    try:
+        import sklearn
+        version_sklearn = sklearn.__version__
+    except ImportError:
+        version_sklearn = None
+
+    metadata = {
+        'formato_version': FORMATO_VERSION,
+        'creado': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'origen': {'sklearn_version_conversion': version_sklearn},
+        'preprocesamiento': {
+            'num_features': list(num_cols),
+            'cat_features': list(cat_cols),
+            'categorias': {col: [str(c) for c in cats] for col, cats in zip(cat_cols, encoder.categories_)},
+            'handle_unknown': encoder.handle_unknown,
+        },
+        'kmeans': {
+            'n_clusters': int(kmeans.n_clusters),
+            'clusters_muy_alto': [int(c) for c in clusters_muy_alto],
+        },
+        'pca': {'n_components': int(pca.n_components_), 'whiten': bool(pca.whiten)} if pca is not None else None,
+        'arrays': indice,
+    }
+    with open(os.path.join(dir_salida, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=1)
+    return dir_salida
+
+
+def cargar_artefactos(dir_artefactos: str = artefactos_dir, mmap: bool = True) -> Artefactos:
+    """
+    Carga los artefactos (sin importar scikit-learn).
+
+    Parámetros
+    ----------
+    dir_artefactos : str, opcional
+        Directorio con metadata.json y los .npy.
+    mmap : bool, opcional
+        Si True (por defecto) los arrays se abren como memory-map de solo lectura.
+
+    Devuelve
+    -------
+    Artefactos
+    """
+    with open(os.path.join(dir_artefactos, 'metadata.json'), encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    version = metadata.get('formato_version')
+    if version is None or version > FORMATO_VERSION:
+        raise ValueError(
+            f"Versión de formato de artefactos no soportada: {version} (máxima {FORMATO_VERSION})"
+        )
+
+    arrays = {}
+    for nombre, info in metadata['arrays'].items():
+        array = np.load(os.path.join(dir_artefactos, info['fichero']),
+                        mmap_mode='r' if mmap else None, allow_pickle=False)
+        if list(array.shape) != info['forma']:
+            raise ValueError(f"El array '{nombre}' tiene forma {array.shape} y la cabecera indica {info['forma']}")
+        arrays[nombre] = array
+    return Artefactos(metadata, arrays)
+
+
+def proyectar_pca(art: Artefactos, X) -> np.ndarray:
+    """Equivalente a `pca.transform(X)` con los arrays guardados."""
+    proyeccion = (X - art['pca_media']) @ np.asarray(art['pca_componentes']).T
+    if art.metadata['pca'].get('whiten'):
+        proyeccion /= np.sqrt(art['pca_varianza'])
+    return proyeccion
+
+
+# ------------------------------------------------------
+# Compuerta de riesgo por z-score
+# ------------------------------------------------------
+# En el preproceso, una póliza es 'Very High' si |z| > 3 en INSURED_VALUE, PREMIUM
+# o CLAIM_PAID, y el K-Means se entrena solo con las 'Normal'. La compuerta guarda
+# las medias y desviaciones (ddof=0, como scipy.stats.zscore) para aplicar el
+# mismo filtro a los solicitantes antes de pasarlos al K-Means.
+
+class CompuertaRiesgo:
+    """
+    Filtro z-score ajustado: un solicitante es 'Very High' si alguna de las
+    `columnas` está a más de `umbral` desviaciones típicas de la media.
+
+    Parámetros
+    ----------
+    columnas : list[str], opcional
+        Variables de la compuerta (por defecto INSURED_VALUE, PREMIUM, CLAIM_PAID).
+    media, std : array-like, opcional
+        Estadísticos ajustados (ver `fit` y `cargar`).
+    umbral : float, opcional
+        Número de desviaciones típicas (por defecto 3).
+    """
+
+    def __init__(self, columnas=COLUMNAS_COMPUERTA, media=None, std=None, umbral: float = 3.0):
+        self.columnas = list(columnas)
+        self.media = None if media is None else np.asarray(media, dtype=np.float64)
+        self.std = None if std is None else np.asarray(std, dtype=np.float64)
+        self.umbral = umbral
+
+    def fit(self, df) -> 'CompuertaRiesgo':
+        """Calcula media y desviación típica (ddof=0) de cada columna, ignorando nulos."""
+        X = np.asarray(df[self.columnas], dtype=np.float64)
+        self.media = np.nanmean(X, axis=0)
+        self.std = np.nanstd(X, axis=0)
+        return self
+
+    def muy_alto_matriz(self, X: np.ndarray) -> np.ndarray:
+        """Máscara 'Very High' para una matriz (n × columnas) en el orden de `columnas`."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (np.abs((X - self.media) / self.std) > self.umbral).any(axis=1)
+
+    def muy_alto(self, df) -> np.ndarray:
+        """Máscara 'Very High' para cada fila de `df`."""
+        return self.muy_alto_matriz(np.asarray(df[self.columnas], dtype=np.float64))
+
+    def guardar(self, ruta: str = compuerta_path) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        contenido = {
+            'formato_version': FORMATO_VERSION,
+            'creado': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'columnas': self.columnas,
+            'media': self.media.tolist(),
+            'std': self.std.tolist(),
+            'umbral': self.umbral,
+        }
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False, indent=1)
+        return ruta
+
+    @classmethod
+    def cargar(cls, ruta: str = compuerta_path) -> 'CompuertaRiesgo':
+        with open(ruta, encoding='utf-8') as f:
+            contenido = json.load(f)
+        version = contenido.get('formato_version')
+        if version is None or version > FORMATO_VERSION:
+            raise ValueError(
+                f"Versión de formato de la compuerta no soportada: {version} (máxima {FORMATO_VERSION})"
+            )
+        return cls(contenido['columnas'], contenido['media'], contenido['std'], contenido['umbral'])
+
+
+# ------------------------------------------------------
+# Conversión desde los pickles y verificación de equivalencia
+# ------------------------------------------------------
+
+def _cargar_pickles(dir_modelos: str):
+    import joblib
+    pipeline = joblib.load(os.path.join(dir_modelos, 'preprocessing_pipeline.pkl'))
+    kmeans = joblib.load(os.path.join(dir_modelos, 'kmeans_model.pkl'))
+    ruta_pca = os.path.join(dir_modelos, 'pca_model.pkl')
+    pca = joblib.load(ruta_pca) if os.path.exists(ruta_pca) else None
+    return pipeline, kmeans, pca
+
+
+def convertir_pickles(dir_modelos: str = MODELOS_DIR, dir_salida: str = artefactos_dir) -> str:
+    """
+    Convierte preprocessing_pipeline.pkl, kmeans_model.pkl y pca_model.pkl de
+    `dir_modelos` al formato ligero en `dir_salida`.
+    """
+    pipeline, kmeans, pca = _cargar_pickles(dir_modelos)
+    return guardar_artefactos(pipeline, kmeans, pca, dir_salida)
+
+
+def verificar_equivalencia(
+    dir_modelos: str = MODELOS_DIR,
+    dir_artefactos: str = artefactos_dir,
+    n_filas: int = 100_000
+) -> Dict[str, float]:
+    """
+    Comprueba que los artefactos reproducen los pickles: mismos clústeres que
+    `pipeline.transform` + `kmeans.predict` y misma proyección PCA (a precisión
+    de coma flotante) sobre `n_filas` solicitantes sintéticos. Informa además
+    del tiempo de carga de ambos formatos. Lanza AssertionError si algo difiere.
+    """
+    from kernel_kmeans import KernelKMeans, generar_clientes_aleatorios
+
+    inicio = time.perf_counter()
+    pipeline, kmeans, pca = _cargar_pickles(dir_modelos)
+    t_pickles = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    art = cargar_artefactos(dir_artefactos)
+    t_artefactos = time.perf_counter() - inicio
+
+    kernel = KernelKMeans.desde_artefactos(art)
+    df = generar_clientes_aleatorios(n_filas, kernel)
+    X = pipeline.transform(df)
+
+    diferencias = int((kernel.predict(df) != kmeans.predict(X)).sum())
+    assert diferencias == 0, f"{diferencias} filas con clúster distinto"
+    assert art.metadata['kmeans']['n_clusters'] == kmeans.n_clusters
+
+    if pca is not None:
+        X_denso = X.toarray() if hasattr(X, 'toarray') else X
+        np.testing.assert_allclose(proyectar_pca(art, X_denso), pca.transform(X_denso), rtol=1e-9, atol=1e-9)
+
+    print(f"Equivalencia verificada en {n_filas} filas | carga pickles: {t_pickles * 1000:.1f} ms | "
+          f"carga artefactos: {t_artefactos * 1000:.2f} ms")
+    return {'filas': n_filas, 'carga_pickles_s': t_pickles, 'carga_artefactos_s': t_artefactos}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Formato ligero de artefactos de modelo.')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    conv = sub.add_parser('convertir', help='Convierte los pickles de Modelos/ al formato ligero')
+    conv.add_argument('--modelos', default=MODELOS_DIR)
+    conv.add_argument('--salida', default=artefactos_dir)
+    ver = sub.add_parser('verificar', help='Comprueba la equivalencia pickles <-> artefactos')
+    ver.add_argument('--modelos', default=MODELOS_DIR)
+    ver.add_argument('--artefactos', default=artefactos_dir)
+    ver.add_argument('--filas', type=int, default=100_000)
+    comp = sub.add_parser('compuerta', help='Ajusta y guarda la compuerta z-score de riesgo')
+    comp.add_argument('--datos', required=True, help='CSV de entrenamiento (con las pólizas Very High)')
+    comp.add_argument('--umbral', type=float, default=3.0)
+    comp.add_argument('--salida', default=compuerta_path)
+    args = parser.parse_args(argv)
+
+    if args.comando == 'convertir':
+        print(f"Artefactos guardados en {convertir_pickles(args.modelos, args.salida)}")
+    elif args.comando == 'compuerta':
+        import pandas as pd
+        df = pd.read_csv(args.datos, usecols=COLUMNAS_COMPUERTA)
+        compuerta = CompuertaRiesgo(umbral=args.umbral).fit(df)
+        print(f"{int(compuerta.muy_alto(df).sum())} de {len(df)} pólizas 'Very High' | "
+              f"compuerta guardada en {compuerta.guardar(args.salida)}")
+    else:
+        verificar_equivalencia(args.modelos, args.artefactos, args.filas)
+
+
+if __name__ == '__main__':
+    main()
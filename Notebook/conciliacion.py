@@ -0,0 +1,345 @@
+# ——————————————————————————————
+# Unión de ficheros anuales con deduplicación por hash y conciliación de solapes
+# ——————————————————————————————
+# 01-EDA hace pd.concat([df1, df2]) de motor_data11-14lats.csv y
+# motor_data14-2018.csv (los dos cubren parte de 2014) y después drop_duplicates(),
+# que compara todas las columnas de todas las filas. Además, el README avisa de
+# posibles pólizas casi duplicadas bajo el mismo OBJECT_ID. Aquí:
+#
+#   1. Cada fila se resume en una huella de 64 bits (pd.util.hash_pandas_object)
+#      calculada de forma vectorizada sobre una representación canónica (números
+#      como float64, fechas ya parseadas, texto), de modo que la misma póliza da
+#      la misma huella aunque venga de otro fichero o de otro bloque.
+#   2. Los duplicados exactos se detectan ordenando las huellas: se conserva la
+#      primera aparición en el orden de concatenación (como keep='first').
+#   3. Los solapes (mismo OBJECT_ID y mismo INSR_BEGIN pero filas distintas) se
+#      detectan con un sort-merge sobre las dos claves de las filas conservadas,
+#      sin comparar el DataFrame completo.
+#   4. Se genera un informe de conciliación: filas leídas, duplicados (dentro del
+#      mismo fichero o de un fichero anterior), grupos de solape y columnas en las
+#      que difieren las pólizas solapadas.
+#
+# Con ficheros, la primera pasada lee por bloques y solo guarda huella, OBJECT_ID,
+# INSR_BEGIN y fichero de cada fila (25 bytes), así que escala a decenas de
+# millones de filas; la segunda pasada escribe las filas conservadas y extrae las
+# solapadas. Dos filas distintas comparten huella con probabilidad ~n²/2^65
+# (del orden de 1e-6 con 10 millones de filas).
+#
+# Ejemplos:
+#   python conciliacion.py --datos ../Data/motor_data11-14lats.csv ../Data/motor_data14-2018.csv --informe ../Data/conciliacion
+#   python conciliacion.py --datos ../Data/motor_data11-14lats.csv ../Data/motor_data14-2018.csv --salida ../Data/motor_data_2011_2018.csv
+
+import argparse
+import io
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Claves de una póliza: el vehículo y el inicio de la vigencia
+CLAVES_SOLAPE = ['OBJECT_ID', 'INSR_BEGIN']
+
+
+# ------------------------------------------------------
+# Huellas de fila y claves
+# ------------------------------------------------------
+
+def _canonica(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Representación de `df` con tipos independientes del fichero y del bloque:
+    números (enteros, nullable, bool) como float64, fechas como datetime64[ns]
+    y el resto como object. Las categorías se dejan tal cual: su hash es el de sus
+    valores, no el de sus códigos.
+    """
+    columnas = {}
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            columnas[col] = serie.astype('datetime64[ns]').to_numpy()
+        elif pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            columnas[col] = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            columnas[col] = serie.array
+        else:
+            columnas[col] = serie.astype(object).to_numpy()
+    return pd.DataFrame(columnas, index=df.index)
+
+
+def huellas_filas(df: pd.DataFrame, columnas: List[str] = None) -> np.ndarray:
+    """
+    Huella de 64 bits de cada fila de `df` (sin el índice).
+
+    Parámetros
+    ----------
+    df : pd.DataFrame
+        Datos ya tipados (fechas parseadas, ver `data_utils.tipar_motor_data`).
+    columnas : list[str], opcional
+        Columnas que entran en la huella (por defecto todas).
+
+    Devuelve
+    -------
+    np.ndarray
+        Array uint64 con una huella por fila.
+    """
+    datos = df if columnas is None else df[columnas]
+    return pd.util.hash_pandas_object(_canonica(datos), index=False).to_numpy()
+
+
+def claves_solape(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    OBJECT_ID e INSR_BEGIN (en ns) como int64 y máscara de filas con ambas claves.
+    """
+    col_oid, col_inicio = CLAVES_SOLAPE
+    oid = pd.to_numeric(df[col_oid], errors='coerce')
+    inicio = pd.to_datetime(df[col_inicio], errors='coerce')
+    validas = (oid.notna() & inicio.notna()).to_numpy()
+    return (oid.to_numpy(dtype=np.float64, na_value=0).astype(np.int64),
+            inicio.astype('datetime64[ns]').to_numpy().view(np.int64), validas)
+
+
+# ------------------------------------------------------
+# Duplicados exactos y solapes sobre los arrays compactos
+# ------------------------------------------------------
+
+def duplicados_exactos(huellas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Marca las filas cuya huella ya apareció antes (orden de `huellas`).
+
+    Devuelve
+    -------
+    (duplicada, origen) : np.ndarray, np.ndarray
+        Máscara de filas duplicadas y, para cada fila, la posición de la primera
+        fila con su huella (ella misma si no está duplicada).
+    """
+    n = len(huellas)
+    orden = np.argsort(huellas, kind='stable')   # estable: la primera aparición va delante
+    ordenadas = huellas[orden]
+    repetida = np.empty(n, dtype=bool)
+    repetida[:1] = False
+    np.equal(ordenadas[1:], ordenadas[:-1], out=repetida[1:])
+
+    # Posición (en el orden) del inicio de cada racha de huellas iguales
+    inicio_racha = np.maximum.accumulate(np.where(repetida, 0, np.arange(n)))
+    duplicada = np.empty(n, dtype=bool)
+    duplicada[orden] = repetida
+    origen = np.empty(n, dtype=np.int64)
+    origen[orden] = orden[inicio_racha]
+    return duplicada, origen
+
+
+def grupos_solape(object_id: np.ndarray, inicio: np.ndarray, candidatas: np.ndarray) -> np.ndarray:
+    """
+    Sort-merge sobre (OBJECT_ID, INSR_BEGIN) de las filas `candidatas`.
+
+    Devuelve
+    -------
+    np.ndarray
+        Grupo de solape de cada fila (0, 1, ...) o -1 si su clave no se repite.
+    """
+    filas = np.flatnonzero(candidatas)
+    orden = filas[np.lexsort((inicio[filas], object_id[filas]))]
+    oid, ini = object_id[orden], inicio[orden]
+    nuevo = np.ones(len(orden), dtype=bool)
+    nuevo[1:] = (oid[1:] != oid[:-1]) | (ini[1:] != ini[:-1])
+    racha = np.cumsum(nuevo) - 1
+    en_solape = np.bincount(racha)[racha] > 1
+
+    # Renumerar solo las rachas con más de una fila
+    grupos = np.full(len(object_id), -1, dtype=np.int64)
+    grupos[orden[en_solape]] = (np.cumsum(nuevo & en_solape) - 1)[en_solape]
+    return grupos
+
+
+def _columnas_distintas(solapes: pd.DataFrame) -> Dict[str, int]:
+    """Número de grupos de solape en los que cada columna toma más de un valor."""
+    datos = _canonica(solapes.drop(columns=['GRUPO_SOLAPE', 'FICHERO'], errors='ignore'))
+    distintos = datos.groupby(solapes['GRUPO_SOLAPE'].to_numpy()).nunique(dropna=False)
+    return {c: int(n) for c, n in (distintos > 1).sum().items() if n > 0}
+
+
+def _resumen(duplicada: np.ndarray, origen: np.ndarray, fichero: np.ndarray, grupos: np.ndarray) -> Dict:
+    entre_ficheros = duplicada & (fichero[origen] != fichero)
+    en_solape = grupos >= 0
+    n_grupos = int(grupos.max()) + 1 if en_solape.any() else 0
+    ficheros_por_grupo = (pd.Series(fichero[en_solape]).groupby(grupos[en_solape]).nunique()
+                          if n_grupos else pd.Series(dtype=int))
+    return {
+        'filas_leidas': int(len(duplicada)),
+        'duplicados_exactos': int(duplicada.sum()),
+        'duplicados_entre_ficheros': int(entre_ficheros.sum()),
+        'filas_conservadas': int((~duplicada).sum()),
+        'solapes': {
+            'grupos': n_grupos,
+            'filas': int(en_solape.sum()),
+            'grupos_entre_ficheros': int((ficheros_por_grupo > 1).sum()),
+        },
+    }
+
+
+# ------------------------------------------------------
+# Conciliación de un DataFrame en memoria
+# ------------------------------------------------------
+
+def deduplicar(df: pd.DataFrame, fichero: np.ndarray = None) -> Tuple[pd.DataFrame, Dict, pd.DataFrame]:
+    """
+    Elimina los duplicados exactos de `df` (equivalente a drop_duplicates() con
+    keep='first') y detecta los solapes entre las filas que quedan.
+
+    Parámetros
+    ----------
+    df : pd.DataFrame
+        Datos tipados (p.ej. la concatenación de los CSV anuales).
+    fichero : np.ndarray, opcional
+        Fichero de origen de cada fila (para separar los duplicados entre ficheros).
+
+    Devuelve
+    -------
+    (df_sin_duplicados, informe, solapes)
+        El DataFrame con índice reiniciado, el informe de conciliación y las filas
+        solapadas con su GRUPO_SOLAPE.
+    """
+    fichero = np.zeros(len(df), dtype=np.int8) if fichero is None else np.asarray(fichero)
+    duplicada, origen = duplicados_exactos(huellas_filas(df))
+    oid, inicio, validas = claves_solape(df)
+    grupos = grupos_solape(oid, inicio, validas & ~duplicada)
+
+    informe = _resumen(duplicada, origen, fichero, grupos)
+    solapes = df[grupos >= 0].assign(GRUPO_SOLAPE=grupos[grupos >= 0], FICHERO=fichero[grupos >= 0])
+    solapes = solapes.sort_values(['GRUPO_SOLAPE', 'FICHERO'], kind='mergesort').reset_index(drop=True)
+    informe['solapes']['columnas_distintas'] = _columnas_distintas(solapes) if len(solapes) else {}
+    return df[~duplicada].reset_index(drop=True), informe, solapes
+
+
+# ------------------------------------------------------
+# Conciliación de ficheros por bloques
+# ------------------------------------------------------
+
+def _bloques(rutas: List[str], chunksize: int, tipar: bool = True):
+    """
+    (índice del fichero, bloque) de todos los CSV en orden: tipados o, con
+    tipar=False, como texto tal cual (para reescribirlos sin reformatear números).
+    """
+    from data_utils import tipar_motor_data
+
+    for i, ruta in enumerate(rutas):
+        if tipar:
+            for bloque in pd.read_csv(ruta, chunksize=chunksize):
+                yield i, tipar_motor_data(bloque)
+        else:
+            for bloque in pd.read_csv(ruta, chunksize=chunksize, dtype=str, keep_default_na=False):
+                yield i, bloque
+
+
+def conciliar_ficheros(
+    rutas: List[str],
+    salida: str = None,
+    dir_informe: str = None,
+    chunksize: int = 500_000
+) -> Dict:
+    """
+    Une los CSV de `rutas` sin duplicados exactos y concilia los solapes, leyendo
+    por bloques de `chunksize` filas.
+
+    Parámetros
+    ----------
+    rutas : list[str]
+        CSV en el orden de concatenación (la primera aparición es la que se conserva).
+    salida : str, opcional
+        CSV donde escribir las filas conservadas (con el texto original).
+    dir_informe : str, opcional
+        Carpeta donde escribir conciliacion.json y solapes.csv.
+    chunksize : int, opcional
+        Filas por bloque (por defecto 500.000).
+
+    Devuelve
+    -------
+    dict
+        Informe de conciliación, con el detalle por fichero.
+    """
+    inicio_t = time.perf_counter()
+
+    # Primera pasada: solo los arrays compactos de cada fila
+    huellas, oids, inicios, validas, ficheros = [], [], [], [], []
+    for i, bloque in _bloques(rutas, chunksize):
+        huellas.append(huellas_filas(bloque))
+        oid, ini, val = claves_solape(bloque)
+        oids.append(oid)
+        inicios.append(ini)
+        validas.append(val)
+        ficheros.append(np.full(len(bloque), i, dtype=np.int8))
+    huellas, oids, inicios = np.concatenate(huellas), np.concatenate(oids), np.concatenate(inicios)
+    validas, ficheros = np.concatenate(validas), np.concatenate(ficheros)
+
+    duplicada, origen = duplicados_exactos(huellas)
+    grupos = grupos_solape(oids, inicios, validas & ~duplicada)
+    informe = _resumen(duplicada, origen, ficheros, grupos)
+    informe['ficheros'] = [{
+        'ruta': os.path.abspath(ruta),
+        'filas': int((ficheros == i).sum()),
+        'duplicados_exactos': int((duplicada & (ficheros == i)).sum()),
+        'duplicados_de_ficheros_anteriores': int((duplicada & (ficheros == i) & (ficheros[origen] != i)).sum()),
+    } for i, ruta in enumerate(rutas)]
+
+    # Segunda pasada: filas conservadas (texto original) y filas solapadas
+    solapes, posicion = [], 0
+    if salida is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    escribir_cabecera = True
+    for i, bloque in _bloques(rutas, chunksize, tipar=False):
+        tramo = slice(posicion, posicion + len(bloque))
+        posicion += len(bloque)
+        if salida is not None:
+            bloque[~duplicada[tramo]].to_csv(salida, mode='w' if escribir_cabecera else 'a',
+                                             header=escribir_cabecera, index=False)
+            escribir_cabecera = False
+        en_solape = grupos[tramo] >= 0
+        if en_solape.any():
+            solapes.append(bloque[en_solape].assign(GRUPO_SOLAPE=grupos[tramo][en_solape], FICHERO=i))
+
+    from data_utils import tipar_motor_data
+    if solapes:
+        # Las filas solapadas son pocas: se vuelven a parsear desde su texto para tiparlas
+        texto = pd.concat(solapes, ignore_index=True).to_csv(index=False)
+        solapes = tipar_motor_data(pd.read_csv(io.StringIO(texto)))
+    else:
+        solapes = pd.DataFrame()
+    if len(solapes):
+        solapes = solapes.sort_values(['GRUPO_SOLAPE', 'FICHERO'], kind='mergesort').reset_index(drop=True)
+    informe['solapes']['columnas_distintas'] = _columnas_distintas(solapes) if len(solapes) else {}
+    informe['segundos'] = round(time.perf_counter() - inicio_t, 3)
+
+    if dir_informe is not None:
+        os.makedirs(dir_informe, exist_ok=True)
+        with open(os.path.join(dir_informe, 'conciliacion.json'), 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=1)
+        solapes.to_csv(os.path.join(dir_informe, 'solapes.csv'), index=False)
+    return informe
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Unión de CSV de motor_data sin duplicados y con conciliación de solapes.')
+    parser.add_argument('--datos', nargs='+', required=True, help='CSV en orden de concatenación')
+    parser.add_argument('--salida', default=None, help='CSV con las filas conservadas')
+    parser.add_argument('--informe', default=None, help='Carpeta para conciliacion.json y solapes.csv')
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    informe = conciliar_ficheros(args.datos, args.salida, args.informe, args.chunksize)
+    for f in informe['ficheros']:
+        print(f"{f['ruta']}: {f['filas']} filas, {f['duplicados_exactos']} duplicados exactos "
+              f"({f['duplicados_de_ficheros_anteriores']} de ficheros anteriores)")
+    solapes = informe['solapes']
+    print(f"Filas conservadas: {informe['filas_conservadas']} de {informe['filas_leidas']}")
+    print(f"Solapes OBJECT_ID + INSR_BEGIN: {solapes['grupos']} grupos, {solapes['filas']} filas "
+          f"({solapes['grupos_entre_ficheros']} entre ficheros)")
+    if solapes['columnas_distintas']:
+        print("Columnas que difieren en los solapes (grupos): "
+              + ', '.join(f'{c}={n}' for c, n in solapes['columnas_distintas'].items()))
+    print(f"Tiempo: {informe['segundos']:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,31 +7,38 @@ import numpy as np  # Para operaciones numéricas y manejo de arrays
 import datetime       # Para normalizar y manipular fechas
 import re             # Para normalización y validación de cadenas de fecha
 import math           # Para operaciones matemáticas básicas (p.ej. funciones trigonométricas)
+import os             # Para rutas de ficheros y directorios de caché
+import hashlib        # Para calcular el hash de los ficheros de origen
+import json           # Para la clave canónica de los argumentos de lectura de la caché
+import time           # Para medir tiempos de carga
+import warnings       # Para avisar cuando no hay motor de Parquet disponible
+import logging        # Para los diagnósticos de imputación (en lugar de print)
 
 # ——————————————————————————————
 # Importaciones para tipado
 # ——————————————————————————————
 
-from typing import Union, List  
+from typing import Union, List, Dict  
 # Union: para anotar parámetros o retornos que pueden tener varios tipos  
 # List: para anotar listas con tipos de elemento específicos
+# Dict: para anotar diccionarios (p.ej. mapas de reemplazos)
 
 # ——————————————————————————————
-# Librerías de terceros: cálculo y análisis de datos
+# Capa de gráficos (carga diferida)
 # ——————————————————————————————
-
-import numpy as np    # Cálculo numérico y álgebra de matrices
-import pandas as pd   # Manipulación y análisis de estructuras de datos tabulares
-
-from scipy.stats import gaussian_kde  
-# gaussian_kde: estimación de densidad kernel univariada/multivariada
+# Las funciones que dibujan viven en graficos_eda.py: importar este módulo no carga
+# matplotlib ni scipy, que solo se importan la primera vez que se pide un gráfico
+# (`du.plot_hist_with_mean_and_kde(...)` sigue funcionando igual, ver __getattr__ al final).
 
 # ——————————————————————————————
-# Librería de visualización
+# Instrumentación (tiempo, filas y memoria por llamada)
 # ——————————————————————————————
+# Las funciones y métodos públicos llevan @instrumentar; desactivada, solo cuesta
+# comprobar un booleano (ver instrumentacion.py).
 
-import matplotlib.pyplot as plt  
-# plt: interfaz de Matplotlib para crear gráficos (líneas, histogramas, scatter, etc.)
+from instrumentacion import instrumentar
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -40,6 +47,81 @@ import matplotlib.pyplot as plt
 # ------------------------------------------------------
 # Función para imputar valores nulos en columnas de un DataFrame por distribución de los datos
 # --------------------------------------------------------
+
+class ImputadorDistribucion:
+    """
+    Versión ajustable de `imputar_nulos_por_distribucion`: calcula una vez el valor
+    de relleno de cada columna y lo guarda para aplicarlo a nuevos lotes.
+      - Columna numérica con |skewness| < skew_threshold: mediana.
+      - Columna numérica con |skewness| ≥ skew_threshold: moda.
+      - Columna no numérica: moda.
+
+    Las estadísticas (media, mediana, asimetría y moda) de todas las columnas se
+    calculan juntas sobre el bloque de columnas, en lugar de columna a columna.
+    Los diagnósticos se emiten con `logging` (logger 'data_utils').
+
+    Parámetros
+    ----------
+    columnas : str o list[str]
+        Columna(s) a imputar.
+    skew_threshold : float, opcional
+        Umbral de asimetría para elegir mediana vs. moda (por defecto 0.5).
+    """
+
+    def __init__(self, columnas: Union[str, List[str]], skew_threshold: float = 0.5):
+        self.columnas = [columnas] if isinstance(columnas, str) else list(columnas)
+        self.skew_threshold = skew_threshold
+
+    @instrumentar
+    def fit(self, df: pd.DataFrame) -> 'ImputadorDistribucion':
+        """
+        Calcula las estadísticas y el valor de relleno de cada columna.
+        Deja en `estadisticas_` una tabla con skew, media, mediana, moda y criterio.
+        """
+        datos = df[self.columnas]
+        numericas = [c for c in self.columnas if pd.api.types.is_numeric_dtype(datos[c])]
+
+        estadisticas = pd.DataFrame(index=self.columnas, columns=['skew', 'media', 'mediana', 'moda', 'criterio'],
+                                    dtype=object)
+        modas = datos.mode(dropna=True)
+        estadisticas['moda'] = modas.iloc[0] if not modas.empty else np.nan
+        if numericas:
+            resumen = datos[numericas].agg(['skew', 'mean', 'median']).T
+            estadisticas.loc[numericas, ['skew', 'media', 'mediana']] = resumen[['skew', 'mean', 'median']].to_numpy()
+
+        simetricas = estadisticas['skew'].astype(float).abs() < self.skew_threshold
+        estadisticas['criterio'] = np.where(simetricas, 'mediana', 'moda')
+        estadisticas['valor'] = np.where(simetricas, estadisticas['mediana'], estadisticas['moda'])
+
+        for col, fila in estadisticas.iterrows():
+            if col in numericas:
+                logger.info(
+                    "'%s': skew=%.3f media=%.3f mediana=%.3f moda=%s -> imputa con %s",
+                    col, fila['skew'], fila['media'], fila['mediana'], fila['moda'], fila['criterio']
+                )
+            else:
+                logger.info("'%s' no numérica -> imputa con moda: %s", col, fila['moda'])
+
+        self.estadisticas_ = estadisticas
+        self.valores_ = {c: v for c, v in estadisticas['valor'].items() if not pd.isna(v)}
+        return self
+
+    @instrumentar
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rellena los nulos de `df` (in-place) con los valores ajustados y lo devuelve.
+        Es un único recorrido O(filas) por columna; sirve para lotes o chunks.
+        """
+        for col, valor in self.valores_.items():
+            if col in df.columns:
+                df[col] = df[col].fillna(valor)
+        return df
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+
+@instrumentar
 def imputar_nulos_por_distribucion(
     df: pd.DataFrame,
     columnas: Union[str, List[str]],
@@ -52,6 +134,9 @@ def imputar_nulos_por_distribucion(
       - Si la columna es numérica y |skewness| ≥ skew_threshold: se imputa con la moda.
       - Si no es numérica: se imputa siempre con la moda.
 
+    Solo se procesan las columnas que tienen nulos. Para reutilizar los valores
+    de relleno con datos nuevos, usar `ImputadorDistribucion` directamente.
+
     Parámetros
     ----------
     df : pd.DataFrame
@@ -66,46 +151,231 @@ def imputar_nulos_por_distribucion(
     pd.DataFrame
         El mismo DataFrame con las columnas imputadas.
     """
-    if isinstance(columnas, (list, tuple)):
-        for col in columnas:
-            imputar_nulos_por_distribucion(df, col, skew_threshold)
+    columnas = [columnas] if isinstance(columnas, str) else list(columnas)
+    con_nulos = df[columnas].isna().any()
+    columnas = con_nulos.index[con_nulos].tolist()
+    if not columnas:
+        return df  # Nada que imputar
+
+    return ImputadorDistribucion(columnas, skew_threshold).fit_transform(df)
+
+
+
+# ------------------------------------------------------
+# Imputación jerárquica por moda (grupo estricto -> grupo relajado -> global)
+# --------------------------------------------------------
+# Sustituye al bucle del notebook de preproceso que, para cada columna, hacía un
+# groupby(['TYPE_VEHICLE','MAKE','USAGE']).agg(lambda x: x.mode()[0]), un merge,
+# otro groupby('TYPE_VEHICLE') con su merge y la moda global. Aquí las modas de
+# todas las columnas y todos los niveles se obtienen contando pares (grupo, valor)
+# sobre una única tabla larga, sin lambdas por grupo. Las tablas ajustadas se
+# guardan en el objeto (serializable con joblib) para aplicarlas a nuevos clientes.
+
+class ImputadorJerarquico:
+    """
+    Imputa columnas numéricas con la moda de su grupo, con niveles de respaldo.
+
+    Para cada columna se imputan los registros nulos, con valor 0 o marcados como
+    outlier: primero con la moda del nivel más estricto (p.ej. TYPE_VEHICLE + MAKE
+    + USAGE), si el grupo no existe con la del siguiente nivel (TYPE_VEHICLE) y por
+    último con la moda global. Las modas se calculan solo con registros válidos y,
+    en caso de empate, se toma el valor más pequeño (igual que `Series.mode()[0]`).
+
+    Parámetros
+    ----------
+    columnas : list[str]
+        Columnas a imputar.
+    niveles : list[list[str]], opcional
+        Claves de agrupación de cada nivel, de más estricto a más relajado.
+    cero_es_nulo : bool, opcional
+        Si True (por defecto) los ceros también se imputan.
+    """
+
+    def __init__(
+        self,
+        columnas: List[str],
+        niveles: List[List[str]] = (['TYPE_VEHICLE', 'MAKE', 'USAGE'], ['TYPE_VEHICLE']),
+        cero_es_nulo: bool = True
+    ):
+        self.columnas = list(columnas)
+        self.niveles = [list(n) for n in niveles]
+        self.cero_es_nulo = cero_es_nulo
+
+    def _mascara_imputar(self, df: pd.DataFrame, outliers=None) -> pd.DataFrame:
+        """Máscara booleana (filas x columnas) de los valores a imputar."""
+        valores = df[self.columnas]
+        mascara = valores.isna()
+        if self.cero_es_nulo:
+            mascara |= valores == 0
+        if outliers is not None:
+            for col in self.columnas:
+                if isinstance(outliers, pd.DataFrame):
+                    if col in outliers.columns:
+                        mascara[col] |= outliers[col].reindex(df.index, fill_value=False).astype(bool)
+                elif col in outliers:
+                    mascara[col] |= df.index.isin(outliers[col])
+        return mascara
+
+    @staticmethod
+    def _modas(largo: pd.DataFrame, claves: List[str]) -> pd.Series:
+        """
+        Moda de 'valor' por (claves, 'variable') a partir de la tabla larga:
+        se cuentan los pares y se queda el más frecuente (el menor en empates).
+        """
+        conteos = (largo.groupby(claves + ['variable', 'valor'], observed=True, sort=False)
+                   .size().rename('n').reset_index())
+        conteos = conteos.sort_values(['n', 'valor'], ascending=[False, True], kind='mergesort')
+        modas = conteos.drop_duplicates(subset=claves + ['variable'], keep='first')
+        return modas.set_index(claves + ['variable'])['valor']
+
+    @instrumentar
+    def fit(self, df: pd.DataFrame, outliers=None) -> 'ImputadorJerarquico':
+        """
+        Calcula las tablas de modas de todos los niveles.
+
+        Parámetros
+        ----------
+        df : pd.DataFrame
+            Datos de entrenamiento.
+        outliers : pd.DataFrame o dict, opcional
+            Registros a excluir del cálculo (y a imputar): máscara booleana por
+            columna o {columna: lista de índices} como `outliers_indices_dict`.
+        """
+        claves = list(dict.fromkeys(c for nivel in self.niveles for c in nivel))
+        mascara = self._mascara_imputar(df, outliers)
+
+        # Tabla larga (claves..., variable, valor) solo con los valores válidos
+        largo = df[claves + self.columnas].melt(id_vars=claves, var_name='variable', value_name='valor')
+        largo = largo[~mascara.melt(value_name='m')['m'].to_numpy()]
+
+        self.tablas_ = [self._modas(largo, nivel) for nivel in self.niveles]
+        self.moda_global_ = self._modas(largo.assign(_todo=0), ['_todo']).droplevel('_todo')
+        return self
+
+    @instrumentar
+    def transform(self, df: pd.DataFrame, outliers=None) -> pd.DataFrame:
+        """
+        Imputa `df` (in-place) con las tablas ajustadas y lo devuelve.
+        """
+        mascara = self._mascara_imputar(df, outliers)
+        for col in self.columnas:
+            filas = mascara[col].to_numpy()
+            if not filas.any():
+                continue
+            imputado = pd.Series(np.nan, index=df.index[filas], dtype=float)
+            for nivel, tabla in zip(self.niveles, self.tablas_):
+                pendientes = imputado.isna().to_numpy()
+                if not pendientes.any():
+                    break
+                claves = df.loc[filas, nivel][pendientes]
+                indice = pd.MultiIndex.from_frame(claves.assign(variable=col).astype(object))
+                imputado[pendientes] = tabla.reindex(indice).to_numpy(dtype=float)
+            imputado = imputado.fillna(self.moda_global_.get(col, np.nan))
+            df.loc[filas, col] = imputado.to_numpy()
         return df
 
-    col = columnas
+    def fit_transform(self, df: pd.DataFrame, outliers=None) -> pd.DataFrame:
+        return self.fit(df, outliers).transform(df, outliers)
 
-    if df[col].isnull().sum() == 0:
-        return df  # Nada que imputar
 
-    modos = df[col].mode()
-    moda  = modos[0] if not modos.empty else None
+# ------------------------------------------------------
+# Normalización de marcas (MAKE) con vocabulario persistido
+# ------------------------------------------------------
+# Sustituye a la limpieza de MAKE de los notebooks de preproceso y de generación
+# de clientes: str.upper().str.strip(), el mapa de `reemplazos` y un
+# `apply(lambda x: x if x in marcas_frecuentes else 'OTRAS')` fila a fila. Aquí la
+# limpieza se hace sobre los valores distintos (factorize) y la agrupación en
+# 'OTRAS' con `isin` sobre ellos, y el vocabulario ajustado se guarda en el objeto
+# (serializable con joblib) para aplicarlo igual a los nuevos clientes.
+
+MARCA_OTRAS = 'OTRAS'
+
+# Reemplazos manuales para corregir inconsistencias conocidas
+REEMPLAZOS_MAKE = {
+    'TOYOTA JAPAN': 'TOYOTA',
+}
 
-    if pd.api.types.is_numeric_dtype(df[col]):
-        skewness = df[col].skew(skipna=True)
-        media    = df[col].mean()
-        mediana  = df[col].median()
 
-        print(f"Asimetría (skewness) de '{col}': {skewness:.3f}")
-        print(f"Media    de '{col}': {media:.3f}")
-        print(f"Mediana  de '{col}': {mediana:.3f}")
-        print(f"Moda     de '{col}': {moda}")
+class NormalizadorMarcas:
+    """
+    Normaliza una columna de marcas y agrupa las poco frecuentes en 'OTRAS'.
 
-        if abs(skewness) < skew_threshold:
-            print(f"Distribución aproximadamente simétrica (|skew| < {skew_threshold}), imputando con mediana.\n")
-            df[col] = df[col].fillna(mediana)
-        else:
-            print(f"Distribución asimétrica (|skew| ≥ {skew_threshold}), imputando con moda.\n")
-            df[col] = df[col].fillna(moda)
-    else:
-        print(f"Columna '{col}' no numérica, imputando con moda: {moda}\n")
-        df[col] = df[col].fillna(moda)
+    Parámetros
+    ----------
+    columna : str, opcional
+        Columna a normalizar (por defecto 'MAKE').
+    umbral : float, opcional
+        Proporción mínima de registros para que una marca conserve su nombre
+        (por defecto 0.01, el 1% del notebook de preproceso).
+    reemplazos : dict, opcional
+        Correcciones manuales aplicadas tras pasar a mayúsculas (por defecto
+        REEMPLAZOS_MAKE).
+
+    Atributos
+    ---------
+    vocabulario_ : list[str]
+        Marcas frecuentes; cualquier otra (o nula) pasa a 'OTRAS'.
+    """
 
-    return df
+    def __init__(self, columna: str = 'MAKE', umbral: float = 0.01, reemplazos: Dict[str, str] = None):
+        self.columna = columna
+        self.umbral = umbral
+        self.reemplazos = dict(REEMPLAZOS_MAKE if reemplazos is None else reemplazos)
+
+    @classmethod
+    def desde_categorias(cls, categorias, columna: str = 'MAKE', reemplazos: Dict[str, str] = None):
+        """
+        Normalizador ya ajustado a partir de las categorías del OneHotEncoder del
+        modelo (p.ej. `artefactos.Artefactos.categorias['MAKE']`), sin 'OTRAS'.
+        """
+        normalizador = cls(columna, reemplazos=reemplazos)
+        normalizador.vocabulario_ = sorted(str(c) for c in categorias if str(c) != MARCA_OTRAS)
+        return normalizador
+
+    def _limpiar(self, serie: pd.Series):
+        """Códigos por fila y marcas distintas ya limpias (mayúsculas, sin espacios, reemplazos)."""
+        codigos, unicas = pd.factorize(serie)
+        unicas = pd.Series(unicas, dtype=object).astype(str).str.upper().str.strip().replace(self.reemplazos)
+        return codigos, unicas
+
+    @instrumentar
+    def fit(self, df: pd.DataFrame) -> 'NormalizadorMarcas':
+        codigos, unicas = self._limpiar(df[self.columna])
+        # Registros por marca limpia; los nulos (código -1) cuentan en el total
+        conteos = pd.Series(np.bincount(codigos[codigos >= 0], minlength=len(unicas))).groupby(unicas.to_numpy()).sum()
+        self.vocabulario_ = sorted(conteos.index[conteos > self.umbral * len(df)])
+        return self
+
+    @instrumentar
+    def normalizar(self, valores) -> np.ndarray:
+        """Marcas normalizadas de `valores` (Series, array o lista)."""
+        codigos, unicas = self._limpiar(pd.Series(valores))
+        unicas = unicas.where(unicas.isin(self.vocabulario_), MARCA_OTRAS)
+        # Una categoría extra al final para los nulos (código -1), que van a 'OTRAS'
+        return np.append(unicas.to_numpy(dtype=object), MARCA_OTRAS)[codigos]
+
+    def normalizar_valor(self, valor) -> str:
+        """Versión escalar de `normalizar` para un único registro (sin pandas)."""
+        if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+            return MARCA_OTRAS
+        marca = str(valor).upper().strip()
+        marca = self.reemplazos.get(marca, marca)
+        return marca if marca in self.vocabulario_ else MARCA_OTRAS
+
+    @instrumentar
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normaliza la columna de `df` (in-place) y devuelve `df`."""
+        df[self.columna] = self.normalizar(df[self.columna])
+        return df
 
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
 
 
 # ------------------------------------------------------
 # Función para verificar si hay columnas con valores NaN
 # -------------------------------------------------------
+@instrumentar
 def verificar_columnas_con_nan(
     df: pd.DataFrame,
     *listas_de_columnas: List[str]
@@ -197,6 +467,103 @@ def normalize_date(s):
 
 
 
+# ------------------------------------------------------
+# Normalización vectorizada de fechas
+# -------------------------------------------------------
+# Versión por columnas de `normalize_date`. Las fechas de pólizas se repiten
+# muchísimo, así que primero se factorizan los valores brutos y el parseo
+# (expresiones regulares de pandas + mapa de meses) se hace solo sobre los
+# valores únicos; después se expande al tamaño de la columna con los códigos.
+# Da exactamente el mismo resultado que aplicar `normalize_date(str(x))` fila a fila.
+
+_PATRON_FECHA_MES_TEXTO = r'^(\d{1,2})[- /]([A-Za-zñÑ]+)[- /](\d{2,4})$'
+_PATRON_FECHA_NUMERICA = r'^(\d{1,2})/(\d{1,2})/(\d{2,4})$'
+
+
+def _factorizar_como_texto(serie: pd.Series):
+    """
+    Códigos y valores únicos de `serie`, con los únicos convertidos con str()
+    (los nulos también cuentan como un valor más, igual que str(x) en el parseo fila a fila).
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    return codigos, pd.Series([str(u) for u in unicos], dtype=object)
+
+
+def _dos_digitos(numeros: pd.Series) -> pd.Series:
+    """Equivalente a f"{int(x):02d}" (también para dígitos no ASCII que acepta \\d)."""
+    return numeros.map(lambda x: f"{int(x):02d}", na_action='ignore').astype(object)
+
+
+def _normalizar_fechas_unicas(valores: pd.Series) -> pd.Series:
+    """
+    Aplica la lógica de `normalize_date` de forma vectorizada sobre una Serie
+    de cadenas. Devuelve 'DD/MM/YYYY' o None por elemento.
+    """
+    s = valores.str.strip().str.replace('⁄', '/', regex=False).str.replace('–', '-', regex=False)
+
+    # Formato con mes en texto (español o inglés): 5-ene-14, 05 January 2014...
+    m1 = s.str.extract(_PATRON_FECHA_MES_TEXTO).astype(object)
+    mes_txt = m1[1].str.lower().map(MONTH_MAP_ES)
+    ok1 = m1[0].notna() & mes_txt.notna()
+    anio1 = m1[2].where(m1[2].str.len() != 2, '20' + m1[2])
+    norm1 = _dos_digitos(m1[0]).str.cat([mes_txt, anio1], sep='/')
+
+    # Formato numérico d/m/yy o dd/mm/yyyy
+    m2 = s.str.extract(_PATRON_FECHA_NUMERICA).astype(object)
+    ok2 = m2[0].notna()
+    anio2 = m2[2].where(m2[2].str.len() != 2, '20' + m2[2])
+    norm2 = _dos_digitos(m2[0]).str.cat([_dos_digitos(m2[1]), anio2], sep='/')
+
+    resultado = np.full(len(s), None, dtype=object)
+    resultado[ok2.to_numpy()] = norm2[ok2].to_numpy()
+    resultado[ok1.to_numpy()] = norm1[ok1].to_numpy()
+    return pd.Series(resultado, index=s.index, dtype=object)
+
+
+@instrumentar
+def normalizar_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Equivalente vectorizado de `serie.apply(lambda x: normalize_date(str(x)))`.
+
+    Parámetros
+    ----------
+    serie : pd.Series
+        Columna con fechas en texto en cualquiera de los formatos de `normalize_date`.
+
+    Devuelve
+    -------
+    pd.Series
+        Cadenas 'DD/MM/YYYY' (None si el valor no es una fecha reconocible),
+        con el mismo índice que `serie`.
+    """
+    codigos, unicos = _factorizar_como_texto(serie)
+    normalizadas = _normalizar_fechas_unicas(unicos).to_numpy()
+    return pd.Series(normalizadas[codigos], index=serie.index, dtype=object)
+
+
+@instrumentar
+def parsear_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna de fechas en texto a datetime64, parseando cada valor
+    distinto una sola vez. Los valores no reconocibles quedan como NaT.
+
+    Parámetros
+    ----------
+    serie : pd.Series
+        Columna con fechas en texto.
+
+    Devuelve
+    -------
+    pd.Series
+        Columna datetime64 con el mismo índice que `serie`.
+    """
+    codigos, unicos = _factorizar_como_texto(serie)
+    normalizadas = _normalizar_fechas_unicas(unicos)
+    fechas_unicas = pd.to_datetime(normalizadas, format='%d/%m/%Y', errors='coerce')
+    return pd.Series(fechas_unicas.to_numpy()[codigos], index=serie.index)
+
+
+@instrumentar
 def convertir_columnas_a_datetime(
     df: pd.DataFrame,
     columnas: Union[str, List[str]]
@@ -204,6 +571,7 @@ def convertir_columnas_a_datetime(
     """
     Convierte columna(s) de object a datetime, genera colname_year y colname_month.
     La columna original queda en formato datetime.
+    El parseo es vectorizado (ver `parsear_fechas`).
     """
     if isinstance(columnas, (list, tuple)):
         for col in columnas:
@@ -212,23 +580,238 @@ def convertir_columnas_a_datetime(
 
     col = columnas  # nombre de la columna a procesar
 
-    # Función interna de parseo
-    def parse_val(x):
-        norm = normalize_date(str(x))
-        if norm is None:
-            return pd.NaT
-        return pd.to_datetime(norm, format='%d/%m/%Y', errors='coerce')
-
-    # Parsing directo de la columna
-    df[col] = df[col].apply(parse_val)
+    # Parsing vectorizado de la columna (cada valor distinto se parsea una vez)
+    df[col] = parsear_fechas(df[col])
     # df[f"{col}_year"] = df[col].dt.year
     # df[f"{col}_month"] = df[col].dt.month
 
     return df
 
+# ------------------------------------------------------
+# Caché columnar (Parquet) para la ingesta de los CSV de motor_data
+# -------------------------------------------------------
+# Cada notebook vuelve a parsear con `pd.read_csv` decenas de MB de texto con
+# tipos por defecto (object/float64). `leer_csv_cacheado` lee el CSV una sola vez,
+# aplica tipos compactos (categorías, enteros reducidos, fechas reales) y guarda
+# una copia Parquet junto al CSV (Data/.cache/). La caché se invalida sola cuando
+# cambia el contenido del CSV, porque su nombre incluye el hash del fichero.
+
+COLUMNAS_CATEGORICAS = ['MAKE', 'USAGE', 'TYPE_VEHICLE']
+COLUMNAS_ENTERAS = ['SEX', 'SEATS_NUM', 'EFFECTIVE_YR']
+COLUMNAS_FECHA = ['INSR_BEGIN', 'INSR_END']
+
+
+@instrumentar
+def hash_fichero(ruta: str, bloque: int = 1 << 20) -> str:
+    """
+    Hash SHA-256 del contenido de un fichero, leído por bloques de `bloque` bytes.
+    """
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(bloque), b''):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def _entero_reducido(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna numérica entera al tipo entero (nullable) más pequeño
+    que admite su rango. Si tiene decimales o texto no numérico, la deja igual.
+    """
+    numeros = pd.to_numeric(serie, errors='coerce')
+    if (numeros.isna() & serie.notna()).any():
+        return serie
+    validos = numeros.dropna()
+    if len(validos) and not (validos == np.round(validos)).all():
+        return serie
+    for tipo, info in (('Int8', np.iinfo(np.int8)), ('Int16', np.iinfo(np.int16)),
+                       ('Int32', np.iinfo(np.int32))):
+        if validos.empty or (validos.min() >= info.min and validos.max() <= info.max):
+            return numeros.astype(tipo)
+    return numeros.astype('Int64')
+
+
+def _a_fecha(serie: pd.Series) -> pd.Series:
+    """
+    Convierte a datetime64 tanto las fechas en bruto (formatos de `normalize_date`)
+    como las ya escritas por pandas en formato ISO en los CSV intermedios.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    fechas = parsear_fechas(serie).astype('datetime64[ns]')
+    restantes = fechas.isna() & serie.notna()
+    if restantes.any():
+        fechas[restantes] = pd.to_datetime(serie[restantes], format='ISO8601', errors='coerce')
+    return fechas
+
+
+@instrumentar
+def tipar_motor_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica tipos compactos a las columnas conocidas de motor_data (las que existan):
+      - MAKE, USAGE, TYPE_VEHICLE       -> category
+      - SEX, SEATS_NUM, EFFECTIVE_YR    -> entero nullable más pequeño posible
+      - INSR_BEGIN, INSR_END            -> datetime64
+
+    Parámetros
+    ----------
+    df : pd.DataFrame
+        DataFrame de entrada (modificado in-place).
+
+    Devuelve
+    -------
+    pd.DataFrame
+        El mismo DataFrame con los tipos aplicados.
+    """
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in COLUMNAS_ENTERAS:
+        if col in df.columns:
+            df[col] = _entero_reducido(df[col])
+    for col in COLUMNAS_FECHA:
+        if col in df.columns:
+            df[col] = _a_fecha(df[col])
+    return df
+
+
+def _hay_motor_parquet() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def huella_lectura(tipar: bool = True, **kwargs_csv) -> str:
+    """
+    Hash canónico de los argumentos de lectura (`tipar` y los de `pd.read_csv`),
+    o '' para la lectura por defecto (tipada y sin argumentos).
+    """
+    if tipar and not kwargs_csv:
+        return ''
+    canonico = json.dumps({'tipar': bool(tipar), **kwargs_csv}, sort_keys=True, default=repr)
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()[:8]
+
+
+def ruta_cache(ruta_csv: str, dir_cache: str = None, huella: str = None, variante: str = '') -> str:
+    """
+    Ruta del fichero Parquet de caché para `ruta_csv` (por defecto en
+    <carpeta del CSV>/.cache/<nombre>-<hash>.parquet). `variante` (ver
+    `huella_lectura`) distingue las lecturas con otros argumentos de `pd.read_csv`
+    o sin tipar, que se guardan como <nombre>-<hash>-<variante>.parquet.
+    """
+    if dir_cache is None:
+        dir_cache = os.path.join(os.path.dirname(os.path.abspath(ruta_csv)), '.cache')
+    if huella is None:
+        huella = hash_fichero(ruta_csv)
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    sufijo = f"-{variante}" if variante else ''
+    return os.path.join(dir_cache, f"{nombre}-{huella[:16]}{sufijo}.parquet")
+
+
+@instrumentar
+def leer_csv_cacheado(
+    ruta_csv: str,
+    columnas: List[str] = None,
+    dir_cache: str = None,
+    tipar: bool = True,
+    **kwargs_csv
+) -> pd.DataFrame:
+    """
+    Lee un CSV de motor_data a través de una caché Parquet tipada.
+
+    La primera lectura parsea el CSV, aplica `tipar_motor_data` y escribe la caché;
+    las siguientes leen directamente el Parquet (solo las `columnas` pedidas).
+    Si el contenido del CSV cambia, su hash cambia y la caché se regenera
+    (las cachés antiguas del mismo CSV se borran). Los `kwargs_csv` y `tipar`
+    forman parte de la clave: p.ej. una lectura con `nrows=` tiene su propia
+    caché y no trunca las lecturas posteriores sin él.
+
+    Si no hay motor de Parquet instalado (pyarrow), avisa y lee el CSV.
+
+    Parámetros
+    ----------
+    ruta_csv : str
+        Ruta del CSV de origen.
+    columnas : list[str], opcional
+        Columnas a devolver. None = todas.
+    dir_cache : str, opcional
+        Carpeta de la caché (por defecto <carpeta del CSV>/.cache).
+    tipar : bool, opcional
+        Si True (por defecto) aplica `tipar_motor_data` antes de guardar la caché.
+    **kwargs_csv
+        Argumentos adicionales para `pd.read_csv` en la primera lectura.
+
+    Devuelve
+    -------
+    pd.DataFrame
+    """
+    if not _hay_motor_parquet():
+        warnings.warn("pyarrow no está instalado: se lee el CSV sin caché columnar")
+        df = pd.read_csv(ruta_csv, usecols=columnas, **kwargs_csv)
+        return tipar_motor_data(df) if tipar else df
+
+    huella = hash_fichero(ruta_csv)
+    destino = ruta_cache(ruta_csv, dir_cache, huella, huella_lectura(tipar, **kwargs_csv))
+    if os.path.exists(destino):
+        return pd.read_parquet(destino, columns=columnas)
+
+    df = pd.read_csv(ruta_csv, **kwargs_csv)
+    if tipar:
+        df = tipar_motor_data(df)
+
+    carpeta = os.path.dirname(destino)
+    os.makedirs(carpeta, exist_ok=True)
+    # Solo se borran las cachés de contenidos anteriores del CSV, no las otras variantes
+    prefijo = os.path.splitext(os.path.basename(ruta_csv))[0] + '-'
+    for antiguo in os.listdir(carpeta):
+        if (antiguo.startswith(prefijo) and antiguo.endswith('.parquet')
+                and not antiguo.startswith(prefijo + huella[:16])):
+            os.remove(os.path.join(carpeta, antiguo))
+    df.to_parquet(destino, index=False)
+
+    return df[columnas] if columnas is not None else df
+
+
+@instrumentar
+def comparar_carga_csv_vs_cache(
+    ruta_csv: str,
+    columnas: List[str] = None,
+    dir_cache: str = None
+) -> pd.DataFrame:
+    """
+    Mide tiempo de carga y memoria ocupada (memory_usage(deep=True)) de leer
+    `ruta_csv` con `pd.read_csv` frente a `leer_csv_cacheado` (con la caché ya creada).
+
+    Devuelve
+    -------
+    pd.DataFrame
+        Una fila por método con 'segundos', 'memoria_MB' y 'filas'.
+    """
+    leer_csv_cacheado(ruta_csv, dir_cache=dir_cache)  # asegura que la caché existe
+
+    resultados = []
+    for metodo, lector in (
+        ('csv', lambda: pd.read_csv(ruta_csv, usecols=columnas)),
+        ('cache_parquet', lambda: leer_csv_cacheado(ruta_csv, columnas=columnas, dir_cache=dir_cache)),
+    ):
+        inicio = time.perf_counter()
+        df = lector()
+        segundos = time.perf_counter() - inicio
+        resultados.append({
+            'metodo': metodo,
+            'segundos': round(segundos, 3),
+            'memoria_MB': round(df.memory_usage(deep=True).sum() / 2**20, 2),
+            'filas': len(df),
+        })
+    return pd.DataFrame(resultados).set_index('metodo')
+
+
 # ------------------------------------------------------
 # Estadistica personalizada para columnas numericas
 # -------------------------------------------------------
+@instrumentar
 def estadisticas_personalizadas(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calcula para cada columna numérica del DataFrame:
@@ -256,19 +839,32 @@ def estadisticas_personalizadas(df: pd.DataFrame) -> pd.DataFrame:
     # 1) Seleccionamos solo columnas numéricas
     num = df.select_dtypes(include='number')
     
-    # 2) Calculamos todas las métricas
+    # 2) Calculamos todas las métricas (cuartiles en una sola llamada; la mediana
+    #    es el cuartil del 50% y la moda se calcula una única vez)
+    cuartiles = num.quantile([0.25, 0.50, 0.75])
+    modas = num.mode()
     stats = pd.DataFrame({
         'mean'  : num.mean(),
-        'median': num.median(),
-        'moda'  : num.mode().iloc[0] if not num.mode().empty else np.nan,
+        'median': cuartiles.loc[0.50],
+        'moda'  : modas.iloc[0] if not modas.empty else np.nan,
         'std'   : num.std(ddof=1),
         'min'   : num.min(),
-        '25%'   : num.quantile(0.25),
-        '50%'   : num.quantile(0.50),
-        '75%'   : num.quantile(0.75),
+        '25%'   : cuartiles.loc[0.25],
+        '50%'   : cuartiles.loc[0.50],
+        '75%'   : cuartiles.loc[0.75],
         'max'   : num.max()
     })
-    
+    return completar_estadisticas(stats)
+
+
+@instrumentar
+def completar_estadisticas(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ordena y redondea la tabla de `estadisticas_personalizadas`, añade rango e IQR
+    e imprime el top 5 de variables por desviación estándar y por rango.
+    La comparten la versión en memoria y la versión por bloques
+    (`estadisticas_streaming.EstadisticasStreaming.tabla`).
+    """
     # 3) Reordenamos las columnas en el orden deseado,
     #    rellenando con NaN en caso de que alguna métrica falte
     desired_order = ['mean','median','moda','std','min','25%','50%','75%','max']
@@ -303,118 +899,186 @@ def estadisticas_personalizadas(df: pd.DataFrame) -> pd.DataFrame:
 
 
 # ------------------------------------------------------
-# Visualización gráfica de atributos numéricos
+# Densidad KDE aproximada (usada por los histogramas de graficos_eda)
 # ------------------------------------------------------
-# Esta función toma un DataFrame y una lista de nombres de columnas,
-# y genera histogramas para cada columna, superponiendo una línea discontinua
-# que indica la media de los datos. Los histogramas se organizan en una cuadrícula de 2 filas y 3 columnas.
-# Se utiliza la biblioteca matplotlib para crear las visualizaciones.
+
+DENSIDADES_KDE = ('binned', 'muestra', 'exacta')
 
 
-def plot_hist_with_mean_and_kde(df, atributos, bins=30):
+@instrumentar
+def kde_binned(data: np.ndarray, x_vals: np.ndarray, n_rejilla: int = 2048) -> np.ndarray:
     """
-    Grafica histogramas de las columnas de `atributos` de df,
-    superpone una línea discontinua indicando la media,
-    y dibuja la curva de densidad (KDE) en rojo.
-    
+    KDE gaussiana aproximada por binning + convolución FFT, con el ancho de banda
+    de la regla de Scott (el de `gaussian_kde` por defecto). Cuesta
+    O(n + n_rejilla·log n_rejilla) en lugar de O(n·len(x_vals)).
+
     Parámetros
     ----------
-    df : pd.DataFrame
-        DataFrame que contiene los datos a graficar.
-    atributos : list[str]
-        Lista de nombres de columnas a graficar.
-    bins : int, opcional
-        Número de bins para el histograma (por defecto 30).
-    """
-    # Creamos el grid (2 filas x 3 columnas)
-    fig, axes = plt.subplots(nrows=2, ncols=3, figsize=(12, 8))
-    axes = axes.flatten()
-    
-    for ax, col in zip(axes, atributos):
-        data = df[col].dropna()
-        
-        # Histograma normalizado
-        ax.hist(data, bins=bins, density=True, alpha=0.6, edgecolor='black')
-        
-        # Línea vertical de la media
-        mu = data.mean()
-        ax.axvline(mu, linestyle='--', linewidth=2, label=f'Media: {mu:.3f}')
-        
-        # Curva de densidad (KDE)
-        kde = gaussian_kde(data)
-        x_vals = np.linspace(data.min(), data.max(), 200)
-        ax.plot(x_vals, kde(x_vals), color='red', linewidth=2, label='KDE')
-        
-        ax.set_title(col)
-        ax.set_ylabel('Densidad')
-        ax.legend()
-    
-    # Apagamos subplots sobrantes
-    for ax in axes[len(atributos):]:
-        ax.axis('off')
-    
-    plt.tight_layout()
-    plt.show()
-    
+    data : np.ndarray
+        Valores sin nulos.
+    x_vals : np.ndarray
+        Puntos donde se evalúa la densidad.
+    n_rejilla : int, opcional
+        Celdas de la rejilla de binning (por defecto 2048).
+
+    Devuelve
+    -------
+    np.ndarray
+        Densidad en `x_vals` (NaN si la columna es constante o tiene < 2 valores).
+    """
+    n = len(data)
+    sigma = np.std(data, ddof=1) * n ** (-1 / 5) if n > 1 else 0.0
+    if not sigma > 0:
+        return np.full(len(x_vals), np.nan)
+
+    # Rejilla que cubre los datos con margen para las colas del núcleo
+    conteos, bordes = np.histogram(data, bins=n_rejilla, range=(data.min() - 4 * sigma, data.max() + 4 * sigma))
+    dx = bordes[1] - bordes[0]
+    centros = bordes[:-1] + dx / 2
+
+    # Núcleo gaussiano discretizado (normalizado para conservar la masa) y convolución por FFT
+    m = min(int(np.ceil(4 * sigma / dx)), n_rejilla)
+    pesos = np.exp(-0.5 * (np.arange(-m, m + 1) * dx / sigma) ** 2)
+    pesos /= pesos.sum()
+    largo = 1 << int(np.ceil(np.log2(n_rejilla + 2 * m + 1)))
+    convolucion = np.fft.irfft(np.fft.rfft(conteos, largo) * np.fft.rfft(pesos, largo), largo)
+    densidad = np.clip(convolucion[m:m + n_rejilla], 0, None) / (n * dx)
+    return np.interp(x_vals, centros, densidad)
+
+
     
 # ------------------------------------------------------
-# Función para identificar y eliminar outliers
-# -------------------------------------------------------       
+# Motor de outliers multi-columna (IQR, z-score, MAD)
+# -------------------------------------------------------
+# Calcula los límites (vallas) de todas las columnas a la vez, devuelve una matriz
+# booleana filas × columnas en lugar de listas de índices y guarda los límites
+# ajustados, de modo que el mismo recorte se puede aplicar después a los lotes
+# de evaluación (es un preparador válido para `scoring.ScorerKMeans` y se
+# persiste con joblib como el resto de transformadores).
+
+METODOS_OUTLIERS = ('iqr', 'zscore', 'mad')
+
+# Factor por defecto de cada método: 1.5·IQR, 3 desviaciones típicas, 3.5 MAD escaladas
+FACTORES_OUTLIERS = {'iqr': 1.5, 'zscore': 3.0, 'mad': 3.5}
 
-def listar_outliers_y_boxplot(df, atributos):
+
+class MotorOutliers:
     """
-    Para cada columna en `atributos`:
-     - Detecta outliers con el método IQR (1.5*IQR)
-     - Almacena los valores atípicos en un dict
-     - Dibuja un boxplot horizontal
-    Retorna:
-      outliers_dict: {columna: Series de outliers}
-      fig: objeto matplotlib.figure.Figure
+    Detección y recorte de outliers con límites ajustados por columna.
+      - 'iqr'   : [Q1 - f·IQR, Q3 + f·IQR]
+      - 'zscore': media ± f·std (ddof=0, como scipy.stats.zscore)
+      - 'mad'   : mediana ± f·1.4826·MAD
+
+    Parámetros
+    ----------
+    columnas : list[str], opcional
+        Columnas a analizar (por defecto, las numéricas del DataFrame de ajuste).
+    metodo : str, opcional
+        'iqr' (por defecto), 'zscore' o 'mad'.
+    factor : float, opcional
+        Multiplicador de la valla (por defecto el de FACTORES_OUTLIERS).
+    reemplazo : str, opcional
+        Qué hace `transform` con los outliers: 'limites' (recorta al límite, por
+        defecto) o 'mediana' (los sustituye por la mediana de ajuste).
+    lado : str, opcional
+        'ambos' (por defecto), 'superior' o 'inferior'.
     """
-    outliers_dict = {}
-    n = len(atributos)
-    
-    # Creamos la figura y los ejes
-    cols = 4
-    rows = (n + cols - 1) // cols  # Redondeo hacia arriba
-    if rows == 0:
-        rows = 1
-
-    # Creamos un grid de rows x cols
-    fig, axes = plt.subplots(rows, cols,
-                             figsize=(4 * cols, 4 * rows),
-                             squeeze=False)
-    axes = axes.flatten()
-    
-    for ax, col in zip(axes, atributos):
-        data = df[col].dropna()
-        
-        # Cálculo de cuartiles e IQR
-        Q1 = data.quantile(0.25)
-        Q3 = data.quantile(0.75)
-        IQR = Q3 - Q1
-        lower = Q1 - 1.5 * IQR
-        upper = Q3 + 1.5 * IQR
-        
-        # Máscara de outliers
-        mask = (data < lower) | (data > upper)
-        outliers = data[mask]
-        outliers_dict[col] = outliers
-        
-        # Boxplot Vertical
-        ax.boxplot(data, vert=True, showfliers=True)
-        ax.set_title(f'Boxplot de {col}')
-        ax.set_xlabel(col)
-        
-        # anotar número de outliers
-        ax.annotate(f"n outliers={len(outliers)}",
-                    xy=(0.95, 0.85), xycoords='axes fraction',
-                    ha='right', fontsize=9, bbox=dict(boxstyle="round,pad=0.3", 
-                                                      fc="white", ec="gray"))
-    
-    plt.tight_layout()
-    return outliers_dict, fig
+
+    def __init__(
+        self,
+        columnas: List[str] = None,
+        metodo: str = 'iqr',
+        factor: float = None,
+        reemplazo: str = 'limites',
+        lado: str = 'ambos'
+    ):
+        if metodo not in METODOS_OUTLIERS:
+            raise ValueError(f"Método desconocido '{metodo}'. Opciones: {METODOS_OUTLIERS}")
+        if reemplazo not in ('limites', 'mediana'):
+            raise ValueError("reemplazo debe ser 'limites' o 'mediana'")
+        if lado not in ('ambos', 'superior', 'inferior'):
+            raise ValueError("lado debe ser 'ambos', 'superior' o 'inferior'")
+        self.columnas = list(columnas) if columnas is not None else None
+        self.metodo = metodo
+        self.factor = FACTORES_OUTLIERS[metodo] if factor is None else factor
+        self.reemplazo = reemplazo
+        self.lado = lado
+
+    @instrumentar
+    def fit(self, df: pd.DataFrame) -> 'MotorOutliers':
+        """
+        Calcula los límites de todas las columnas. Deja en `limites_` un DataFrame
+        (columna -> 'inferior', 'superior', 'mediana').
+        """
+        if self.columnas is None:
+            self.columnas = df.select_dtypes(include='number').columns.tolist()
+        datos = df[self.columnas]
+
+        if self.metodo == 'iqr':
+            # Cuartiles y mediana de todas las columnas en una sola llamada
+            q = datos.quantile([0.25, 0.50, 0.75])
+            iqr = q.loc[0.75] - q.loc[0.25]
+            inferior, superior, mediana = q.loc[0.25] - self.factor * iqr, q.loc[0.75] + self.factor * iqr, q.loc[0.50]
+        elif self.metodo == 'zscore':
+            media, std = datos.mean(), datos.std(ddof=0)
+            inferior, superior, mediana = media - self.factor * std, media + self.factor * std, datos.median()
+        else:
+            mediana = datos.median()
+            mad = (datos - mediana).abs().median() * 1.4826
+            inferior, superior = mediana - self.factor * mad, mediana + self.factor * mad
+
+        self.limites_ = pd.DataFrame({'inferior': inferior, 'superior': superior, 'mediana': mediana},
+                                     index=self.columnas).astype(float)
+        return self
+
+    @instrumentar
+    def mascara(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Matriz booleana (filas × columnas) con True en los outliers según `lado`.
+        Los nulos nunca son outliers. Se puede pasar directamente como `outliers`
+        a `ImputadorJerarquico`.
+        """
+        X = df[self.columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+        inferior = self.limites_['inferior'].to_numpy()
+        superior = self.limites_['superior'].to_numpy()
+        with np.errstate(invalid='ignore'):
+            if self.lado == 'superior':
+                M = X > superior
+            elif self.lado == 'inferior':
+                M = X < inferior
+            else:
+                M = (X < inferior) | (X > superior)
+        return pd.DataFrame(M, index=df.index, columns=self.columnas)
+
+    def resumen(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Número y porcentaje de outliers por columna junto con sus límites."""
+        n = self.mascara(df).sum()
+        return self.limites_.assign(n_outliers=n, pct_outliers=(100 * n / len(df)).round(3))
+
+    @instrumentar
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aplica el recorte (in-place) con los límites ajustados y devuelve `df`.
+        Sirve para lotes o chunks de evaluación.
+        """
+        mascara = self.mascara(df)
+        for col in self.columnas:
+            fuera = mascara[col].to_numpy()
+            if not fuera.any():
+                continue
+            if self.reemplazo == 'mediana':
+                df[col] = df[col].mask(fuera, self.limites_.at[col, 'mediana'])
+            else:
+                df[col] = df[col].clip(lower=self.limites_.at[col, 'inferior'] if self.lado != 'superior' else None,
+                                       upper=self.limites_.at[col, 'superior'] if self.lado != 'inferior' else None)
+        return df
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+
 # ------------------------------------------------------
+@instrumentar
 def robust_scale_duration(df, column):
     """
     Reemplaza en la columna indicada todos los valores por encima del umbral
@@ -427,80 +1091,14 @@ def robust_scale_duration(df, column):
     Devuelve:
     - df modificado in-place con los outliers capados a la mediana.
     """
-    # Cálculo de estadísticos
-    median = df[column].median()
-    Q1 = df[column].quantile(0.25)
-    Q3 = df[column].quantile(0.75)
-    IQR = Q3 - Q1
-    upper_bound = Q3 + 1.5 * IQR
-
-    # Reemplazar outliers por la mediana
-    df.loc[df[column] > upper_bound, column] = median
-    return df
-
-# ------------------------------------------------------
-# función para graficar histogramas de atributos categóricos
-# -------------------------------------------------------
-# Esta función toma un DataFrame y una lista de nombres de columnas categóricas,
-# y genera histogramas (barcharts) para cada columna, organizados en un grid de hasta 4 columnas.
-# Se utiliza la biblioteca matplotlib para crear las visualizaciones.
-# Se asume que las columnas categóricas son de tipo 'object' o 'category'.
-# Se pueden rotar las etiquetas del eje x para mejorar la legibilidad.
-# Se pueden ocultar los ejes sobrantes si hay menos columnas que filas*columnas.
-
-
-import matplotlib.cm as cm
-
-def plot_categorical_histograms(df, columns, cols=4, figsize=None, rotation=45, palette='viridis', fontsize=8):
-    """
-    Dibuja histogramas (barcharts) de frecuencia para cada atributo categórico en 'columns',
-    organizados en un grid de hasta 'cols' columnas, usando la paleta de colores seleccionada.
-
-    Parámetros:
-    - df: pandas.DataFrame con los datos.
-    - columns: lista de nombres de columnas categóricas a graficar.
-    - cols: número de columnas en el grid.
-    - figsize: tamaño de la figura (ancho, alto).
-    - rotation: ángulo de rotación de las etiquetas del eje x.
-    - palette: nombre de la paleta de colores de matplotlib a usar para las barras.
-    - fontsize: tamaño de letra para etiquetas y ticks.
-    """
-    n = len(columns)
-    rows = (n + cols - 1) // cols if cols > 0 else 1
-
-    if figsize is None:
-        figsize = (4 * cols, 4 * rows)
-
-    # Caso especial: solo una gráfica
-    if n == 1:
-        fig, ax = plt.subplots(figsize=figsize)
-        axes = [ax]
-    else:
-        fig, axes = plt.subplots(rows, cols, figsize=figsize)
-        axes = axes.flatten()
-
-    for ax, col in zip(axes, columns):
-        counts = df[col].value_counts(dropna=False)
-        num_bars = len(counts)
-        cmap = cm.get_cmap(palette, num_bars)
-        colors = [cmap(i) for i in range(num_bars)]
-        counts.plot(kind='bar', ax=ax, color=colors)
-        ax.set_title(f'Histograma de {col}', fontsize=fontsize+2)
-        ax.set_xlabel(col, fontsize=fontsize)
-        ax.set_ylabel('Frecuencia', fontsize=fontsize)
-        ax.tick_params(axis='x', labelsize=fontsize, rotation=rotation)
-        ax.tick_params(axis='y', labelsize=fontsize)
-
-    for ax in axes[n:]:
-        ax.set_visible(False)
-
-    plt.tight_layout()
-    plt.show()
+    # Límite superior IQR y mediana en una sola pasada; reemplazar outliers por la mediana
+    return MotorOutliers([column], metodo='iqr', reemplazo='mediana', lado='superior').fit_transform(df)
 
 # ------------------------------------------------------
 # EDA de variables tipo datetime. funciones para resumen y visualización
 # -------------------------------------------------------
 
+@instrumentar
 def date_column_summary(df, date_cols):
     """
     Calcula estadísticas descriptivas para variables de tipo fecha.
@@ -530,44 +1128,26 @@ def date_column_summary(df, date_cols):
     return pd.DataFrame(summary)
 
 
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-import pandas as pd
+# ------------------------------------------------------
+# Acceso diferido a la capa de gráficos
+# ------------------------------------------------------
+
+GRAFICOS = ('plot_hist_with_mean_and_kde', 'listar_outliers_y_boxplot',
+            'plot_categorical_histograms', 'plot_date_distributions_subplots')
 
-def plot_date_distributions_subplots(df, date_cols, freq='Y', figsize=(6, 4), fontsize=10, palette='viridis'):
+
+def __getattr__(nombre):
     """
-    Grafica la distribución de variables de fecha en subplots.
-    
-    Parámetros:
-    - df: DataFrame
-    - date_cols: lista de nombres de columnas de tipo fecha
-    - freq: frecuencia de agrupación ('Y' año, 'M' mes, 'D' día)
-    - figsize: tamaño total de la figura (ancho, alto) POR SUBPLOT
-    - fontsize: tamaño de letras
-    - palette: paleta de colores matplotlib a usar ('viridis', etc.)
+    Resuelve las funciones de gráficos importando graficos_eda la primera vez
+    que se piden (PEP 562); después quedan en el espacio de nombres del módulo.
     """
-    n = len(date_cols)
-    fig, axes = plt.subplots(n, 1, figsize=(figsize[0], figsize[1]*n))
-    
-    # Permite compatibilidad cuando solo hay una columna
-    if n == 1:
-        axes = [axes]
-
-    for ax, col in zip(axes, date_cols):
-        fechas = pd.to_datetime(df[col], errors='coerce').dropna()
-        if len(fechas) == 0:
-            ax.set_title(f'{col}: Sin fechas válidas', fontsize=fontsize+2)
-            continue
-        serie = fechas.dt.to_period(freq).value_counts().sort_index()
-        num_bars = len(serie)
-        cmap = cm.get_cmap(palette, num_bars)
-        colors = [cmap(i) for i in range(num_bars)]
-        serie.plot(kind='bar', ax=ax, color=colors)
-        ax.set_title(f'Distribución temporal de {col}', fontsize=fontsize+2)
-        ax.set_xlabel('Fecha', fontsize=fontsize)
-        ax.set_ylabel('Frecuencia', fontsize=fontsize)
-        ax.tick_params(axis='x', labelsize=fontsize, rotation=45)
-        ax.tick_params(axis='y', labelsize=fontsize)
-    plt.tight_layout()
-    plt.show()
+    if nombre in GRAFICOS:
+        import graficos_eda
+        funcion = getattr(graficos_eda, nombre)
+        globals()[nombre] = funcion
+        return funcion
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
 
+def __dir__():
+    return sorted(set(globals()) | set(GRAFICOS))
@@ -0,0 +1,337 @@
+# ——————————————————————————————
+# Clustering por densidad (DBSCAN) escalable a todas las pólizas
+# ——————————————————————————————
+# 04-Clustering_DBSCAN.ipynb solo agrupa `df_cluster.sample(n=20000)` porque DBSCAN
+# sobre la matriz escalada + one-hot completa se cuelga, y la mayoría de pólizas
+# se quedan sin etiqueta. Aquí:
+#
+#   1. Reducción: PCA (ajustado sobre una muestra) y proyección por bloques a pocas
+#      dimensiones, donde un KD-tree es eficaz.
+#   2. Duplicados: muchas pólizas caen en el mismo punto reducido; se agrupan en
+#      puntos únicos con peso (sample_weight de DBSCAN), lo que equivale a DBSCAN
+#      sobre las filas originales.
+#   3. Vecindad por bloques: el grafo de radio `eps` se construye por bloques de
+#      filas en una matriz dispersa, con un límite de memoria (`memoria_mb`), y se
+#      pasa a DBSCAN(metric='precomputed').
+#   4. Etiquetado: cada póliza recibe la etiqueta de su punto núcleo más cercano si
+#      está a menos de `eps`, o -1 (ruido) en otro caso.
+#
+# Para ajustar eps/min_samples, `GrafoKDistancias` calcula una única vez el grafo
+# de k vecinos y evalúa después cualquier combinación sin repetir la búsqueda.
+#
+# Ejemplos:
+#   python densidad.py --datos ../Data/motor_data_2011_2018_RISK.csv --barrido --eps 0.3 0.5 0.8 --min-samples 5 10 20
+#   python densidad.py --datos ../Data/motor_data_2011_2018_RISK.csv --eps 0.8 --min-samples 10 --salida etiquetas.csv
+
+import argparse
+import time
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+MB = 1 << 20
+
+
+def _bloques(n: int, chunksize: int):
+    for inicio in range(0, n, chunksize):
+        yield inicio, min(inicio + chunksize, n)
+
+
+class GrafoKDistancias:
+    """
+    Grafo de los k vecinos más cercanos de los puntos únicos (con peso) de la
+    muestra reducida. Con él se decide, para cualquier (eps, min_samples), qué
+    puntos son núcleo y cuántos clústeres y cuánto ruido resultan.
+
+    El barrido es aproximado: solo ve las aristas entre k vecinos, así que puede
+    separar clústeres que DBSCAN exacto uniría (nunca une de más), y un punto cuya
+    vecindad de `min_samples` no cabe en sus k vecinos se cuenta como no núcleo
+    (columna 'indeterminados' de `evaluar`). Sirve para acotar la rejilla; el
+    ajuste final se hace con `DBSCANEscalable.fit`.
+
+    Parámetros
+    ----------
+    distancias, indices : np.ndarray
+        Matrices (m × k) de `NearestNeighbors.kneighbors` (el propio punto incluido).
+    pesos : np.ndarray
+        Número de pólizas que representa cada punto único.
+    """
+
+    def __init__(self, distancias: np.ndarray, indices: np.ndarray, pesos: np.ndarray):
+        self.distancias = distancias
+        self.indices = indices
+        self.pesos = pesos
+        # Pólizas acumuladas dentro de los j primeros vecinos
+        self.pesos_acumulados = np.cumsum(pesos[indices], axis=1)
+
+    @classmethod
+    def calcular(
+        cls,
+        puntos: np.ndarray,
+        pesos: np.ndarray,
+        k: int = 50,
+        chunksize: int = 50_000,
+        n_jobs: int = None
+    ) -> 'GrafoKDistancias':
+        """Busca los k vecinos de todos los puntos con un KD-tree, por bloques."""
+        from sklearn.neighbors import NearestNeighbors
+
+        k = min(k, len(puntos))
+        nn = NearestNeighbors(n_neighbors=k, algorithm='kd_tree', n_jobs=n_jobs).fit(puntos)
+        distancias = np.empty((len(puntos), k), dtype=np.float32)
+        indices = np.empty((len(puntos), k), dtype=np.int64)
+        for inicio, fin in _bloques(len(puntos), chunksize):
+            distancias[inicio:fin], indices[inicio:fin] = nn.kneighbors(puntos[inicio:fin])
+        return cls(distancias, indices, pesos)
+
+    def distancia_k(self, min_samples: int) -> np.ndarray:
+        """
+        Radio mínimo para que cada punto sea núcleo con `min_samples` pólizas
+        (np.inf si no se alcanza dentro de los k vecinos).
+        """
+        alcanzado = self.pesos_acumulados >= min_samples
+        posicion = alcanzado.argmax(axis=1)
+        radio = self.distancias[np.arange(len(posicion)), posicion].astype(np.float64)
+        radio[~alcanzado[:, -1]] = np.inf
+        return radio
+
+    def curva_k(self, min_samples: int) -> np.ndarray:
+        """k-distancias ordenadas por póliza (el 'codo' sugiere eps)."""
+        return np.sort(np.repeat(self.distancia_k(min_samples), self.pesos))
+
+    def evaluar(self, eps: float, min_samples: int) -> Dict:
+        """Núcleos, clústeres y ruido (en pólizas) para un par (eps, min_samples)."""
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        radio = self.distancia_k(min_samples)
+        nucleo = radio <= eps
+        m, k = self.indices.shape
+        filas = np.repeat(np.arange(m), k)
+        columnas = self.indices.ravel()
+        dentro = self.distancias.ravel() <= eps
+
+        # Clústeres: componentes conexas entre núcleos a distancia <= eps
+        arista = dentro & nucleo[filas] & nucleo[columnas]
+        grafo = csr_matrix((np.ones(arista.sum(), dtype=np.int8), (filas[arista], columnas[arista])), shape=(m, m))
+        _, componentes = connected_components(grafo, directed=False)
+        n_clusters = len(np.unique(componentes[nucleo]))
+
+        # Frontera: no núcleo con algún núcleo a distancia <= eps
+        frontera = np.zeros(m, dtype=bool)
+        frontera[filas[dentro & ~nucleo[filas] & nucleo[columnas]]] = True
+
+        total = self.pesos.sum()
+        sin_decidir = (self.pesos_acumulados[:, -1] < min_samples) & (self.distancias[:, -1] <= eps)
+        return {
+            'eps': eps,
+            'min_samples': min_samples,
+            'n_clusters': n_clusters,
+            'frac_nucleo': self.pesos[nucleo].sum() / total,
+            'frac_ruido': self.pesos[~nucleo & ~frontera].sum() / total,
+            'indeterminados': int(self.pesos[sin_decidir].sum()),
+        }
+
+    def barrido(self, eps_valores: Iterable[float], min_samples_valores: Iterable[int]) -> pd.DataFrame:
+        """Evalúa la rejilla eps × min_samples reutilizando el mismo grafo."""
+        return pd.DataFrame([
+            self.evaluar(eps, ms) for ms in min_samples_valores for eps in eps_valores
+        ])
+
+
+class DBSCANEscalable:
+    """
+    DBSCAN sobre la proyección PCA de la matriz preprocesada, ajustado sobre una
+    muestra (por defecto grande; todas las filas si caben) y extendido a todas las
+    pólizas por el punto núcleo más cercano.
+
+    Parámetros
+    ----------
+    eps : float, opcional
+        Radio de vecindad en el espacio reducido.
+    min_samples : int, opcional
+        Pólizas (con peso, contando la propia) para ser punto núcleo. Se refiere a
+        la muestra de ajuste, como en el notebook.
+    n_componentes : int, opcional
+        Dimensiones de la proyección PCA (por defecto 5, como el notebook).
+    muestra : int, opcional
+        Filas para ajustar DBSCAN (None = todas).
+    memoria_mb : float, opcional
+        Límite de memoria del grafo de vecindad; si se supera se lanza MemoryError
+        (reducir eps o la muestra).
+    chunksize : int, opcional
+        Filas por bloque en la proyección, la búsqueda de vecinos y el etiquetado.
+    semilla : int, opcional
+        Semilla de las muestras.
+    n_jobs : int, opcional
+        Hilos de las búsquedas de vecinos.
+    """
+
+    def __init__(self, eps: float = 0.8, min_samples: int = 10, n_componentes: int = 5,
+                 muestra: int = 200_000, memoria_mb: float = 1024, chunksize: int = 100_000,
+                 semilla: int = 42, n_jobs: int = None):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.n_componentes = n_componentes
+        self.muestra = muestra
+        self.memoria_mb = memoria_mb
+        self.chunksize = chunksize
+        self.semilla = semilla
+        self.n_jobs = n_jobs
+
+    # -- reducción -----------------------------------------------------------
+
+    @staticmethod
+    def _denso(X) -> np.ndarray:
+        """Bloque de X como array float64 (densificando si X es una matriz dispersa)."""
+        from scipy.sparse import issparse
+
+        return X.toarray().astype(np.float64, copy=False) if issparse(X) else np.asarray(X, dtype=np.float64)
+
+    @staticmethod
+    def _filas(X):
+        """X con indexado por filas: las matrices dispersas se pasan a CSR (COO no lo admite)."""
+        from scipy.sparse import issparse
+
+        return X.tocsr() if issparse(X) else X
+
+    def _ajustar_pca(self, X) -> None:
+        from sklearn.decomposition import PCA
+
+        rng = np.random.default_rng(self.semilla)
+        n = X.shape[0]
+        filas = np.sort(rng.choice(n, min(n, 200_000), replace=False))
+        self.pca_ = PCA(n_components=self.n_componentes, random_state=self.semilla).fit(self._denso(X[filas]))
+
+    def reducir(self, X) -> np.ndarray:
+        """Proyección PCA de X por bloques (float32); X puede ser una matriz dispersa."""
+        X = self._filas(X)
+        Z = np.empty((X.shape[0], self.n_componentes), dtype=np.float32)
+        for inicio, fin in _bloques(X.shape[0], self.chunksize):
+            Z[inicio:fin] = self.pca_.transform(self._denso(X[inicio:fin]))
+        return Z
+
+    def _muestra_unica(self, Z: np.ndarray):
+        """Puntos únicos de la muestra de ajuste y cuántas pólizas representa cada uno."""
+        if self.muestra is not None and self.muestra < len(Z):
+            rng = np.random.default_rng(self.semilla)
+            Z = Z[np.sort(rng.choice(len(Z), self.muestra, replace=False))]
+        puntos, pesos = np.unique(Z, axis=0, return_counts=True)
+        return puntos, pesos
+
+    def grafo_k_distancias(self, X, k: int = 50) -> GrafoKDistancias:
+        """
+        Ajusta la reducción sobre X y calcula el grafo de k vecinos de la muestra
+        de ajuste, para barrer eps/min_samples con `GrafoKDistancias.barrido`.
+        """
+        X = self._filas(X)
+        self._ajustar_pca(X)
+        puntos, pesos = self._muestra_unica(self.reducir(X))
+        return GrafoKDistancias.calcular(puntos, pesos, k, n_jobs=self.n_jobs)
+
+    # -- ajuste y etiquetado -------------------------------------------------
+
+    def _grafo_radio(self, puntos: np.ndarray):
+        """Grafo disperso de distancias <= eps, construido por bloques con límite de memoria."""
+        from scipy.sparse import vstack
+        from sklearn.neighbors import NearestNeighbors
+
+        nn = NearestNeighbors(radius=self.eps, algorithm='kd_tree', n_jobs=self.n_jobs).fit(puntos)
+        partes, bytes_usados = [], 0
+        for inicio, fin in _bloques(len(puntos), self.chunksize):
+            parte = nn.radius_neighbors_graph(puntos[inicio:fin], mode='distance')
+            bytes_usados += parte.data.nbytes + parte.indices.nbytes + parte.indptr.nbytes
+            if bytes_usados > self.memoria_mb * MB:
+                raise MemoryError(
+                    f"El grafo de vecindad supera {self.memoria_mb} MB tras {fin} de {len(puntos)} puntos; "
+                    "reduce eps o la muestra, o aumenta memoria_mb"
+                )
+            partes.append(parte)
+        return vstack(partes, format='csr')
+
+    def fit(self, X) -> 'DBSCANEscalable':
+        """
+        Ajusta PCA y DBSCAN y etiqueta todas las filas de X (`labels_`).
+
+        Parámetros
+        ----------
+        X : array (n × p), np.memmap o matriz dispersa
+            Matriz preprocesada (p.ej. la de `seleccion_k.preparar_matriz`).
+        """
+        from sklearn.cluster import DBSCAN
+        from sklearn.neighbors import NearestNeighbors
+
+        inicio = time.perf_counter()
+        X = self._filas(X)
+        self._ajustar_pca(X)
+        Z = self.reducir(X)
+        puntos, pesos = self._muestra_unica(Z)
+
+        grafo = self._grafo_radio(puntos)
+        dbscan = DBSCAN(eps=self.eps, min_samples=self.min_samples, metric='precomputed')
+        dbscan.fit(grafo, sample_weight=pesos)
+
+        self.nucleos_ = puntos[dbscan.core_sample_indices_]
+        self.etiquetas_nucleos_ = dbscan.labels_[dbscan.core_sample_indices_]
+        self.n_clusters_ = len(np.unique(self.etiquetas_nucleos_))
+        self._nn_nucleos = None
+        if len(self.nucleos_):
+            self._nn_nucleos = NearestNeighbors(n_neighbors=1, algorithm='kd_tree').fit(self.nucleos_)
+
+        self.labels_ = self._etiquetar(Z)
+        self.segundos_ajuste_ = time.perf_counter() - inicio
+        return self
+
+    def _etiquetar(self, Z: np.ndarray) -> np.ndarray:
+        etiquetas = np.full(len(Z), -1, dtype=np.int64)
+        if self._nn_nucleos is None:
+            return etiquetas
+        for inicio, fin in _bloques(len(Z), self.chunksize):
+            distancia, indice = self._nn_nucleos.kneighbors(Z[inicio:fin])
+            cerca = distancia[:, 0] <= self.eps
+            etiquetas[inicio:fin][cerca] = self.etiquetas_nucleos_[indice[cerca, 0]]
+        return etiquetas
+
+    def predict(self, X) -> np.ndarray:
+        """Etiqueta de cada fila: la del núcleo más cercano a <= eps, o -1 (ruido)."""
+        return self._etiquetar(self.reducir(X))
+
+    def fit_predict(self, X) -> np.ndarray:
+        return self.fit(X).labels_
+
+
+def main(argv=None):
+    from seleccion_k import preparar_matriz
+
+    parser = argparse.ArgumentParser(description='DBSCAN escalable sobre todas las pólizas Normal.')
+    parser.add_argument('--datos', required=True, help='CSV con RISK_CATEGORY (motor_data_2011_2018_RISK.csv)')
+    parser.add_argument('--eps', type=float, nargs='+', default=[0.8])
+    parser.add_argument('--min-samples', type=int, nargs='+', default=[10])
+    parser.add_argument('--componentes', type=int, default=5)
+    parser.add_argument('--muestra', type=int, default=200_000, help='Filas para ajustar DBSCAN (0 = todas)')
+    parser.add_argument('--memoria-mb', type=float, default=1024)
+    parser.add_argument('--barrido', action='store_true',
+                        help='Solo evaluar la rejilla eps × min-samples con un único grafo de k vecinos')
+    parser.add_argument('--k', type=int, default=50, help='Vecinos del grafo del barrido')
+    parser.add_argument('--salida', default=None, help='CSV con Cluster_DBSCAN por póliza')
+    args = parser.parse_args(argv)
+
+    X = np.load(preparar_matriz(args.datos, solo_normal=True), mmap_mode='r')
+    modelo = DBSCANEscalable(args.eps[0], args.min_samples[0], args.componentes,
+                             args.muestra or None, args.memoria_mb)
+
+    if args.barrido:
+        grafo = modelo.grafo_k_distancias(X, args.k)
+        print(grafo.barrido(args.eps, args.min_samples).to_string(index=False))
+        return
+
+    etiquetas = modelo.fit_predict(X)
+    print(f"{modelo.n_clusters_} clústeres | ruido: {(etiquetas == -1).mean():.1%} | "
+          f"{len(etiquetas)} pólizas etiquetadas en {modelo.segundos_ajuste_:.1f} s")
+    if args.salida:
+        pd.DataFrame({'Cluster_DBSCAN': etiquetas}).to_csv(args.salida, index=False)
+
+
+if __name__ == '__main__':
+    main()
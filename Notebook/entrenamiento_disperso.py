@@ -0,0 +1,281 @@
+# ——————————————————————————————
+# Entrenamiento del clustering con matriz dispersa float32 y memoria acotada
+# ——————————————————————————————
+# El OneHotEncoder del pipeline ya produce una matriz dispersa (9 valores no nulos
+# de 36 columnas por fila), pero 03-Clustering_K-Means.ipynb la densifica para PCA
+# y DBSCAN, y `df_cluster` va acumulando copias del DataFrame completo con PCA1,
+# PCA2 y Cluster_KMeans. Aquí el camino de entrenamiento es disperso/float32 de
+# principio a fin:
+#
+#   1. Solo se leen las 9 variables del modelo; el pipeline se ajusta sobre ellas
+#      y la transformación se hace por bloques a CSR float32.
+#   2. La matriz CSR (data/indices/indptr) se guarda en <carpeta del CSV>/.cache/
+#      como .npy y se abre con mmap (copy-on-write), de modo que no ocupa RAM
+#      hasta que se usa y se reutiliza mientras el CSV no cambie.
+#   3. KMeans se ajusta directamente sobre la CSR (mismos centros que en denso) y
+#      la proyección 2D usa PCA con solver 'covariance_eigh' (centrado implícito,
+#      sin densificar) o TruncatedSVD.
+#   4. El resultado por fila es un array compacto (Cluster_KMeans int8, PCA1 y PCA2
+#      float32) en lugar de columnas nuevas en una copia del DataFrame.
+#
+# Por cada etapa se informa del tiempo, la RSS al terminar y el pico de RSS del
+# proceso hasta ese momento.
+#
+# Los modelos se guardan con los mismos nombres que en Modelos/ para poder
+# convertirlos con `artefactos.convertir_pickles(dir_salida)` (la TruncatedSVD
+# se guarda como svd_model.pkl y no se convierte).
+#
+# Ejemplos:
+#   python entrenamiento_disperso.py --datos ../Data/motor_data_2011_2018_RISK.csv
+#   python entrenamiento_disperso.py --datos ../Data/motor_data_2011_2018_RISK.csv --proyeccion svd --sin-mmap
+
+import argparse
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from instrumentacion import memoria_actual_mb, pico_memoria_mb
+from seleccion_k import cat_features, construir_pipeline, num_features
+
+# Ruta base relativa al propio módulo
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+salida_path = os.path.normpath(os.path.join(BASE_DIR, '..', 'Modelos', 'entrenamiento_disperso'))
+
+PROYECCIONES = ('pca', 'svd')
+
+
+# ------------------------------------------------------
+# Medición de memoria por etapa
+# ------------------------------------------------------
+
+class MedidorEtapas:
+    """
+    Registra tiempo, RSS y pico de RSS de cada etapa.
+
+    Ejemplo
+    -------
+    >>> medidor = MedidorEtapas()
+    >>> with medidor.etapa('carga'):
+    ...     df = pd.read_csv(ruta)
+    >>> medidor.tabla()
+    """
+
+    def __init__(self):
+        self.filas = []
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            rss = memoria_actual_mb()
+            self.filas.append({
+                'etapa': nombre,
+                'segundos': time.perf_counter() - inicio,
+                'rss_mb': rss,
+                # ru_maxrss puede ir ligeramente por detrás de la RSS actual
+                'pico_rss_mb': float(np.fmax(pico_memoria_mb(), rss)),
+            })
+
+    def tabla(self) -> pd.DataFrame:
+        return pd.DataFrame(self.filas, columns=['etapa', 'segundos', 'rss_mb', 'pico_rss_mb'])
+
+
+# ------------------------------------------------------
+# Matriz de diseño dispersa en disco
+# ------------------------------------------------------
+
+def preparar_matriz_dispersa(
+    ruta_csv: str,
+    solo_normal: bool = True,
+    dir_cache: str = None,
+    chunksize: int = 200_000
+) -> str:
+    """
+    Ajusta el pipeline sobre `ruta_csv` y guarda la matriz preprocesada como CSR
+    float32 (data.npy, indices.npy, indptr.npy) junto al pipeline ajustado. Si ya
+    existe para el mismo contenido del CSV, no se recalcula.
+
+    Parámetros
+    ----------
+    ruta_csv : str
+        CSV de entrenamiento (p.ej. motor_data_2011_2018_RISK.csv).
+    solo_normal : bool, opcional
+        Si True (por defecto, como el K-Means guardado), solo las filas con
+        RISK_CATEGORY == 'Normal'.
+    dir_cache : str, opcional
+        Carpeta base (por defecto <carpeta del CSV>/.cache).
+    chunksize : int, opcional
+        Filas por bloque al transformar.
+
+    Devuelve
+    -------
+    str
+        Carpeta con la matriz y el pipeline.
+    """
+    import joblib
+    import scipy.sparse as sp
+
+    from data_utils import hash_fichero
+
+    if dir_cache is None:
+        dir_cache = os.path.join(os.path.dirname(os.path.abspath(ruta_csv)), '.cache')
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0] + ('-normal' if solo_normal else '')
+    ruta_matriz = os.path.join(dir_cache, f"csr_{nombre}-{hash_fichero(ruta_csv)[:16]}")
+    if os.path.isdir(ruta_matriz):
+        return ruta_matriz
+
+    columnas = num_features + cat_features + (['RISK_CATEGORY'] if solo_normal else [])
+    df = pd.read_csv(ruta_csv, usecols=columnas)
+    if solo_normal:
+        df = df[df['RISK_CATEGORY'] == 'Normal'].drop(columns='RISK_CATEGORY')
+    # sparse_threshold=1: la salida del ColumnTransformer es siempre dispersa,
+    # aunque la densidad supere el 30% por defecto
+    pipeline = construir_pipeline().set_params(preprocessor__sparse_threshold=1.0).fit(df)
+
+    bloques = []
+    for inicio in range(0, len(df), chunksize):
+        bloques.append(pipeline.transform(df.iloc[inicio:inicio + chunksize]).tocsr().astype(np.float32))
+    del df
+    X = sp.vstack(bloques, format='csr', dtype=np.float32)
+    del bloques
+
+    temporal = ruta_matriz + '.tmp'
+    os.makedirs(temporal, exist_ok=True)
+    np.save(os.path.join(temporal, 'data.npy'), X.data)
+    np.save(os.path.join(temporal, 'indices.npy'), X.indices)
+    np.save(os.path.join(temporal, 'indptr.npy'), X.indptr)
+    np.save(os.path.join(temporal, 'forma.npy'), np.asarray(X.shape, dtype=np.int64))
+    joblib.dump(pipeline, os.path.join(temporal, 'preprocessing_pipeline.pkl'))
+    os.replace(temporal, ruta_matriz)
+    return ruta_matriz
+
+
+def cargar_matriz_dispersa(ruta_matriz: str, mmap: bool = True):
+    """
+    Abre la CSR de `preparar_matriz_dispersa`. Con `mmap`, los arrays se abren
+    copy-on-write (los algoritmos de scikit-learn exigen buffers escribibles) y
+    solo se leen del disco las páginas que se usan.
+    """
+    import scipy.sparse as sp
+
+    modo = 'c' if mmap else None
+    partes = [np.load(os.path.join(ruta_matriz, f'{p}.npy'), mmap_mode=modo) for p in ('data', 'indices', 'indptr')]
+    forma = tuple(np.load(os.path.join(ruta_matriz, 'forma.npy')))
+    return sp.csr_matrix(tuple(partes), shape=forma, copy=False)
+
+
+# ------------------------------------------------------
+# Entrenamiento
+# ------------------------------------------------------
+
+def entrenar_disperso(
+    ruta_csv: str,
+    n_clusters: int = 5,
+    solo_normal: bool = True,
+    proyeccion: str = 'pca',
+    mmap: bool = True,
+    dir_salida: str = salida_path,
+    semilla: int = 42
+) -> Dict[str, object]:
+    """
+    Entrena pipeline, K-Means y proyección 2D sin densificar la matriz de diseño.
+
+    Parámetros
+    ----------
+    ruta_csv : str
+        CSV de entrenamiento.
+    n_clusters : int, opcional
+        Número de clústeres (por defecto 5, como el modelo guardado).
+    solo_normal : bool, opcional
+        Entrenar solo con RISK_CATEGORY == 'Normal' (por defecto True).
+    proyeccion : str, opcional
+        'pca' (PCA con solver 'covariance_eigh', equivalente al PCA denso) o
+        'svd' (TruncatedSVD, sin centrar).
+    mmap : bool, opcional
+        Abrir la matriz desde disco con mmap (por defecto True).
+    dir_salida : str, opcional
+        Carpeta donde guardar los modelos y las asignaciones.
+
+    Devuelve
+    -------
+    dict
+        'kmeans', 'pipeline', 'proyeccion', 'asignaciones' (DataFrame compacto) y
+        'etapas' (tabla de tiempo y memoria por etapa).
+    """
+    import joblib
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import PCA, TruncatedSVD
+
+    if proyeccion not in PROYECCIONES:
+        raise ValueError(f"Proyección desconocida '{proyeccion}'. Opciones: {PROYECCIONES}")
+
+    medidor = MedidorEtapas()
+    with medidor.etapa('matriz_dispersa'):
+        ruta_matriz = preparar_matriz_dispersa(ruta_csv, solo_normal)
+        pipeline = joblib.load(os.path.join(ruta_matriz, 'preprocessing_pipeline.pkl'))
+        X = cargar_matriz_dispersa(ruta_matriz, mmap)
+
+    with medidor.etapa('kmeans'):
+        # copy_x=False: con entrada dispersa KMeans no centra los datos, así que no los modifica
+        kmeans = KMeans(n_clusters=n_clusters, random_state=semilla, copy_x=False).fit(X)
+
+    with medidor.etapa('proyeccion'):
+        if proyeccion == 'pca':
+            # La covarianza implícita (X'X - n·media·media') pierde precisión en
+            # float32; la copia float64 de la CSR sigue siendo pequeña
+            modelo_proyeccion = PCA(n_components=2, svd_solver='covariance_eigh', random_state=semilla)
+            componentes = modelo_proyeccion.fit_transform(X.astype(np.float64)).astype(np.float32)
+        else:
+            modelo_proyeccion = TruncatedSVD(n_components=2, random_state=semilla)
+            componentes = modelo_proyeccion.fit_transform(X).astype(np.float32)
+
+    with medidor.etapa('guardado'):
+        asignaciones = pd.DataFrame({
+            'Cluster_KMeans': kmeans.labels_.astype(np.int8),
+            'PCA1': componentes[:, 0],
+            'PCA2': componentes[:, 1],
+        })
+        os.makedirs(dir_salida, exist_ok=True)
+        joblib.dump(pipeline, os.path.join(dir_salida, 'preprocessing_pipeline.pkl'))
+        joblib.dump(kmeans, os.path.join(dir_salida, 'kmeans_model.pkl'))
+        # TruncatedSVD no tiene mean_: se guarda aparte para que convertir_pickles lo ignore
+        joblib.dump(modelo_proyeccion, os.path.join(dir_salida, f'{proyeccion}_model.pkl'))
+        np.savez(os.path.join(dir_salida, 'asignaciones.npz'),
+                 **{c: asignaciones[c].to_numpy() for c in asignaciones.columns})
+
+    return {
+        'kmeans': kmeans,
+        'pipeline': pipeline,
+        'proyeccion': modelo_proyeccion,
+        'asignaciones': asignaciones,
+        'etapas': medidor.tabla(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Entrenamiento del clustering sin densificar la matriz de diseño.')
+    parser.add_argument('--datos', required=True, help='CSV de entrenamiento (_RISK.csv)')
+    parser.add_argument('--k', type=int, default=5, help='Número de clústeres (por defecto 5)')
+    parser.add_argument('--todas', action='store_true',
+                        help="Usar todas las filas, no solo RISK_CATEGORY == 'Normal'")
+    parser.add_argument('--proyeccion', choices=PROYECCIONES, default='pca')
+    parser.add_argument('--sin-mmap', action='store_true', help='Cargar la matriz completa en memoria')
+    parser.add_argument('--salida', default=salida_path,
+                        help='Carpeta de modelos (por defecto Modelos/entrenamiento_disperso)')
+    args = parser.parse_args(argv)
+
+    resultado = entrenar_disperso(args.datos, args.k, not args.todas, args.proyeccion,
+                                  not args.sin_mmap, args.salida)
+    print(resultado['etapas'].round(2).to_string(index=False))
+    print(resultado['asignaciones']['Cluster_KMeans'].value_counts().sort_index().to_string())
+    print(f"Modelos guardados en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+# ——————————————————————————————
+# Estadísticas descriptivas por bloques (out-of-core)
+# ——————————————————————————————
+# `data_utils.estadisticas_personalizadas` necesita todo el histórico 2011-2018 en
+# memoria. Aquí la misma tabla se obtiene leyendo el CSV por bloques y manteniendo
+# resúmenes (sketches) combinables por columna:
+#
+#   - MomentosWelford     n, media, M2 (Welford/Chan), mínimo y máximo -> mean, std,
+#                         min, max. Exactos (salvo redondeo de coma flotante).
+#   - SketchCuantiles     compactadores por niveles (estilo KLL) -> 25%, 50%, 75%.
+#                         Error de rango acotado y calculado (ver `cota_error`).
+#   - ContadorFrecuentes  Misra-Gries con `k` contadores -> moda. Las frecuencias
+#                         se infraestiman como mucho en `decremento`.
+#
+# Mientras una columna no pasa de `limite_exacto` valores (LIMITE_EXACTO filas por
+# defecto, unos 8 bytes por valor y columna para los cuantiles más el
+# value_counts), ambos guardan todos los valores y recuentos y la tabla es
+# exactamente la de la versión en memoria; solo al superarlo se compactan.
+#
+# Todos se combinan (`combinar`) sin perder las garantías, de modo que cada bloque
+# puede resumirse en un proceso distinto y unirse al final.
+#
+# Ejemplo:
+#   python estadisticas_streaming.py ../Data/motor_data11-14lats.csv --procesos 4
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+
+# Tamaños por defecto de los resúmenes
+CAPACIDAD_CUANTILES = 1 << 17   # valores por nivel del sketch de cuantiles
+K_MODA = 4096                   # contadores del Misra-Gries
+LIMITE_EXACTO = 2_000_000       # valores por columna hasta los que todo es exacto
+
+
+class MomentosWelford:
+    """
+    Recuento, media, suma de cuadrados centrada (M2), mínimo y máximo de varias
+    columnas a la vez. Los bloques se incorporan con la fórmula de Chan, que es
+    la generalización de Welford a la unión de dos resúmenes. La suma se lleva
+    aparte para que la media de la tabla sea suma / n, como en pandas (la media de
+    Welford puede diferir en el último bit y cambiar el redondeo a 3 decimales).
+
+    Parámetros
+    ----------
+    n_columnas : int
+        Número de columnas resumidas.
+    """
+
+    def __init__(self, n_columnas: int):
+        self.n = np.zeros(n_columnas)
+        self.media = np.zeros(n_columnas)
+        self.suma = np.zeros(n_columnas)
+        self.m2 = np.zeros(n_columnas)
+        self.minimo = np.full(n_columnas, np.inf)
+        self.maximo = np.full(n_columnas, -np.inf)
+
+    def actualizar(self, X: np.ndarray) -> 'MomentosWelford':
+        """Incorpora un bloque (filas × columnas, NaN = nulo)."""
+        otro = MomentosWelford(X.shape[1])
+        validos = ~np.isnan(X)
+        otro.n = validos.sum(axis=0).astype(float)
+        con_datos = otro.n > 0
+        if con_datos.any():
+            Xc = X[:, con_datos]
+            otro.suma[con_datos] = np.nansum(Xc, axis=0)
+            otro.media[con_datos] = otro.suma[con_datos] / otro.n[con_datos]
+            otro.m2[con_datos] = np.nansum((Xc - otro.media[con_datos]) ** 2, axis=0)
+            otro.minimo[con_datos] = np.nanmin(Xc, axis=0)
+            otro.maximo[con_datos] = np.nanmax(Xc, axis=0)
+        return self.combinar(otro)
+
+    def combinar(self, otro: 'MomentosWelford') -> 'MomentosWelford':
+        n = self.n + otro.n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = otro.media - self.media
+            peso = np.where(n > 0, otro.n / n, 0.0)
+            self.media = self.media + delta * peso
+            self.m2 = self.m2 + otro.m2 + delta ** 2 * self.n * peso
+        self.n = n
+        self.suma = self.suma + otro.suma
+        self.minimo = np.minimum(self.minimo, otro.minimo)
+        self.maximo = np.maximum(self.maximo, otro.maximo)
+        return self
+
+    def promedio(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 0, self.suma / self.n, np.nan)
+
+    def std(self, ddof: int = 1) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > ddof, np.sqrt(self.m2 / (self.n - ddof)), np.nan)
+
+
+class SketchCuantiles:
+    """
+    Sketch de cuantiles de una columna con compactadores por niveles.
+
+    El nivel h guarda valores de peso 2**h. Cuando un nivel supera `capacidad`
+    valores, se ordena y se promueve uno de cada dos al nivel siguiente
+    (alternando el desfase para no sesgar). Cada compactación del nivel h añade
+    como mucho 2**h al error de rango de cualquier consulta, así que el error total
+    es la suma de esos pesos (`cota_error`), que queda por debajo de
+    (log2(n / capacidad) + 1) / capacidad en fracción de n. Sin compactaciones el
+    sketch guarda todos los valores y el cálculo es exacto (como pandas.quantile).
+
+    Parámetros
+    ----------
+    capacidad : int, opcional
+        Valores por nivel antes de compactar.
+    limite_exacto : int, opcional
+        No se compacta mientras el total de valores no supere este número.
+    """
+
+    def __init__(self, capacidad: int = CAPACIDAD_CUANTILES, limite_exacto: int = LIMITE_EXACTO):
+        self.capacidad = capacidad
+        self.limite_exacto = limite_exacto
+        self.niveles: List[np.ndarray] = [np.empty(0)]
+        self.error_abs = 0.0
+        self._desfase = 0
+
+    @property
+    def n(self) -> float:
+        return float(sum(len(nivel) * 2.0 ** h for h, nivel in enumerate(self.niveles)))
+
+    @property
+    def exacto(self) -> bool:
+        return self.error_abs == 0
+
+    def cota_error(self) -> float:
+        """Error máximo de rango de un cuantil, como fracción del total de valores."""
+        n = self.n
+        return self.error_abs / n if n else 0.0
+
+    def actualizar(self, valores: np.ndarray) -> 'SketchCuantiles':
+        valores = valores[~np.isnan(valores)]
+        self.niveles[0] = np.concatenate([self.niveles[0], valores])
+        self._compactar()
+        return self
+
+    def combinar(self, otro: 'SketchCuantiles') -> 'SketchCuantiles':
+        for h, nivel in enumerate(otro.niveles):
+            if h == len(self.niveles):
+                self.niveles.append(np.empty(0))
+            self.niveles[h] = np.concatenate([self.niveles[h], nivel])
+        self.error_abs += otro.error_abs
+        self._compactar()
+        return self
+
+    def _compactar(self) -> None:
+        if self.exacto and self.n <= self.limite_exacto:
+            return
+        h = 0
+        while h < len(self.niveles):
+            nivel = self.niveles[h]
+            if len(nivel) > self.capacidad:
+                nivel = np.sort(nivel)
+                # Con un número impar de valores, el último se queda en este nivel
+                resto = nivel[len(nivel) - len(nivel) % 2:]
+                pares = nivel[:len(nivel) - len(nivel) % 2]
+                promovidos = pares[self._desfase::2]
+                self._desfase ^= 1
+                if h + 1 == len(self.niveles):
+                    self.niveles.append(np.empty(0))
+                self.niveles[h + 1] = np.concatenate([self.niveles[h + 1], promovidos])
+                self.niveles[h] = resto
+                self.error_abs += 2.0 ** h
+            h += 1
+
+    def cuantiles(self, qs) -> np.ndarray:
+        qs = np.asarray(qs, dtype=float)
+        if self.exacto:
+            if len(self.niveles[0]) == 0:
+                return np.full(qs.shape, np.nan)
+            return np.quantile(self.niveles[0], qs)
+        valores = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(len(nivel), 2.0 ** h) for h, nivel in enumerate(self.niveles)])
+        orden = np.argsort(valores, kind='stable')
+        valores, acumulado = valores[orden], np.cumsum(pesos[orden])
+        # Posición (0-based) del cuantil en el rango total de valores
+        posiciones = qs * (acumulado[-1] - 1)
+        return valores[np.searchsorted(acumulado, posiciones, side='right')]
+
+
+class ContadorFrecuentes:
+    """
+    Resumen Misra-Gries de los valores más frecuentes de una columna.
+
+    Mantiene como mucho `k` contadores. Al superarse, a todos se les resta el
+    (k+1)-ésimo mayor recuento y se descartan los que quedan a cero o menos; la
+    suma de lo restado (`decremento`) acota la infraestimación de cualquier
+    frecuencia y es a lo sumo n / (k + 1). Con `decremento == 0` los recuentos son
+    exactos.
+
+    Parámetros
+    ----------
+    k : int, opcional
+        Número máximo de contadores.
+    limite_exacto : int, opcional
+        Se guardan todos los recuentos mientras el total de valores no supere
+        este número.
+    """
+
+    def __init__(self, k: int = K_MODA, limite_exacto: int = LIMITE_EXACTO):
+        self.k = k
+        self.limite_exacto = limite_exacto
+        self.contadores = pd.Series(dtype=float)
+        self.decremento = 0.0
+        self.n = 0.0
+
+    @property
+    def exacto(self) -> bool:
+        return self.decremento == 0
+
+    def actualizar(self, valores: np.ndarray) -> 'ContadorFrecuentes':
+        recuentos = pd.Series(valores).value_counts(dropna=True).astype(float)
+        return self._unir(recuentos, 0.0, float(recuentos.sum()))
+
+    def combinar(self, otro: 'ContadorFrecuentes') -> 'ContadorFrecuentes':
+        return self._unir(otro.contadores, otro.decremento, otro.n)
+
+    def _unir(self, recuentos: pd.Series, decremento: float, n: float) -> 'ContadorFrecuentes':
+        contadores = self.contadores.add(recuentos, fill_value=0) if len(self.contadores) else recuentos
+        self.decremento += decremento
+        self.n += n
+        if len(contadores) > self.k and not (self.exacto and self.n <= self.limite_exacto):
+            umbral = np.partition(contadores.to_numpy(), len(contadores) - self.k - 1)[len(contadores) - self.k - 1]
+            contadores = contadores - umbral
+            contadores = contadores[contadores > 0]
+            self.decremento += umbral
+        self.contadores = contadores
+        return self
+
+    def moda(self) -> float:
+        """Valor con mayor recuento (el menor en caso de empate, como `pandas.mode`)."""
+        if self.contadores.empty:
+            return np.nan
+        maximo = self.contadores.max()
+        return self.contadores.index[self.contadores.to_numpy() == maximo].min()
+
+
+class EstadisticasStreaming:
+    """
+    Versión por bloques de `data_utils.estadisticas_personalizadas`.
+
+    Parámetros
+    ----------
+    columnas : list[str], opcional
+        Columnas a resumir. Si no se indica, las numéricas del primer bloque.
+    capacidad : int, opcional
+        Capacidad por nivel del sketch de cuantiles.
+    k_moda : int, opcional
+        Contadores del resumen de frecuencias usado para la moda.
+    limite_exacto : int, opcional
+        Valores por columna hasta los que cuantiles y moda son exactos.
+    """
+
+    def __init__(
+        self,
+        columnas: List[str] = None,
+        capacidad: int = CAPACIDAD_CUANTILES,
+        k_moda: int = K_MODA,
+        limite_exacto: int = LIMITE_EXACTO
+    ):
+        self.columnas = list(columnas) if columnas is not None else None
+        self.capacidad = capacidad
+        self.k_moda = k_moda
+        self.limite_exacto = limite_exacto
+        if self.columnas is not None:
+            self._iniciar()
+
+    def _iniciar(self) -> None:
+        self.momentos = MomentosWelford(len(self.columnas))
+        self.cuantiles = {c: SketchCuantiles(self.capacidad, self.limite_exacto) for c in self.columnas}
+        self.frecuencias = {c: ContadorFrecuentes(self.k_moda, self.limite_exacto) for c in self.columnas}
+
+    def actualizar(self, bloque: pd.DataFrame) -> 'EstadisticasStreaming':
+        """Incorpora un bloque de filas (p.ej. un chunk de `pd.read_csv`)."""
+        if self.columnas is None:
+            self.columnas = bloque.select_dtypes(include='number').columns.tolist()
+            self._iniciar()
+        X = bloque[self.columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.momentos.actualizar(X)
+        for j, col in enumerate(self.columnas):
+            self.cuantiles[col].actualizar(X[:, j])
+            self.frecuencias[col].actualizar(X[:, j])
+        return self
+
+    def combinar(self, otro: 'EstadisticasStreaming') -> 'EstadisticasStreaming':
+        """Une el resumen de otro conjunto de bloques (de otro proceso, por ejemplo)."""
+        if otro.columnas is None:
+            return self
+        if self.columnas is None:
+            self.columnas = list(otro.columnas)
+            self._iniciar()
+        if otro.columnas != self.columnas:
+            raise ValueError(f"Columnas distintas al combinar: {self.columnas} vs {otro.columnas}")
+        self.momentos.combinar(otro.momentos)
+        for col in self.columnas:
+            self.cuantiles[col].combinar(otro.cuantiles[col])
+            self.frecuencias[col].combinar(otro.frecuencias[col])
+        return self
+
+    def tabla(self) -> pd.DataFrame:
+        """
+        Misma tabla que `estadisticas_personalizadas` (mean, median, moda, std,
+        min, cuartiles, max, range, IQR) e imprime el top 5 por std y por rango.
+        """
+        from data_utils import completar_estadisticas
+
+        cuartiles = np.array([self.cuantiles[c].cuantiles([0.25, 0.50, 0.75]) for c in self.columnas])
+        stats = pd.DataFrame({
+            'mean'  : self.momentos.promedio(),
+            'median': cuartiles[:, 1],
+            'moda'  : [self.frecuencias[c].moda() for c in self.columnas],
+            'std'   : self.momentos.std(ddof=1),
+            'min'   : self.momentos.minimo,
+            '25%'   : cuartiles[:, 0],
+            '50%'   : cuartiles[:, 1],
+            '75%'   : cuartiles[:, 2],
+            'max'   : self.momentos.maximo
+        }, index=self.columnas)
+        vacias = self.momentos.n == 0
+        stats.loc[vacias, ['mean', 'min', 'max']] = np.nan
+        return completar_estadisticas(stats)
+
+    def cotas_error(self) -> pd.DataFrame:
+        """
+        Garantías de la tabla por columna: filas resumidas, error máximo de rango de
+        los cuartiles (fracción de n), infraestimación máxima de la frecuencia de
+        la moda y si cada estadística es exacta.
+        """
+        return pd.DataFrame({
+            'n': self.momentos.n.astype(int),
+            'error_rango_cuantiles': [self.cuantiles[c].cota_error() for c in self.columnas],
+            'cuantiles_exactos': [self.cuantiles[c].exacto for c in self.columnas],
+            'error_frecuencia_moda': [self.frecuencias[c].decremento for c in self.columnas],
+            'moda_exacta': [self.frecuencias[c].exacto for c in self.columnas],
+        }, index=self.columnas)
+
+
+def _resumir_bloque(
+    bloque: pd.DataFrame,
+    columnas: List[str],
+    capacidad: int,
+    k_moda: int,
+    limite_exacto: int
+) -> EstadisticasStreaming:
+    return EstadisticasStreaming(columnas, capacidad, k_moda, limite_exacto).actualizar(bloque)
+
+
+def estadisticas_por_bloques(
+    bloques: Iterable[pd.DataFrame],
+    procesos: int = 1,
+    capacidad: int = CAPACIDAD_CUANTILES,
+    k_moda: int = K_MODA,
+    limite_exacto: int = LIMITE_EXACTO
+) -> EstadisticasStreaming:
+    """
+    Resume una secuencia de bloques. Con `procesos` > 1 cada bloque se resume en
+    un proceso del pool y los resúmenes se combinan en el proceso principal según
+    terminan (con como mucho 2·procesos bloques en vuelo, para acotar la memoria).
+
+    Parámetros
+    ----------
+    bloques : iterable de pd.DataFrame
+        Bloques con las mismas columnas (p.ej. `pd.read_csv(..., chunksize=...)`).
+    procesos : int, opcional
+        Procesos de trabajo (por defecto 1: todo en el proceso actual).
+    capacidad, k_moda, limite_exacto : int, opcional
+        Tamaños de los sketches y límite del modo exacto (ver `EstadisticasStreaming`).
+
+    Devuelve
+    -------
+    EstadisticasStreaming
+        Resumen combinado; `tabla()` da las estadísticas y `cotas_error()` sus garantías.
+    """
+    bloques = iter(bloques)
+    primero = next(bloques, None)
+    if primero is None:
+        return EstadisticasStreaming([], capacidad, k_moda, limite_exacto)
+    columnas = primero.select_dtypes(include='number').columns.tolist()
+    total = EstadisticasStreaming(columnas, capacidad, k_moda, limite_exacto).actualizar(primero)
+
+    if procesos <= 1:
+        for bloque in bloques:
+            total.actualizar(bloque)
+        return total
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        pendientes = set()
+        for bloque in bloques:
+            pendientes.add(pool.submit(_resumir_bloque, bloque, columnas, capacidad, k_moda, limite_exacto))
+            if len(pendientes) >= 2 * procesos:
+                hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    total.combinar(futuro.result())
+        for futuro in wait(pendientes).done:
+            total.combinar(futuro.result())
+    return total
+
+
+def estadisticas_personalizadas_csv(
+    ruta_csv: str,
+    chunksize: int = 200_000,
+    procesos: int = 1,
+    capacidad: int = CAPACIDAD_CUANTILES,
+    k_moda: int = K_MODA,
+    limite_exacto: int = LIMITE_EXACTO,
+    **kwargs_csv
+) -> pd.DataFrame:
+    """
+    `estadisticas_personalizadas` sobre un CSV leído por bloques de `chunksize`
+    filas, sin cargarlo entero en memoria. Si ninguna columna pasa de
+    `limite_exacto` valores, la tabla coincide con la de la versión en memoria;
+    si no, se pasa a los sketches y las garantías se imprimen junto a ella.
+
+    Devuelve
+    -------
+    pd.DataFrame
+        La misma tabla que `estadisticas_personalizadas`.
+    """
+    lector = pd.read_csv(ruta_csv, chunksize=chunksize, **kwargs_csv)
+    resumen = estadisticas_por_bloques(lector, procesos, capacidad, k_moda, limite_exacto)
+    cotas = resumen.cotas_error()
+    if not (cotas['cuantiles_exactos'].all() and cotas['moda_exacta'].all()):
+        print("\n→ Cotas de error (resultados aproximados):")
+        print(cotas)
+    return resumen.tabla()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Estadísticas descriptivas de un CSV leído por bloques.')
+    parser.add_argument('ruta', help='CSV de entrada')
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--procesos', type=int, default=1)
+    parser.add_argument('--capacidad', type=int, default=CAPACIDAD_CUANTILES,
+                        help='Valores por nivel del sketch de cuantiles')
+    parser.add_argument('--k-moda', type=int, default=K_MODA,
+                        help='Contadores para la moda')
+    parser.add_argument('--limite-exacto', type=int, default=LIMITE_EXACTO,
+                        help='Valores por columna hasta los que cuantiles y moda son exactos '
+                             '(después se usan los sketches)')
+    args = parser.parse_args(argv)
+
+    tabla = estadisticas_personalizadas_csv(args.ruta, args.chunksize, args.procesos, args.capacidad, args.k_moda,
+                                            args.limite_exacto)
+    print()
+    print(tabla)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,443 @@
+# ——————————————————————————————
+# Mapas de densidad de los clústeres en el plano PCA
+# ——————————————————————————————
+# 03-Clustering_K-Means.ipynb y 04-Clustering_DBSCAN.ipynb dibujan la proyección
+# PCA con `sns.scatterplot`, un marcador por póliza: con toda la población
+# 'Normal' es lentísimo y ocupa mucha memoria, y se acaba recurriendo a muestras.
+# Aquí, en lugar de puntos, se dibujan rejillas de densidad:
+#
+#   1. Los clientes se transforman por bloques con el pipeline guardado y se
+#      proyectan con el `pca_model.pkl` guardado (el clúster se toma de la columna
+#      Cluster_KMeans o se predice con `kmeans_model.pkl` sobre la misma matriz).
+#   2. Cada punto se asigna a una celda de una rejilla bins × bins por clúster con
+#      un único np.bincount (clúster, celda x, celda y). Si no se dan los límites
+#      de la rejilla se guardan las coordenadas 2D (float32, 8 bytes por fila) y
+#      se fijan al final con los cuantiles `recorte` / 1 - `recorte`.
+#   3. En la misma pasada se acumulan las sumas por clúster de las variables
+#      numéricas y los recuentos por clúster de MAKE y USAGE, de los que salen
+#      `perfil_numerico` y `perfil_categorico` (las mismas tablas que el cuaderno
+#      calcula con groupby).
+#
+# Las etiquetas -1 (el ruido de DBSCAN) tienen su propia rejilla y su propia fila
+# en los perfiles, con el nombre "ruido" y en gris en los mapas.
+#
+# El dibujo solo depende del tamaño de la rejilla (bins² × clústeres), no del
+# número de pólizas: el mapa combinado tiñe cada celda con los colores de los
+# clústeres según su proporción y con una intensidad logarítmica del total.
+#
+# Ejemplos:
+#   python graficos_clusters.py --datos ../Data/motor_data_2011_2018_RISK.csv
+#   python graficos_clusters.py --datos ../Data/motor_data_final_para_powerbi.csv --bins 500 --salida ../Data/mapas
+#   python graficos_clusters.py --datos dbscan.csv --columna Cluster_DBSCAN --salida ../Data/mapas_dbscan
+#
+#   >>> mapa = MapaClusters.desde_modelos(df_cluster)
+#   >>> mapa.dibujar_mapa(); mapa.perfil_numerico
+
+import argparse
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from artefactos import MODELOS_DIR, _cargar_pickles
+from instrumentacion import instrumentar
+from seleccion_k import cat_features, num_features
+
+# Variables de los perfiles por clúster (como en 03-Clustering_K-Means.ipynb)
+variables_numericas = ['INSURED_VALUE', 'PREMIUM', 'SEATS_NUM', 'CARRYING_CAPACITY', 'CCM_TON', 'CLAIM_PAID']
+variables_categoricas = ['MAKE', 'USAGE']
+
+# Paleta de los clústeres (la de los scatterplot del cuaderno)
+PALETA = 'Set1'
+
+# Etiqueta del ruido de DBSCAN, su nombre en mapas y perfiles y su color
+RUIDO = -1
+NOMBRE_RUIDO = 'ruido'
+COLOR_RUIDO = (0.6, 0.6, 0.6)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+salida_path = os.path.normpath(os.path.join(BASE_DIR, '..', 'Data', 'mapas_clusters'))
+
+
+# ------------------------------------------------------
+# Acumulador de rejillas y perfiles por clúster
+# ------------------------------------------------------
+
+class MapaClusters:
+    """
+    Rejillas de densidad por clúster en el plano PCA y perfiles por clúster,
+    acumulados bloque a bloque.
+
+    Parámetros
+    ----------
+    bins : int, opcional
+        Celdas por eje de la rejilla (por defecto 300).
+    limites : tuple, opcional
+        ((x_min, x_max), (y_min, y_max)) de la rejilla. Si no se dan, se guardan
+        las coordenadas y se calculan en `finalizar` con los cuantiles `recorte`.
+    recorte : float, opcional
+        Proporción de puntos que se deja fuera por cada extremo de cada eje
+        al calcular los límites (por defecto 0.001).
+    etiqueta : str, opcional
+        Nombre de la columna de clúster (índice de los perfiles y título de la
+        leyenda; por defecto 'Cluster_KMeans').
+
+    Atributos
+    ---------
+    densidad_ : np.ndarray
+        Recuentos (n_clusters + 1 × bins × bins); el eje 1 es PCA1 y el eje 2, PCA2.
+        La posición 0 es el ruido (etiqueta -1) y la posición c + 1, el clúster c.
+    limites_ : tuple
+        Límites finales de la rejilla.
+    fuera_ : int
+        Puntos fuera de los límites (no se dibujan pero sí cuentan en los perfiles).
+    n_ : np.ndarray
+        Pólizas por clúster (con la misma posición que `densidad_`).
+    """
+
+    def __init__(self, bins: int = 300, limites=None, recorte: float = 0.001, etiqueta: str = 'Cluster_KMeans'):
+        self.bins = bins
+        self.limites = limites
+        self.recorte = recorte
+        self.etiqueta = etiqueta
+        self.densidad_ = np.zeros((0, bins, bins), dtype=np.int64)
+        self.limites_ = tuple(map(tuple, limites)) if limites is not None else None
+        self.fuera_ = 0
+        self.n_ = np.zeros(0, dtype=np.int64)
+        self._sumas = np.zeros((0, len(variables_numericas)))
+        self._no_nulos = np.zeros((0, len(variables_numericas)))
+        self._categorias: Dict[str, Dict] = {var: {} for var in variables_categoricas}
+        self._recuentos: Dict[str, np.ndarray] = {var: np.zeros((0, 0), dtype=np.int64) for var in variables_categoricas}
+        self._pendientes: List = []
+
+    # --------------------------------------------------
+    # Acumulación
+    # --------------------------------------------------
+
+    @staticmethod
+    def _nombre(posicion: int):
+        """Etiqueta que se muestra para la posición `posicion` de los acumuladores."""
+        return NOMBRE_RUIDO if posicion == 0 else posicion - 1
+
+    def _ampliar(self, n_clusters: int) -> None:
+        """Añade filas a los acumuladores si aparecen clústeres nuevos."""
+        extra = n_clusters - len(self.n_)
+        if extra <= 0:
+            return
+        self.n_ = np.pad(self.n_, (0, extra))
+        self.densidad_ = np.pad(self.densidad_, ((0, extra), (0, 0), (0, 0)))
+        self._sumas = np.pad(self._sumas, ((0, extra), (0, 0)))
+        self._no_nulos = np.pad(self._no_nulos, ((0, extra), (0, 0)))
+        for var in variables_categoricas:
+            self._recuentos[var] = np.pad(self._recuentos[var], ((0, 0), (0, extra)))
+
+    def _binear(self, Z: np.ndarray, clusters: np.ndarray) -> None:
+        """Suma los puntos `Z` (n × 2) de cada clúster a su rejilla."""
+        (x0, x1), (y0, y1) = self.limites_
+        ix = np.floor((Z[:, 0] - x0) * (self.bins / (x1 - x0))).astype(np.int64)
+        iy = np.floor((Z[:, 1] - y0) * (self.bins / (y1 - y0))).astype(np.int64)
+        # El borde superior se incluye en la última celda, como en np.histogram2d
+        ix[Z[:, 0] == x1] = self.bins - 1
+        iy[Z[:, 1] == y1] = self.bins - 1
+        dentro = (ix >= 0) & (ix < self.bins) & (iy >= 0) & (iy < self.bins)
+        self.fuera_ += int(len(ix) - dentro.sum())
+        celdas = (clusters[dentro].astype(np.int64) * self.bins + ix[dentro]) * self.bins + iy[dentro]
+        self.densidad_ += np.bincount(celdas, minlength=self.densidad_.size).reshape(self.densidad_.shape)
+
+    def _perfilar(self, bloque: pd.DataFrame, clusters: np.ndarray) -> None:
+        """Acumula sumas numéricas y recuentos categóricos por clúster."""
+        k = len(self.n_)
+        self.n_ += np.bincount(clusters, minlength=k)
+        for j, var in enumerate(variables_numericas):
+            valores = pd.to_numeric(bloque[var], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            validos = ~np.isnan(valores)
+            self._sumas[:, j] += np.bincount(clusters[validos], weights=valores[validos], minlength=k)
+            self._no_nulos[:, j] += np.bincount(clusters[validos], minlength=k)
+        for var in variables_categoricas:
+            codigos, unicas = pd.factorize(bloque[var])
+            indice = self._categorias[var]
+            globales = np.array([indice.setdefault(u, len(indice)) for u in unicas], dtype=np.int64)
+            recuentos = self._recuentos[var]
+            if len(indice) > len(recuentos):
+                recuentos = self._recuentos[var] = np.pad(recuentos, ((0, len(indice) - len(recuentos)), (0, 0)))
+            validos = codigos >= 0
+            parcial = np.bincount(codigos[validos] * k + clusters[validos], minlength=len(unicas) * k)
+            recuentos[globales] += parcial.reshape(len(unicas), k)
+
+    @instrumentar
+    def actualizar(self, Z: np.ndarray, clusters: np.ndarray, bloque: pd.DataFrame = None) -> 'MapaClusters':
+        """
+        Añade un bloque de puntos proyectados.
+
+        Parámetros
+        ----------
+        Z : np.ndarray
+            Coordenadas (n × 2) en el plano PCA.
+        clusters : np.ndarray
+            Clúster de cada punto (entero >= 0, o -1 para el ruido de DBSCAN).
+        bloque : pd.DataFrame, opcional
+            Filas originales, para los perfiles (variables_numericas y variables_categoricas).
+        """
+        # float32 basta para una rejilla y deja igual el camino con y sin límites fijos
+        Z = np.asarray(Z)[:, :2].astype(np.float32)
+        # Desplazadas en 1 para que el ruido (-1) ocupe la posición 0 de np.bincount
+        clusters = np.asarray(clusters).astype(np.int64) - RUIDO
+        if len(clusters) and clusters.min() < 0:
+            raise ValueError(f'Etiqueta de clúster no válida: {int(clusters.min()) + RUIDO} (se esperan enteros >= {RUIDO})')
+        self._ampliar(int(clusters.max()) + 1 if len(clusters) else 0)
+        if bloque is not None:
+            self._perfilar(bloque, clusters)
+        if self.limites_ is None:
+            self._pendientes.append((Z, clusters.astype(np.int16)))
+        else:
+            self._binear(Z, clusters)
+        return self
+
+    @instrumentar
+    def finalizar(self) -> 'MapaClusters':
+        """Fija los límites con los puntos guardados (si hace falta) y los bina."""
+        if not self._pendientes:
+            return self
+        Z = np.concatenate([z for z, _ in self._pendientes])
+        clusters = np.concatenate([c for _, c in self._pendientes])
+        self._pendientes = []
+        if self.limites_ is None:
+            bajo, alto = np.quantile(Z, [self.recorte, 1 - self.recorte], axis=0)
+            margen = (alto - bajo) * 0.02
+            self.limites_ = ((float(bajo[0] - margen[0]), float(alto[0] + margen[0])),
+                             (float(bajo[1] - margen[1]), float(alto[1] + margen[1])))
+        self._binear(Z, clusters)
+        return self
+
+    # --------------------------------------------------
+    # Perfiles
+    # --------------------------------------------------
+
+    def _indice(self, presentes: np.ndarray) -> pd.Index:
+        """Índice de los perfiles: los clústeres presentes, con el ruido como "ruido"."""
+        return pd.Index([self._nombre(c) for c in np.flatnonzero(presentes)], name=self.etiqueta)
+
+    @property
+    def perfil_numerico(self) -> pd.DataFrame:
+        """Media por clúster de las variables numéricas (como `groupby(...).mean().round(2)`)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = self._sumas / self._no_nulos
+        presentes = self.n_ > 0
+        indice = self._indice(presentes)
+        return pd.DataFrame(medias[presentes], index=indice, columns=variables_numericas).round(2)
+
+    @property
+    def perfil_categorico(self) -> Dict[str, pd.DataFrame]:
+        """
+        Proporción de cada categoría dentro de cada clúster (como
+        `groupby(...)[var].value_counts(normalize=True).unstack().round(3)`).
+        """
+        presentes = self.n_ > 0
+        indice = self._indice(presentes)
+        perfiles = {}
+        for var in variables_categoricas:
+            recuentos = self._recuentos[var].T[presentes].astype(float)
+            categorias = pd.Index(list(self._categorias[var]), name=var)
+            orden = categorias.argsort()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                proporciones = recuentos / recuentos.sum(axis=1, keepdims=True)
+            # Las combinaciones sin pólizas quedan a NaN, igual que con unstack()
+            proporciones[recuentos == 0] = np.nan
+            perfiles[var] = pd.DataFrame(proporciones[:, orden], index=indice, columns=categorias[orden]).round(3)
+        return perfiles
+
+    def guardar_perfiles(self, dir_salida: str) -> List[str]:
+        """Escribe perfil_numerico.csv y perfil_categorico_<VAR>.csv en `dir_salida`."""
+        os.makedirs(dir_salida, exist_ok=True)
+        rutas = [os.path.join(dir_salida, 'perfil_numerico.csv')]
+        self.perfil_numerico.to_csv(rutas[0])
+        for var, perfil in self.perfil_categorico.items():
+            rutas.append(os.path.join(dir_salida, f'perfil_categorico_{var}.csv'))
+            perfil.to_csv(rutas[-1])
+        return rutas
+
+    def guardar_rejilla(self, ruta: str) -> str:
+        """Guarda las rejillas, los límites y los recuentos en un .npz (`clusters` da la etiqueta de cada rejilla)."""
+        np.savez_compressed(ruta, densidad=self.densidad_, limites=np.asarray(self.limites_),
+                            n=self.n_, fuera=self.fuera_, clusters=np.arange(len(self.n_)) + RUIDO)
+        return ruta
+
+    # --------------------------------------------------
+    # Dibujo (coste proporcional a la rejilla, no a las pólizas)
+    # --------------------------------------------------
+
+    def _colores(self):
+        import matplotlib.pyplot as plt
+        colores = plt.get_cmap(PALETA)((np.arange(len(self.n_)) - 1) % 9)[:, :3]
+        if len(colores):
+            colores[0] = COLOR_RUIDO
+        return colores
+
+    @instrumentar
+    def imagen(self, intensidad_min: float = 0.15) -> np.ndarray:
+        """
+        Imagen RGBA (bins × bins × 4) del mapa combinado: cada celda mezcla los
+        colores de los clústeres según su proporción y su opacidad crece con el
+        logaritmo del total de pólizas de la celda.
+        """
+        densidad = self.densidad_.transpose(0, 2, 1).astype(np.float64)  # (k, y, x)
+        total = densidad.sum(axis=0)
+        ocupadas = total > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mezcla = np.einsum('kyx,kc->yxc', densidad, self._colores()) / total[..., None]
+        alfa = np.log1p(total) / np.log1p(total.max()) if total.max() > 0 else total
+        rgba = np.ones(total.shape + (4,))
+        rgba[..., :3] = np.where(ocupadas[..., None], mezcla, 1.0)
+        rgba[..., 3] = np.where(ocupadas, intensidad_min + (1 - intensidad_min) * alfa, 0.0)
+        return rgba
+
+    def dibujar_mapa(self, ax=None, titulo: str = 'Clústeres en el plano PCA (densidad)'):
+        """Mapa combinado de todos los clústeres con su leyenda."""
+        import matplotlib.pyplot as plt
+        from matplotlib.patches import Patch
+
+        if ax is None:
+            _, ax = plt.subplots(figsize=(8, 6))
+        (x0, x1), (y0, y1) = self.limites_
+        ax.imshow(self.imagen(), origin='lower', extent=(x0, x1, y0, y1), aspect='auto', interpolation='nearest')
+        colores = self._colores()
+        ax.legend(handles=[Patch(color=colores[c], label=f'{self._nombre(c)} (n={self.n_[c]:,})')
+                           for c in np.flatnonzero(self.n_)], title=self.etiqueta, fontsize=8)
+        ax.set_xlabel('PCA1')
+        ax.set_ylabel('PCA2')
+        ax.set_title(titulo)
+        return ax
+
+    def dibujar_paneles(self, cols: int = 3, figsize=None):
+        """Un panel por clúster con su densidad en escala logarítmica."""
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import LogNorm
+
+        presentes = np.flatnonzero(self.n_)
+        filas = int(np.ceil(len(presentes) / cols))
+        fig, axes = plt.subplots(filas, cols, figsize=figsize or (5 * cols, 4 * filas), squeeze=False,
+                                 layout='constrained')
+        (x0, x1), (y0, y1) = self.limites_
+        maximo = max(int(self.densidad_.max()), 1)
+        for ax, c in zip(axes.flat, presentes):
+            rejilla = np.ma.masked_equal(self.densidad_[c].T, 0)
+            im = ax.imshow(rejilla, origin='lower', extent=(x0, x1, y0, y1), aspect='auto',
+                           interpolation='nearest', cmap='viridis', norm=LogNorm(1, maximo))
+            ax.set_title(f'Ruido (n={self.n_[c]:,})' if c == 0 else f'Clúster {c - 1} (n={self.n_[c]:,})')
+            ax.set_xlabel('PCA1')
+            ax.set_ylabel('PCA2')
+        for ax in axes.flat[len(presentes):]:
+            ax.axis('off')
+        fig.colorbar(im, ax=axes, shrink=0.8, label='Pólizas por celda')
+        return fig
+
+    # --------------------------------------------------
+    # Construcción desde los modelos guardados
+    # --------------------------------------------------
+
+    @classmethod
+    def desde_modelos(
+        cls,
+        datos,
+        dir_modelos: str = MODELOS_DIR,
+        chunksize: int = 200_000,
+        solo_normal: bool = True,
+        **kwargs
+    ) -> 'MapaClusters':
+        """
+        Proyecta `datos` con el pipeline y el PCA guardados y acumula las rejillas
+        y los perfiles bloque a bloque. El clúster se toma de la columna
+        `etiqueta` (por defecto Cluster_KMeans; p.ej. Cluster_DBSCAN, con -1 como
+        ruido) o, si no existe, se predice con kmeans_model.pkl.
+
+        Parámetros
+        ----------
+        datos : pd.DataFrame o iterable de pd.DataFrame
+            Pólizas (con las columnas del modelo) o bloques de ellas, p.ej.
+            `pd.read_csv(..., chunksize=...)`.
+        dir_modelos : str, opcional
+            Carpeta con preprocessing_pipeline.pkl, kmeans_model.pkl y pca_model.pkl.
+        chunksize : int, opcional
+            Filas por bloque cuando `datos` es un DataFrame.
+        solo_normal : bool, opcional
+            Si hay columna RISK_CATEGORY, usar solo las pólizas 'Normal' (las que
+            entran en el K-Means).
+        **kwargs
+            Argumentos de `MapaClusters` (bins, limites, recorte, etiqueta).
+        """
+        pipeline, kmeans, pca = _cargar_pickles(dir_modelos)
+        if pca is None:
+            raise FileNotFoundError(f'No existe {os.path.join(dir_modelos, "pca_model.pkl")}')
+        mapa = cls(**kwargs)
+        bloques = datos
+        if isinstance(datos, pd.DataFrame):
+            bloques = (datos.iloc[i:i + chunksize] for i in range(0, len(datos), chunksize))
+        for bloque in bloques:
+            if solo_normal and 'RISK_CATEGORY' in bloque:
+                bloque = bloque[bloque['RISK_CATEGORY'] == 'Normal']
+            if mapa.etiqueta in bloque:
+                bloque = bloque[bloque[mapa.etiqueta].notna()]
+            if bloque.empty:
+                continue
+            X = pipeline.transform(bloque[num_features + cat_features])
+            # El PCA se ajustó sobre la matriz densa del pipeline
+            X = X.toarray() if hasattr(X, 'toarray') else X
+            clusters = (bloque[mapa.etiqueta].to_numpy() if mapa.etiqueta in bloque
+                        else kmeans.predict(X))
+            mapa.actualizar(pca.transform(X), clusters, bloque)
+        return mapa.finalizar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mapas de densidad de los clústeres en el plano PCA')
+    parser.add_argument('--datos', required=True,
+                        help='CSV de pólizas (con RISK_CATEGORY y, opcionalmente, la columna de clúster)')
+    parser.add_argument('--columna', default='Cluster_KMeans',
+                        help='Columna de clúster (p.ej. Cluster_DBSCAN, con -1 como ruido); '
+                             'si no está, se predice con kmeans_model.pkl')
+    parser.add_argument('--modelos', default=MODELOS_DIR,
+                        help='Carpeta de preprocessing_pipeline.pkl, kmeans_model.pkl y pca_model.pkl')
+    parser.add_argument('--salida', default=salida_path,
+                        help='Carpeta de las imágenes, la rejilla y los perfiles')
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--bins', type=int, default=300, help='Celdas por eje de la rejilla')
+    parser.add_argument('--limites', type=float, nargs=4, default=None, metavar=('X0', 'X1', 'Y0', 'Y1'),
+                        help='Límites fijos de la rejilla (por defecto, cuantiles de los datos)')
+    parser.add_argument('--todas', action='store_true',
+                        help="Incluir también las pólizas que no son 'Normal'")
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    limites = ((args.limites[0], args.limites[1]), (args.limites[2], args.limites[3])) if args.limites else None
+    lector = pd.read_csv(args.datos, chunksize=args.chunksize)
+
+    inicio = time.perf_counter()
+    mapa = MapaClusters.desde_modelos(lector, args.modelos, solo_normal=not args.todas,
+                                      bins=args.bins, limites=limites, etiqueta=args.columna)
+    acumulado = time.perf_counter() - inicio
+    print(f'Pólizas proyectadas: {int(mapa.n_.sum()):,} en {acumulado:.2f} s '
+          f'({mapa.fuera_:,} fuera de la rejilla {args.bins}×{args.bins})')
+
+    os.makedirs(args.salida, exist_ok=True)
+    inicio = time.perf_counter()
+    mapa.dibujar_mapa()
+    plt.savefig(os.path.join(args.salida, 'mapa_clusters.png'), dpi=120, bbox_inches='tight')
+    mapa.dibujar_paneles()
+    plt.savefig(os.path.join(args.salida, 'mapa_clusters_paneles.png'), dpi=120, bbox_inches='tight')
+    plt.close('all')
+    print(f'Mapas dibujados en {time.perf_counter() - inicio:.2f} s')
+
+    mapa.guardar_rejilla(os.path.join(args.salida, 'rejilla_clusters.npz'))
+    mapa.guardar_perfiles(args.salida)
+    print('Perfil numérico por clúster:')
+    print(mapa.perfil_numerico.to_string())
+    print(f'Resultados guardados en {args.salida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+# ——————————————————————————————
+# Gráficos de EDA (capa de visualización de data_utils)
+# ——————————————————————————————
+# Funciones que dibujan con matplotlib sobre los cálculos del núcleo de data_utils.
+# Están en un módulo aparte para que importar data_utils (parseo, imputación y
+# estadísticas) no cargue matplotlib ni scipy; data_utils las reexporta de forma
+# diferida, así que `du.plot_categorical_histograms(...)` se sigue pudiendo usar.
+# scipy solo se importa en los modos 'muestra'/'exacta' de la KDE.
+
+import math           # Para el número de filas de las cuadrículas
+
+import numpy as np    # Cálculo numérico y álgebra de matrices
+import pandas as pd   # Manipulación y análisis de estructuras de datos tabulares
+
+import matplotlib.pyplot as plt  
+# plt: interfaz de Matplotlib para crear gráficos (líneas, histogramas, scatter, etc.)
+
+from data_utils import DENSIDADES_KDE, MotorOutliers, kde_binned
+from instrumentacion import instrumentar
+
+
+# ------------------------------------------------------
+# Visualización gráfica de atributos numéricos
+# ------------------------------------------------------
+# Esta función toma un DataFrame y una lista de nombres de columnas,
+# y genera histogramas para cada columna, superponiendo una línea discontinua
+# que indica la media de los datos. Los histogramas se organizan en una cuadrícula de 2 filas y 3 columnas.
+# Se utiliza la biblioteca matplotlib para crear las visualizaciones.
+
+@instrumentar
+def plot_hist_with_mean_and_kde(df, atributos, bins=30, densidad='binned', max_muestra=50_000,
+                                semilla=42, cols=3, ruta=None, dpi=100):
+    """
+    Grafica histogramas de las columnas de `atributos` de df,
+    superpone una línea discontinua indicando la media,
+    y dibuja la curva de densidad (KDE) en rojo.
+    
+    Parámetros
+    ----------
+    df : pd.DataFrame
+        DataFrame que contiene los datos a graficar.
+    atributos : list[str]
+        Lista de nombres de columnas a graficar.
+    bins : int, opcional
+        Número de bins para el histograma (por defecto 30).
+    densidad : str, opcional
+        Cálculo de la KDE: 'binned' (binning + FFT, por defecto), 'muestra'
+        (`gaussian_kde` sobre como mucho `max_muestra` valores) o 'exacta'
+        (`gaussian_kde` sobre todos los valores, lento con el histórico completo).
+    max_muestra : int, opcional
+        Tamaño máximo de la muestra en el modo 'muestra'.
+    semilla : int, opcional
+        Semilla de la muestra (resultado reproducible).
+    cols : int, opcional
+        Columnas de la cuadrícula; las filas se calculan según `atributos`.
+    ruta : str, opcional
+        Si se indica, la figura se guarda en ese fichero sin usar pyplot (sirve en
+        procesos sin pantalla) en lugar de mostrarse.
+    dpi : int, opcional
+        Resolución del fichero guardado.
+
+    Devuelve
+    -------
+    str o None
+        `ruta` si la figura se ha guardado.
+    """
+    if densidad not in DENSIDADES_KDE:
+        raise ValueError(f"densidad debe ser una de {DENSIDADES_KDE}")
+
+    # Cuadrícula dinámica: tantas filas como hagan falta para todos los atributos
+    n = len(atributos)
+    cols = max(1, min(cols, n))
+    rows = max(1, math.ceil(n / cols))
+    if ruta is None:
+        fig, axes = plt.subplots(nrows=rows, ncols=cols, figsize=(4 * cols, 4 * rows), squeeze=False)
+    else:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(4 * cols, 4 * rows))
+        axes = fig.subplots(nrows=rows, ncols=cols, squeeze=False)
+    axes = axes.flatten()
+    rng = np.random.default_rng(semilla)
+    
+    for ax, col in zip(axes, atributos):
+        data = df[col].dropna().to_numpy(dtype=np.float64)
+        
+        # Histograma normalizado: calculado una vez con np.histogram y dibujado a partir de él
+        alturas, bordes = np.histogram(data, bins=bins, density=True)
+        ax.hist(bordes[:-1], bins=bordes, weights=alturas, alpha=0.6, edgecolor='black')
+        
+        # Línea vertical de la media
+        mu = data.mean()
+        ax.axvline(mu, linestyle='--', linewidth=2, label=f'Media: {mu:.3f}')
+        
+        # Curva de densidad (KDE)
+        x_vals = np.linspace(data.min(), data.max(), 200)
+        if densidad == 'binned':
+            y_vals = kde_binned(data, x_vals)
+        else:
+            if densidad == 'muestra' and len(data) > max_muestra:
+                data = rng.choice(data, size=max_muestra, replace=False)
+            from scipy.stats import gaussian_kde
+            y_vals = gaussian_kde(data)(x_vals)
+        ax.plot(x_vals, y_vals, color='red', linewidth=2, label='KDE')
+        
+        ax.set_title(col)
+        ax.set_ylabel('Densidad')
+        ax.legend()
+    
+    # Apagamos subplots sobrantes
+    for ax in axes[n:]:
+        ax.axis('off')
+    
+    fig.tight_layout()
+    if ruta is None:
+        plt.show()
+        return None
+    fig.savefig(ruta, dpi=dpi)
+    return ruta
+
+
+# ------------------------------------------------------
+# Función para identificar y eliminar outliers
+# -------------------------------------------------------       
+
+@instrumentar
+def listar_outliers_y_boxplot(df, atributos):
+    """
+    Para cada columna en `atributos`:
+     - Detecta outliers con el método IQR (1.5*IQR)
+     - Almacena los valores atípicos en un dict
+     - Dibuja un boxplot horizontal
+    Retorna:
+      outliers_dict: {columna: Series de outliers}
+      fig: objeto matplotlib.figure.Figure
+    """
+    outliers_dict = {}
+    n = len(atributos)
+    
+    # Creamos la figura y los ejes
+    cols = 4
+    rows = (n + cols - 1) // cols  # Redondeo hacia arriba
+    if rows == 0:
+        rows = 1
+
+    # Creamos un grid de rows x cols
+    fig, axes = plt.subplots(rows, cols,
+                             figsize=(4 * cols, 4 * rows),
+                             squeeze=False)
+    axes = axes.flatten()
+    
+    # Límites IQR y máscara de outliers de todas las columnas a la vez
+    mascara = MotorOutliers(atributos, metodo='iqr').fit(df).mascara(df)
+
+    for ax, col in zip(axes, atributos):
+        data = df[col].dropna()
+        
+        # Outliers de la columna
+        outliers = df[col][mascara[col]]
+        outliers_dict[col] = outliers
+        
+        # Boxplot Vertical
+        ax.boxplot(data, vert=True, showfliers=True)
+        ax.set_title(f'Boxplot de {col}')
+        ax.set_xlabel(col)
+        
+        # anotar número de outliers
+        ax.annotate(f"n outliers={len(outliers)}",
+                    xy=(0.95, 0.85), xycoords='axes fraction',
+                    ha='right', fontsize=9, bbox=dict(boxstyle="round,pad=0.3", 
+                                                      fc="white", ec="gray"))
+    
+    plt.tight_layout()
+    return outliers_dict, fig
+
+
+# ------------------------------------------------------
+# función para graficar histogramas de atributos categóricos
+# -------------------------------------------------------
+# Esta función toma un DataFrame y una lista de nombres de columnas categóricas,
+# y genera histogramas (barcharts) para cada columna, organizados en un grid de hasta 4 columnas.
+# Se utiliza la biblioteca matplotlib para crear las visualizaciones.
+# Se asume que las columnas categóricas son de tipo 'object' o 'category'.
+# Se pueden rotar las etiquetas del eje x para mejorar la legibilidad.
+# Se pueden ocultar los ejes sobrantes si hay menos columnas que filas*columnas.
+
+@instrumentar
+def plot_categorical_histograms(df, columns, cols=4, figsize=None, rotation=45, palette='viridis', fontsize=8):
+    """
+    Dibuja histogramas (barcharts) de frecuencia para cada atributo categórico en 'columns',
+    organizados en un grid de hasta 'cols' columnas, usando la paleta de colores seleccionada.
+
+    Parámetros:
+    - df: pandas.DataFrame con los datos.
+    - columns: lista de nombres de columnas categóricas a graficar.
+    - cols: número de columnas en el grid.
+    - figsize: tamaño de la figura (ancho, alto).
+    - rotation: ángulo de rotación de las etiquetas del eje x.
+    - palette: nombre de la paleta de colores de matplotlib a usar para las barras.
+    - fontsize: tamaño de letra para etiquetas y ticks.
+    """
+    n = len(columns)
+    rows = (n + cols - 1) // cols if cols > 0 else 1
+
+    if figsize is None:
+        figsize = (4 * cols, 4 * rows)
+
+    # Caso especial: solo una gráfica
+    if n == 1:
+        fig, ax = plt.subplots(figsize=figsize)
+        axes = [ax]
+    else:
+        fig, axes = plt.subplots(rows, cols, figsize=figsize)
+        axes = axes.flatten()
+
+    for ax, col in zip(axes, columns):
+        counts = df[col].value_counts(dropna=False)
+        num_bars = len(counts)
+        cmap = plt.get_cmap(palette, num_bars)
+        colors = [cmap(i) for i in range(num_bars)]
+        counts.plot(kind='bar', ax=ax, color=colors)
+        ax.set_title(f'Histograma de {col}', fontsize=fontsize+2)
+        ax.set_xlabel(col, fontsize=fontsize)
+        ax.set_ylabel('Frecuencia', fontsize=fontsize)
+        ax.tick_params(axis='x', labelsize=fontsize, rotation=rotation)
+        ax.tick_params(axis='y', labelsize=fontsize)
+
+    for ax in axes[n:]:
+        ax.set_visible(False)
+
+    plt.tight_layout()
+    plt.show()
+
+
+# ------------------------------------------------------
+# Visualización de variables tipo datetime
+# -------------------------------------------------------
+
+@instrumentar
+def plot_date_distributions_subplots(df, date_cols, freq='Y', figsize=(6, 4), fontsize=10, palette='viridis'):
+    """
+    Grafica la distribución de variables de fecha en subplots.
+    
+    Parámetros:
+    - df: DataFrame
+    - date_cols: lista de nombres de columnas de tipo fecha
+    - freq: frecuencia de agrupación ('Y' año, 'M' mes, 'D' día)
+    - figsize: tamaño total de la figura (ancho, alto) POR SUBPLOT
+    - fontsize: tamaño de letras
+    - palette: paleta de colores matplotlib a usar ('viridis', etc.)
+    """
+    n = len(date_cols)
+    fig, axes = plt.subplots(n, 1, figsize=(figsize[0], figsize[1]*n))
+    
+    # Permite compatibilidad cuando solo hay una columna
+    if n == 1:
+        axes = [axes]
+
+    for ax, col in zip(axes, date_cols):
+        fechas = pd.to_datetime(df[col], errors='coerce').dropna()
+        if len(fechas) == 0:
+            ax.set_title(f'{col}: Sin fechas válidas', fontsize=fontsize+2)
+            continue
+        serie = fechas.dt.to_period(freq).value_counts().sort_index()
+        num_bars = len(serie)
+        cmap = plt.get_cmap(palette, num_bars)
+        colors = [cmap(i) for i in range(num_bars)]
+        serie.plot(kind='bar', ax=ax, color=colors)
+        ax.set_title(f'Distribución temporal de {col}', fontsize=fontsize+2)
+        ax.set_xlabel('Fecha', fontsize=fontsize)
+        ax.set_ylabel('Frecuencia', fontsize=fontsize)
+        ax.tick_params(axis='x', labelsize=fontsize, rotation=45)
+        ax.tick_params(axis='y', labelsize=fontsize)
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,354 @@
+# ——————————————————————————————
+# Informe EDA por línea de comandos (HTML + PNG, sin pantalla)
+# ——————————————————————————————
+# Las funciones de EDA de data_utils (`plot_hist_with_mean_and_kde`,
+# `listar_outliers_y_boxplot`, `plot_categorical_histograms`,
+# `plot_date_distributions_subplots`, `date_column_summary`) dibujan con plt.show()
+# y cada una recalcula sobre el DataFrame completo sus value_counts/to_datetime.
+# Este script separa el informe en dos fases:
+#
+#   1. Agregados: histogramas, KDE, cajas, frecuencias y resúmenes de fechas se
+#      calculan UNA vez y se guardan en <carpeta del CSV>/.cache/eda-<nombre>-<hash>.joblib.
+#      La clave incluye el hash del CSV y los parámetros que cambian los agregados
+#      (columnas, bins, frecuencia), así que si solo cambia el estilo no se recalculan.
+#   2. Render: cada figura se dibuja en un proceso del pool con el backend Agg a
+#      partir de los agregados (arrays pequeños) y se guarda como PNG; al final se
+#      escribe un index.html con las tablas y las imágenes.
+#
+# Ejemplo:
+#   python informe_eda.py --datos ../Data/motor_data11-14lats.csv --salida ../informe_eda --procesos 4
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Versión de la estructura de agregados guardada en caché
+VERSION_AGREGADOS = 1
+
+# Máximo de categorías por gráfico de barras (el resto se agrupa en 'Otras')
+MAX_CATEGORIAS = 40
+
+
+def _clave_agregados(ruta_csv: str, parametros: Dict) -> str:
+    from data_utils import hash_fichero
+
+    texto = json.dumps({'datos': hash_fichero(ruta_csv), 'parametros': parametros,
+                        'version': VERSION_AGREGADOS}, sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _columnas_por_tipo(df: pd.DataFrame):
+    """Columnas numéricas, categóricas y de fecha detectadas en `df`."""
+    num = [c for c in df.select_dtypes(include='number').columns if c != 'OBJECT_ID']
+    fechas = df.select_dtypes(include='datetime').columns.tolist()
+    cat = [c for c in df.columns if c not in num and c not in fechas and c != 'OBJECT_ID'
+           and df[c].nunique(dropna=True) <= 200]
+    return num, cat, fechas
+
+
+def calcular_agregados(
+    df: pd.DataFrame,
+    num_cols: List[str],
+    cat_cols: List[str],
+    date_cols: List[str],
+    bins: int = 30,
+    freq: str = 'Y'
+) -> Dict:
+    """
+    Calcula en una pasada todo lo que necesitan las figuras y tablas del informe.
+
+    Devuelve
+    -------
+    dict
+        'estadisticas', 'outliers' y 'resumen_fechas' (DataFrames) y, por columna,
+        los arrays de 'numericas', 'categoricas' y 'fechas'.
+    """
+    from data_utils import (MotorOutliers, estadisticas_personalizadas, kde_binned,
+                            parsear_fechas)
+
+    agregados = {'filas': len(df), 'numericas': {}, 'categoricas': {}, 'fechas': {}}
+
+    # Numéricas: tabla de estadísticas, límites IQR y cuartiles de todas las columnas a la vez
+    agregados['estadisticas'] = estadisticas_personalizadas(df[num_cols]) if num_cols else pd.DataFrame()
+    motor = MotorOutliers(num_cols, metodo='iqr').fit(df)
+    agregados['outliers'] = motor.resumen(df)
+    cuartiles = df[num_cols].quantile([0.25, 0.50, 0.75])
+    for col in num_cols:
+        data = df[col].dropna().to_numpy(dtype=np.float64)
+        if len(data) == 0:
+            continue
+        alturas, bordes = np.histogram(data, bins=bins, density=True)
+        x_vals = np.linspace(data.min(), data.max(), 200)
+        inferior, superior = motor.limites_.at[col, 'inferior'], motor.limites_.at[col, 'superior']
+        dentro = data[(data >= inferior) & (data <= superior)]
+        agregados['numericas'][col] = {
+            'alturas': alturas, 'bordes': bordes, 'media': float(data.mean()),
+            'x': x_vals, 'kde': kde_binned(data, x_vals),
+            'caja': {
+                'label': col, 'q1': cuartiles.at[0.25, col], 'med': cuartiles.at[0.50, col],
+                'q3': cuartiles.at[0.75, col], 'fliers': [],
+                'whislo': dentro.min() if len(dentro) else inferior,
+                'whishi': dentro.max() if len(dentro) else superior,
+            },
+            'n_outliers': int(agregados['outliers'].at[col, 'n_outliers']),
+        }
+
+    # Categóricas: una sola value_counts por columna
+    for col in cat_cols:
+        conteos = df[col].value_counts(dropna=False)
+        if len(conteos) > MAX_CATEGORIAS:
+            resto = conteos.iloc[MAX_CATEGORIAS - 1:].sum()
+            conteos = pd.concat([conteos.iloc[:MAX_CATEGORIAS - 1], pd.Series({'Otras': resto})])
+        agregados['categoricas'][col] = {
+            'etiquetas': [str(e) for e in conteos.index], 'conteos': conteos.to_numpy()
+        }
+
+    # Fechas: se parsean una vez (si no vienen ya como datetime) para el resumen y la distribución
+    resumen = []
+    for col in date_cols:
+        fechas = df[col] if pd.api.types.is_datetime64_any_dtype(df[col]) else parsear_fechas(df[col])
+        minimo, maximo = fechas.min(), fechas.max()
+        resumen.append({
+            'columna': col, 'min_fecha': minimo, 'max_fecha': maximo,
+            'rango_dias': (maximo - minimo).days if pd.notnull(minimo) and pd.notnull(maximo) else None,
+            'n_nulos': int(fechas.isnull().sum()), 'n_unicos': int(fechas.nunique()),
+        })
+        serie = fechas.dropna().dt.to_period(freq).value_counts().sort_index()
+        agregados['fechas'][col] = {
+            'etiquetas': [str(p) for p in serie.index], 'conteos': serie.to_numpy()
+        }
+    agregados['resumen_fechas'] = pd.DataFrame(resumen)
+    return agregados
+
+
+def agregados_cacheados(
+    ruta_csv: str,
+    num_cols: List[str] = None,
+    cat_cols: List[str] = None,
+    date_cols: List[str] = None,
+    bins: int = 30,
+    freq: str = 'Y',
+    dir_cache: str = None
+) -> Dict:
+    """
+    Devuelve los agregados de `ruta_csv`, leyéndolos de la caché si el CSV y los
+    parámetros no han cambiado. Sin columnas indicadas, se detectan por tipo.
+    """
+    import joblib
+    from data_utils import leer_csv_cacheado
+
+    parametros = {'num': num_cols, 'cat': cat_cols, 'fechas': date_cols, 'bins': bins, 'freq': freq}
+    if dir_cache is None:
+        dir_cache = os.path.join(os.path.dirname(os.path.abspath(ruta_csv)), '.cache')
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    ruta = os.path.join(dir_cache, f"eda-{nombre}-{_clave_agregados(ruta_csv, parametros)[:16]}.joblib")
+    if os.path.exists(ruta):
+        print(f"Agregados leídos de la caché: {ruta}")
+        return joblib.load(ruta)
+
+    inicio = time.perf_counter()
+    df = leer_csv_cacheado(ruta_csv)
+    if 'Unnamed: 0' in df.columns:
+        df = df.drop(columns='Unnamed: 0')
+    num_auto, cat_auto, fechas_auto = _columnas_por_tipo(df)
+    agregados = calcular_agregados(
+        df,
+        num_cols if num_cols is not None else num_auto,
+        cat_cols if cat_cols is not None else cat_auto,
+        date_cols if date_cols is not None else fechas_auto,
+        bins, freq
+    )
+    agregados['datos'] = os.path.abspath(ruta_csv)
+    os.makedirs(dir_cache, exist_ok=True)
+    joblib.dump(agregados, ruta)
+    print(f"Agregados calculados en {time.perf_counter() - inicio:.1f} s y guardados en {ruta}")
+    return agregados
+
+
+# ------------------------------------------------------
+# Render de figuras (en procesos del pool, backend Agg)
+# ------------------------------------------------------
+
+def _iniciar_backend() -> None:
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _colores(paleta: str, n: int):
+    import matplotlib
+    cmap = matplotlib.colormaps[paleta].resampled(max(n, 1))
+    return [cmap(i) for i in range(n)]
+
+
+def _renderizar(tarea: Dict) -> str:
+    """Dibuja una figura a partir de sus agregados y la guarda como PNG."""
+    from matplotlib.figure import Figure
+
+    tipo, col, datos, estilo = tarea['tipo'], tarea['columna'], tarea['datos'], tarea['estilo']
+    fs = estilo['fontsize']
+    fig = Figure(figsize=estilo['figsize'])
+    ax = fig.subplots()
+
+    if tipo == 'histograma':
+        bordes = datos['bordes']
+        ax.hist(bordes[:-1], bins=bordes, weights=datos['alturas'], alpha=0.6, edgecolor='black')
+        ax.axvline(datos['media'], linestyle='--', linewidth=2, label=f"Media: {datos['media']:.3f}")
+        if not np.isnan(datos['kde']).all():
+            ax.plot(datos['x'], datos['kde'], color='red', linewidth=2, label='KDE')
+        ax.set_ylabel('Densidad', fontsize=fs)
+        ax.legend(fontsize=fs)
+        ax.set_title(col, fontsize=fs + 2)
+    elif tipo == 'caja':
+        ax.bxp([datos['caja']], showfliers=False)
+        ax.set_title(f'Boxplot de {col}', fontsize=fs + 2)
+        ax.annotate(f"n outliers={datos['n_outliers']}", xy=(0.95, 0.9), xycoords='axes fraction',
+                    ha='right', fontsize=fs, bbox=dict(boxstyle='round,pad=0.3', fc='white', ec='gray'))
+    else:
+        etiquetas, conteos = datos['etiquetas'], datos['conteos']
+        ax.bar(range(len(conteos)), conteos, color=_colores(estilo['paleta'], len(conteos)))
+        ax.set_xticks(range(len(conteos)))
+        ax.set_xticklabels(etiquetas, rotation=estilo['rotacion'], fontsize=fs,
+                           ha='right' if estilo['rotacion'] else 'center')
+        ax.set_ylabel('Frecuencia', fontsize=fs)
+        titulo = f'Histograma de {col}' if tipo == 'categorica' else f'Distribución temporal de {col}'
+        ax.set_title(titulo, fontsize=fs + 2)
+    ax.tick_params(axis='y', labelsize=fs)
+
+    fig.tight_layout()
+    fig.savefig(tarea['ruta'], dpi=estilo['dpi'])
+    return tarea['ruta']
+
+
+def _seccion_html(titulo: str, imagenes: List[str], tabla: pd.DataFrame = None) -> str:
+    partes = [f'<h2>{html.escape(titulo)}</h2>']
+    if tabla is not None and not tabla.empty:
+        partes.append(tabla.to_html(float_format=lambda x: f'{x:,.3f}', border=0, classes='tabla'))
+    partes.append('<div class="figuras">' + ''.join(
+        f'<img src="{html.escape(os.path.basename(r))}" loading="lazy">' for r in imagenes
+    ) + '</div>')
+    return '\n'.join(partes)
+
+
+def generar_informe(
+    ruta_csv: str,
+    salida: str,
+    procesos: int = None,
+    num_cols: List[str] = None,
+    cat_cols: List[str] = None,
+    date_cols: List[str] = None,
+    bins: int = 30,
+    freq: str = 'Y',
+    paleta: str = 'viridis',
+    fontsize: int = 8,
+    rotacion: int = 45,
+    dpi: int = 100
+) -> str:
+    """
+    Genera el informe EDA de `ruta_csv` en la carpeta `salida` (index.html + PNG).
+
+    Parámetros
+    ----------
+    ruta_csv : str
+        CSV de motor_data a analizar.
+    salida : str
+        Carpeta del informe (se crea si no existe).
+    procesos : int, opcional
+        Procesos para dibujar las figuras (por defecto, uno por CPU).
+    num_cols, cat_cols, date_cols : list[str], opcional
+        Columnas de cada tipo (por defecto se detectan).
+    bins, freq : opcional
+        Bins de los histogramas y frecuencia de las fechas (forman parte de la caché).
+    paleta, fontsize, rotacion, dpi : opcional
+        Estilo de las figuras (no invalidan la caché de agregados).
+
+    Devuelve
+    -------
+    str
+        Ruta del index.html.
+    """
+    agregados = agregados_cacheados(ruta_csv, num_cols, cat_cols, date_cols, bins, freq)
+    os.makedirs(salida, exist_ok=True)
+    estilo = {'paleta': paleta, 'fontsize': fontsize, 'rotacion': rotacion, 'dpi': dpi, 'figsize': (5, 4)}
+
+    tareas = []
+    for col, datos in agregados['numericas'].items():
+        for tipo in ('histograma', 'caja'):
+            tareas.append({'tipo': tipo, 'columna': col, 'datos': datos, 'estilo': estilo,
+                           'ruta': os.path.join(salida, f'{tipo}_{col}.png')})
+    for grupo, tipo in (('categoricas', 'categorica'), ('fechas', 'fecha')):
+        for col, datos in agregados[grupo].items():
+            ancho = min(max(5, 0.3 * len(datos['conteos'])), 14)
+            tareas.append({'tipo': tipo, 'columna': col, 'datos': datos, 'estilo': dict(estilo, figsize=(ancho, 4)),
+                           'ruta': os.path.join(salida, f'{tipo}_{col}.png')})
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_backend) as pool:
+        rutas = list(pool.map(_renderizar, tareas))
+    print(f"{len(rutas)} figuras dibujadas en {time.perf_counter() - inicio:.1f} s")
+
+    por_tipo = {}
+    for tarea, ruta in zip(tareas, rutas):
+        por_tipo.setdefault(tarea['tipo'], []).append(ruta)
+
+    cuerpo = [
+        _seccion_html('Variables numéricas', por_tipo.get('histograma', []), agregados['estadisticas']),
+        _seccion_html('Outliers (IQR)', por_tipo.get('caja', []), agregados['outliers']),
+        _seccion_html('Variables categóricas', por_tipo.get('categorica', [])),
+        _seccion_html('Variables de fecha', por_tipo.get('fecha', []), agregados['resumen_fechas']),
+    ]
+    documento = f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Informe EDA - {html.escape(os.path.basename(ruta_csv))}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+.tabla {{ border-collapse: collapse; font-size: 0.85em; margin-bottom: 1em; }}
+.tabla td, .tabla th {{ padding: 2px 8px; text-align: right; }}
+.figuras img {{ max-width: 32%; margin: 0.3%; }}
+</style>
+</head>
+<body>
+<h1>Informe EDA: {html.escape(os.path.basename(ruta_csv))}</h1>
+<p>{agregados['filas']:,} filas.</p>
+{chr(10).join(cuerpo)}
+</body>
+</html>
+"""
+    ruta_html = os.path.join(salida, 'index.html')
+    with open(ruta_html, 'w', encoding='utf-8') as f:
+        f.write(documento)
+    return ruta_html
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Informe EDA en HTML/PNG de un CSV de motor_data.')
+    parser.add_argument('--datos', required=True, help='CSV a analizar')
+    parser.add_argument('--salida', required=True, help='Carpeta del informe')
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--num', nargs='*', default=None, help='Columnas numéricas (por defecto, detectadas)')
+    parser.add_argument('--cat', nargs='*', default=None, help='Columnas categóricas (por defecto, detectadas)')
+    parser.add_argument('--fechas', nargs='*', default=None, help='Columnas de fecha (por defecto, detectadas)')
+    parser.add_argument('--bins', type=int, default=30)
+    parser.add_argument('--freq', default='Y', help="Agrupación de las fechas ('Y', 'M', 'D')")
+    parser.add_argument('--paleta', default='viridis')
+    parser.add_argument('--fontsize', type=int, default=8)
+    parser.add_argument('--rotacion', type=int, default=45)
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    ruta = generar_informe(args.datos, args.salida, args.procesos, args.num, args.cat, args.fechas,
+                           args.bins, args.freq, args.paleta, args.fontsize, args.rotacion, args.dpi)
+    print(f"Informe generado en {ruta}")
+
+
+if __name__ == '__main__':
+    main()
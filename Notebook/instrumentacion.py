@@ -0,0 +1,415 @@
+# ——————————————————————————————
+# Instrumentación de las funciones calientes (tiempo, filas, memoria y perfilado)
+# ——————————————————————————————
+# Hasta ahora la única telemetría de data_utils y del scoring eran los print. Este
+# módulo ofrece:
+#
+#   - `@instrumentar`: decorador para funciones y métodos públicos. Cada llamada es
+#     un tramo con su tiempo total, su tiempo propio (sin los tramos anidados), las
+#     filas del primer argumento con `shape` y el incremento de RSS.
+#   - `tramo(nombre, filas)`: lo mismo como bloque `with`, para etapas dentro de una
+#     función (p.ej. pipeline.transform y kmeans.predict en el scoring).
+#   - Un perfilador por muestreo opcional: un hilo recoge cada `intervalo` segundos
+#     la pila de los demás hilos (sys._current_frames) y cuenta las muestras por
+#     función, por pila (formato "plegado" de los flame graphs) y por tramo abierto.
+#   - Exportación de lo acumulado a JSON o a texto de Prometheus.
+#
+# Desactivada (por defecto), el decorador solo comprueba un booleano del módulo y
+# llama a la función, y `tramo` devuelve un contexto vacío compartido: unos cientos
+# de nanosegundos por llamada, sin reloj, sin /proc y sin bloqueos.
+#
+# Se activa con `activar()` o con la variable de entorno MOTOR_INSTRUMENTACION
+# (=1 para tramos, =perfil para tramos y perfilador).
+#
+# Ejemplo:
+#   >>> import instrumentacion
+#   >>> instrumentacion.activar(perfilar=True)
+#   >>> ...  # carga, preproceso, scoring
+#   >>> instrumentacion.exportar_prometheus('metricas.prom')
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+# Prefijo de las métricas de Prometheus
+PREFIJO_METRICAS = 'motor'
+
+# Profundidad máxima de pila que guarda el perfilador
+PROFUNDIDAD_PERFIL = 64
+
+
+# ------------------------------------------------------
+# Memoria del proceso
+# ------------------------------------------------------
+
+def pico_memoria_mb() -> float:
+    """Pico de memoria residente (RSS) del proceso en MB (NaN si no está disponible)."""
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux da KB; macOS, bytes
+    return pico / 2**20 if sys.platform == 'darwin' else pico / 2**10
+
+
+def memoria_actual_mb() -> float:
+    """Memoria residente (RSS) actual del proceso en MB (NaN si no está disponible)."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+    except OSError:
+        return float('nan')
+    return paginas * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+# ------------------------------------------------------
+# Estado global
+# ------------------------------------------------------
+
+_activa = False
+_medir_memoria = True
+_cerrojo = threading.Lock()
+_inicio = None
+
+# nombre -> [llamadas, errores, segundos, segundos_propios, segundos_max, filas, rss_incremento_max_mb]
+_tramos: Dict[str, List[float]] = {}
+
+# Tramos abiertos de cada hilo (el último es el más interno)
+_pilas: Dict[int, List['_Tramo']] = {}
+
+_perfilador = None
+
+
+def activa() -> bool:
+    return _activa
+
+
+def activar(perfilar: bool = False, intervalo: float = 0.005, memoria: bool = True) -> None:
+    """
+    Activa la instrumentación.
+
+    Parámetros
+    ----------
+    perfilar : bool, opcional
+        Arrancar también el perfilador por muestreo.
+    intervalo : float, opcional
+        Segundos entre muestras del perfilador (por defecto 5 ms).
+    memoria : bool, opcional
+        Medir la RSS al entrar y salir de cada tramo (por defecto True).
+    """
+    global _activa, _medir_memoria, _inicio, _perfilador
+    _medir_memoria = memoria
+    if _inicio is None:
+        _inicio = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    if perfilar and _perfilador is None:
+        _perfilador = PerfiladorMuestreo(intervalo)
+        _perfilador.start()
+    _activa = True
+
+
+def desactivar() -> None:
+    """Desactiva la instrumentación y detiene el perfilador (lo acumulado se conserva)."""
+    global _activa
+    _activa = False
+    if _perfilador is not None:
+        _perfilador.detener()
+
+
+def reiniciar() -> None:
+    """Borra los tramos y el perfil acumulados."""
+    global _inicio, _perfilador
+    with _cerrojo:
+        _tramos.clear()
+    if _perfilador is not None:
+        _perfilador.detener()
+        _perfilador = PerfiladorMuestreo(_perfilador.intervalo) if _activa else None
+        if _perfilador is not None:
+            _perfilador.start()
+    _inicio = datetime.now(timezone.utc).isoformat(timespec='seconds') if _activa else None
+
+
+# ------------------------------------------------------
+# Tramos
+# ------------------------------------------------------
+
+class _Tramo:
+    """Una llamada en curso: mide al salir y acumula en `_tramos`."""
+
+    __slots__ = ('nombre', 'filas', 'inicio', 'rss', 'hijos', 'pila')
+
+    def __init__(self, nombre: str, filas: int = None):
+        self.nombre = nombre
+        self.filas = filas
+
+    def __enter__(self):
+        self.hijos = 0.0
+        self.pila = _pilas.setdefault(threading.get_ident(), [])
+        self.pila.append(self)
+        self.rss = memoria_actual_mb() if _medir_memoria else float('nan')
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        segundos = time.perf_counter() - self.inicio
+        incremento = memoria_actual_mb() - self.rss if _medir_memoria else float('nan')
+        self.pila.pop()
+        if self.pila:
+            self.pila[-1].hijos += segundos
+        with _cerrojo:
+            a = _tramos.get(self.nombre)
+            if a is None:
+                a = _tramos[self.nombre] = [0, 0, 0.0, 0.0, 0.0, 0, float('nan')]
+            a[0] += 1
+            a[1] += tipo is not None
+            a[2] += segundos
+            a[3] += segundos - self.hijos
+            a[4] = max(a[4], segundos)
+            a[5] += self.filas or 0
+            if incremento == incremento:
+                a[6] = incremento if a[6] != a[6] else max(a[6], incremento)
+        return False
+
+
+class _TramoNulo:
+    """Contexto vacío que se usa con la instrumentación desactivada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        return False
+
+
+_TRAMO_NULO = _TramoNulo()
+
+
+def tramo(nombre: str, filas: int = None):
+    """
+    Bloque `with` medido como el tramo `nombre` (contexto vacío si la
+    instrumentación está desactivada).
+    """
+    if not _activa:
+        return _TRAMO_NULO
+    return _Tramo(nombre, filas)
+
+
+def _filas(args) -> int:
+    """Filas del primer argumento con `shape` (DataFrame, Series, array)."""
+    for arg in args[:2]:
+        forma = getattr(arg, 'shape', None)
+        if forma:
+            return forma[0]
+    return None
+
+
+def instrumentar(nombre: Callable = None):
+    """
+    Decorador que mide cada llamada como un tramo. Sin argumentos, el nombre
+    es <módulo>.<función> (o <módulo>.<Clase>.<método>).
+
+    Ejemplo
+    -------
+    >>> @instrumentar
+    ... def parsear_fechas(serie): ...
+    >>> @instrumentar('scoring.puntuar')
+    ... def puntuar(self, df): ...
+    """
+    def decorador(funcion):
+        etiqueta = nombre if isinstance(nombre, str) else f'{funcion.__module__}.{funcion.__qualname__}'
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activa:
+                return funcion(*args, **kwargs)
+            with _Tramo(etiqueta, _filas(args)):
+                return funcion(*args, **kwargs)
+        return envoltura
+
+    if callable(nombre):
+        return decorador(nombre)
+    return decorador
+
+
+# ------------------------------------------------------
+# Perfilador por muestreo
+# ------------------------------------------------------
+
+class PerfiladorMuestreo(threading.Thread):
+    """
+    Hilo que cada `intervalo` segundos toma la pila de los demás hilos.
+
+    Atributos
+    ---------
+    pilas : Counter
+        Muestras por pila plegada ('mod:func;mod:func;...', de la raíz a la hoja).
+    propias, inclusivas : Counter
+        Muestras por función como hoja de la pila / en cualquier punto de ella.
+    por_tramo : Counter
+        Muestras por tramo abierto más interno del hilo muestreado.
+    """
+
+    def __init__(self, intervalo: float = 0.005):
+        super().__init__(name='perfilador-muestreo', daemon=True)
+        self.intervalo = intervalo
+        self.muestras = 0
+        self.pilas, self.propias, self.inclusivas, self.por_tramo = Counter(), Counter(), Counter(), Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        propio = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            for id_hilo, marco in sys._current_frames().items():
+                if id_hilo == propio:
+                    continue
+                funciones = []
+                while marco is not None and len(funciones) < PROFUNDIDAD_PERFIL:
+                    codigo = marco.f_code
+                    # Las envolturas de este módulo no aportan nada a la pila
+                    if codigo.co_filename != __file__:
+                        funciones.append(f"{os.path.splitext(os.path.basename(codigo.co_filename))[0]}:{codigo.co_name}")
+                    marco = marco.f_back
+                if not funciones:
+                    continue
+                funciones.reverse()
+                self.muestras += 1
+                self.pilas[';'.join(funciones)] += 1
+                self.propias[funciones[-1]] += 1
+                self.inclusivas.update(set(funciones))
+                abiertos = _pilas.get(id_hilo)
+                if abiertos:
+                    self.por_tramo[abiertos[-1].nombre] += 1
+
+    def detener(self) -> None:
+        self._parar.set()
+        if self.is_alive():
+            self.join()
+
+
+# ------------------------------------------------------
+# Resultados y exportación
+# ------------------------------------------------------
+
+def resumen() -> List[Dict]:
+    """Un dict por tramo, ordenados por tiempo total descendente."""
+    with _cerrojo:
+        copia = {n: list(a) for n, a in _tramos.items()}
+    filas = []
+    for nombre, (llamadas, errores, segundos, propios, maximo, n_filas, rss) in copia.items():
+        filas.append({
+            'tramo': nombre,
+            'llamadas': int(llamadas),
+            'errores': int(errores),
+            'segundos': segundos,
+            'segundos_propios': propios,
+            'segundos_max': maximo,
+            'filas': int(n_filas),
+            'filas_seg': n_filas / segundos if n_filas and segundos > 0 else None,
+            'rss_incremento_max_mb': None if rss != rss else rss,
+            'muestras': _perfilador.por_tramo.get(nombre, 0) if _perfilador is not None else None,
+        })
+    return sorted(filas, key=lambda f: f['segundos'], reverse=True)
+
+
+def tabla():
+    """`resumen()` como DataFrame."""
+    import pandas as pd
+    return pd.DataFrame(resumen())
+
+
+def perfil(n: int = 20) -> Dict:
+    """Funciones con más muestras (propias e inclusivas) del perfilador."""
+    if _perfilador is None:
+        return {}
+    return {
+        'intervalo_s': _perfilador.intervalo,
+        'muestras': _perfilador.muestras,
+        'propias': _perfilador.propias.most_common(n),
+        'inclusivas': _perfilador.inclusivas.most_common(n),
+    }
+
+
+def exportar_perfil_plegado(ruta: str) -> str:
+    """Escribe las pilas muestreadas en formato plegado ('pila muestras' por línea)."""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for pila, muestras in (_perfilador.pilas.most_common() if _perfilador is not None else []):
+            f.write(f'{pila} {muestras}\n')
+    return ruta
+
+
+def exportar_json(ruta: str = None) -> Dict:
+    """Tramos y perfil acumulados como dict (y en `ruta`, si se indica)."""
+    datos = {
+        'inicio': _inicio,
+        'exportado': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'pid': os.getpid(),
+        'rss_mb': memoria_actual_mb(),
+        'pico_rss_mb': pico_memoria_mb(),
+        'tramos': resumen(),
+        'perfil': perfil(),
+    }
+    if ruta is not None:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=1)
+    return datos
+
+
+def _etiqueta(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# (campo de resumen(), sufijo de la métrica, tipo, ayuda)
+METRICAS_PROMETHEUS = [
+    ('llamadas', 'tramo_llamadas_total', 'counter', 'Llamadas a cada función o etapa instrumentada.'),
+    ('errores', 'tramo_errores_total', 'counter', 'Llamadas que terminaron con una excepción.'),
+    ('segundos', 'tramo_segundos_total', 'counter', 'Tiempo total en el tramo, incluidos los anidados.'),
+    ('segundos_propios', 'tramo_segundos_propios_total', 'counter', 'Tiempo en el tramo sin los tramos anidados.'),
+    ('segundos_max', 'tramo_segundos_max', 'gauge', 'Duración máxima de una llamada.'),
+    ('filas', 'tramo_filas_total', 'counter', 'Filas procesadas (primer argumento con shape).'),
+    ('rss_incremento_max_mb', 'tramo_rss_incremento_max_mb', 'gauge', 'Mayor incremento de RSS en una llamada (MB).'),
+    ('muestras', 'tramo_muestras_perfil_total', 'counter', 'Muestras del perfilador dentro del tramo.'),
+]
+
+
+def exportar_prometheus(ruta: str = None) -> str:
+    """Tramos acumulados en el formato de texto de Prometheus (y en `ruta`, si se indica)."""
+    filas = resumen()
+    lineas = []
+    for campo, sufijo, tipo, ayuda in METRICAS_PROMETHEUS:
+        valores = [(f['tramo'], f[campo]) for f in filas if f[campo] is not None]
+        if not valores:
+            continue
+        metrica = f'{PREFIJO_METRICAS}_{sufijo}'
+        lineas += [f'# HELP {metrica} {ayuda}', f'# TYPE {metrica} {tipo}']
+        lineas += [f'{metrica}{{tramo="{_etiqueta(nombre)}"}} {valor:.6g}' for nombre, valor in valores]
+    for sufijo, valor, ayuda in (('proceso_rss_mb', memoria_actual_mb(), 'RSS actual del proceso (MB).'),
+                                 ('proceso_pico_rss_mb', pico_memoria_mb(), 'Pico de RSS del proceso (MB).')):
+        metrica = f'{PREFIJO_METRICAS}_{sufijo}'
+        lineas += [f'# HELP {metrica} {ayuda}', f'# TYPE {metrica} gauge', f'{metrica} {valor:.6g}']
+    texto = '\n'.join(lineas) + '\n'
+    if ruta is not None:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    return texto
+
+
+def exportar(ruta: str) -> str:
+    """Exporta a Prometheus si `ruta` termina en .prom o .txt y a JSON en otro caso."""
+    if ruta.endswith(('.prom', '.txt')):
+        exportar_prometheus(ruta)
+    else:
+        exportar_json(ruta)
+    return ruta
+
+
+# Activación desde el entorno (p.ej. MOTOR_INSTRUMENTACION=perfil python ...)
+if os.environ.get('MOTOR_INSTRUMENTACION', '').lower() not in ('', '0', 'no', 'false'):
+    activar(perfilar=os.environ['MOTOR_INSTRUMENTACION'].lower() == 'perfil')
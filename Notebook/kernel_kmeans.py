@@ -0,0 +1,229 @@
+# ——————————————————————————————
+# Kernel NumPy de evaluación K-Means (sin scikit-learn en inferencia)
+# ——————————————————————————————
+# En inferencia, `preprocessing_pipeline.pkl` es solo un StandardScaler sobre las
+# 7 variables numéricas más un OneHotEncoder(handle_unknown='ignore') sobre MAKE y
+# USAGE, y `kmeans_model.pkl` asigna el centroide más cercano. Todo eso se reduce a
+# unos pocos arrays:
+#
+#   - media y escala del StandardScaler,
+#   - vocabulario de cada variable categórica (categoría -> columna del one-hot),
+#   - centroides del K-Means.
+#
+# Con x = [z, onehot(MAKE), onehot(USAGE)] y centroide c = [c_num, c_make, c_usage]:
+#
+#   ||x - c||² = ||x||² + ||c||² - 2·(z·c_num + c_make[a] + c_usage[u])
+#
+# donde a y u son las columnas activas del one-hot. ||x||² es igual para todos los
+# centroides, así que el clúster es argmin(||c||² - 2·(...)), que se calcula sin
+# construir la matriz one-hot: un producto (n×7)·(7×k) más dos consultas de tabla.
+# Es la misma expresión que usa K-Means.predict sobre la matriz dispersa.
+#
+# Los arrays salen de los artefactos ligeros de Modelos/artefactos (ver
+# artefactos.py, `python artefactos.py convertir`), que son el único formato
+# exportado del modelo: el kernel se construye con `KernelKMeans.desde_artefactos`.
+#
+# Ejemplo:
+#   python kernel_kmeans.py benchmark --filas 1000000
+
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class KernelKMeans:
+    """
+    Evaluador NumPy equivalente a `pipeline.transform` + `kmeans.predict`.
+    Se construye con `KernelKMeans.desde_artefactos`.
+
+    Parámetros
+    ----------
+    arrays : dict
+        num_cols, cat_cols, media, escala, centros y categorias_<col> (ver
+        `desde_artefactos`).
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.num_cols: List[str] = [str(c) for c in arrays['num_cols']]
+        self.cat_cols: List[str] = [str(c) for c in arrays['cat_cols']]
+        self.media = np.asarray(arrays['media'], dtype=np.float64)
+        self.escala = np.asarray(arrays['escala'], dtype=np.float64)
+        centros = np.asarray(arrays['centros'], dtype=np.float64)
+        self.n_clusters = centros.shape[0]
+
+        # Bloque numérico de los centroides, traspuesto para el producto (n×p)·(p×k)
+        p = len(self.num_cols)
+        self.centros_num = np.ascontiguousarray(centros[:, :p].T)
+        self.normas_centros = (centros ** 2).sum(axis=1)
+
+        # Una tabla (n_categorias + 1) × k por variable categórica; la última fila
+        # (ceros) corresponde a categorías desconocidas, como handle_unknown='ignore'
+        self.categorias: Dict[str, np.ndarray] = {}
+        self.indices: Dict[str, Dict[str, int]] = {}
+        self.tablas: Dict[str, np.ndarray] = {}
+        inicio = p
+        for col in self.cat_cols:
+            categorias = np.asarray(arrays[f'categorias_{col}'])
+            fin = inicio + len(categorias)
+            tabla = np.zeros((len(categorias) + 1, self.n_clusters))
+            tabla[:-1] = centros[:, inicio:fin].T
+            self.categorias[col] = categorias
+            self.indices[col] = {str(c): i for i, c in enumerate(categorias)}
+            self.tablas[col] = tabla
+            inicio = fin
+        if inicio != centros.shape[1]:
+            raise ValueError(
+                f"Los centroides tienen {centros.shape[1]} columnas y el kernel describe {inicio}"
+            )
+
+    @classmethod
+    def desde_artefactos(cls, art) -> 'KernelKMeans':
+        """Construye el kernel a partir de `artefactos.Artefactos`."""
+        arrays = {
+            'num_cols': art.num_features,
+            'cat_cols': art.cat_features,
+            'media': art['scaler_media'],
+            'escala': art['scaler_escala'],
+            'centros': art['kmeans_centros'],
+        }
+        for col, categorias in art.categorias.items():
+            arrays[f'categorias_{col}'] = np.asarray(categorias, dtype=str)
+        return cls(arrays)
+
+    def codigos(self, valores, col: str) -> np.ndarray:
+        """
+        Índice de columna del one-hot para cada valor de la variable `col`;
+        las categorías desconocidas (o nulas) van a la fila de ceros.
+        """
+        # get_indexer en lugar de pd.Categorical(..., categories=), que avisa (y
+        # dejará de admitir) valores fuera de las categorías, justo el caso de las
+        # desconocidas. Solo se buscan los valores distintos; el código -1 de
+        # factorize (nulos) y los no encontrados van a la última fila
+        desconocida = len(self.categorias[col])
+        codigos, unicas = pd.factorize(pd.Series(valores, copy=False))
+        posiciones = pd.Index(self.categorias[col]).get_indexer(pd.Index(unicas, dtype=object))
+        posiciones = np.append(np.where(posiciones < 0, desconocida, posiciones), desconocida).astype(np.intp)
+        return posiciones[codigos]
+
+    def escalar(self, df: pd.DataFrame) -> np.ndarray:
+        """Bloque numérico estandarizado (equivalente al StandardScaler)."""
+        z = (df[self.num_cols].to_numpy(dtype=np.float64) - self.media) / self.escala
+        if np.isnan(z).any():
+            raise ValueError("La entrada contiene valores NaN en las variables numéricas")
+        return z
+
+    def puntuaciones(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Matriz (n × k) con ||c||² - 2·x·c, que ordena los centroides igual que la
+        distancia euclídea al cuadrado.
+        """
+        producto = self.escalar(df) @ self.centros_num
+        for col in self.cat_cols:
+            producto += self.tablas[col][self.codigos(df[col], col)]
+        return self.normas_centros - 2.0 * producto
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        """Clúster más cercano para cada fila de `df`."""
+        return self.puntuaciones(df).argmin(axis=1)
+
+    def predict_registros(self, registros: List[Dict]) -> np.ndarray:
+        """
+        Igual que `predict` pero sobre una lista de dicts (p.ej. cuerpos JSON), sin
+        construir un DataFrame: para un solicitante o un micro-lote pequeño el coste
+        de pandas domina sobre el propio cálculo.
+        """
+        num = np.array([[r[c] for c in self.num_cols] for r in registros], dtype=np.float64)
+        z = (num - self.media) / self.escala
+        if np.isnan(z).any():
+            raise ValueError("La entrada contiene valores NaN en las variables numéricas")
+        producto = z @ self.centros_num
+        for col in self.cat_cols:
+            indices = self.indices[col]
+            desconocida = len(indices)
+            codigos = [indices.get(r[col], desconocida) for r in registros]
+            producto += self.tablas[col][codigos]
+        return (self.normas_centros - 2.0 * producto).argmin(axis=1)
+
+
+# ------------------------------------------------------
+# Benchmark desde línea de comandos
+# ------------------------------------------------------
+
+def _cargar_modelos_sklearn():
+    import joblib
+    from scoring import modelo_kmeans_path, pipeline_path
+    return joblib.load(pipeline_path), joblib.load(modelo_kmeans_path)
+
+
+def generar_clientes_aleatorios(n_filas: int, kernel: KernelKMeans, semilla: int = 42) -> pd.DataFrame:
+    """
+    Genera `n_filas` solicitantes sintéticos alrededor de la media/escala del
+    scaler, con categorías del vocabulario más un 1% de categorías desconocidas.
+    """
+    rng = np.random.default_rng(semilla)
+    datos = {}
+    for col, mu, sigma in zip(kernel.num_cols, kernel.media, kernel.escala):
+        datos[col] = np.abs(rng.normal(mu, sigma, n_filas))
+    for col in kernel.cat_cols:
+        vocabulario = np.append(kernel.categorias[col], 'DESCONOCIDA')
+        pesos = np.full(len(vocabulario), 0.99 / (len(vocabulario) - 1))
+        pesos[-1] = 0.01
+        datos[col] = rng.choice(vocabulario, size=n_filas, p=pesos).astype(object)
+    return pd.DataFrame(datos)
+
+
+def benchmark(n_filas: int = 1_000_000, chunksize: int = 100_000) -> Dict[str, float]:
+    """
+    Compara el kernel NumPy con `pipeline.transform` + `kmeans.predict` sobre
+    `n_filas` solicitantes sintéticos. Lanza AssertionError si algún clúster difiere.
+    """
+    from artefactos import cargar_artefactos
+
+    pipeline, kmeans = _cargar_modelos_sklearn()
+    kernel = KernelKMeans.desde_artefactos(cargar_artefactos())
+    df = generar_clientes_aleatorios(n_filas, kernel)
+
+    inicio = time.perf_counter()
+    ref = np.concatenate([
+        kmeans.predict(pipeline.transform(df.iloc[i:i + chunksize]))
+        for i in range(0, n_filas, chunksize)
+    ])
+    t_sklearn = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    rapido = np.concatenate([
+        kernel.predict(df.iloc[i:i + chunksize])
+        for i in range(0, n_filas, chunksize)
+    ])
+    t_kernel = time.perf_counter() - inicio
+
+    diferencias = int((ref != rapido).sum())
+    assert diferencias == 0, f"{diferencias} filas con clúster distinto entre sklearn y el kernel"
+
+    resultado = {
+        'filas': n_filas,
+        'sklearn_s': t_sklearn,
+        'kernel_s': t_kernel,
+        'aceleracion': t_sklearn / t_kernel,
+    }
+    print(f"{n_filas} filas | sklearn: {t_sklearn:.2f} s ({n_filas / t_sklearn:,.0f} filas/s) | "
+          f"kernel NumPy: {t_kernel:.2f} s ({n_filas / t_kernel:,.0f} filas/s) | "
+          f"x{resultado['aceleracion']:.1f} | clústeres idénticos")
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Kernel NumPy de evaluación K-Means.')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    bench = sub.add_parser('benchmark', help='Compara el kernel con sklearn')
+    bench.add_argument('--filas', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    benchmark(args.filas)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+# ——————————————————————————————
+# Monitor de deriva (drift) respecto a la población de entrenamiento del K-Means
+# ——————————————————————————————
+# Al añadir nuevos trimestres de pólizas nada avisa de que los datos se alejan de
+# la distribución con la que se ajustaron el pipeline y el K-Means (p.ej. marcas
+# nuevas que el OneHotEncoder convierte en vectores de ceros, o un cambio en PREMIUM).
+#
+#   - Referencia (una vez, al entrenar): percentiles de cada variable numérica,
+#     frecuencias de cada categoría y ocupación de cada clúster, en un JSON pequeño
+#     (Modelos/artefactos/referencia_drift.json).
+#   - Monitor (en cada lote evaluado): solo acumula recuentos por celda con
+#     searchsorted/bincount, de modo que puede ir en línea con el scoring. A partir
+#     de los recuentos se calculan PSI y KS por variable, la tasa de categorías
+#     desconocidas y la ocupación de clústeres, del último lote o acumulados.
+#
+# Las categóricas se comparan ya normalizadas (MAKE con las marcas raras en 'OTRAS',
+# como en el entrenamiento). Para detectar marcas nuevas, la referencia puede guardar
+# además el vocabulario crudo (antes de normalizar, --crudo) y el monitor recibir los
+# valores crudos del lote: solo cuentan como desconocidos los que no están en él.
+#
+# KS se calcula sobre las celdas de percentiles (máxima diferencia de las funciones
+# de distribución en los bordes), una cota inferior del KS exacto con error < 1%.
+#
+# Ejemplos:
+#   python monitor_drift.py referencia --datos ../Data/motor_data_2011_2018_RISK.csv --crudo ../Data/motor_data14-2018.csv
+#   python 05-Evaluacion_Nuevo_Cliente.py --entrada trimestre.csv --monitor ../Modelos/artefactos/referencia_drift.json
+
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from artefactos import FORMATO_VERSION, artefactos_dir
+
+referencia_drift_path = os.path.join(artefactos_dir, 'referencia_drift.json')
+
+# Umbrales habituales de PSI: < 0.1 estable, 0.1-0.25 cambio moderado, > 0.25 cambio importante
+PSI_MODERADO = 0.1
+PSI_IMPORTANTE = 0.25
+
+# Proporción mínima por celda al agrupar percentiles para el PSI (evita celdas casi vacías)
+MIN_PROPORCION_PSI = 0.05
+EPSILON = 1e-4
+
+
+def _limpiar_crudo(serie: pd.Series) -> pd.Series:
+    """Valores crudos no nulos como texto en mayúsculas y sin espacios (para comparar vocabularios)."""
+    return serie.dropna().astype(str).str.upper().str.strip()
+
+
+def psi(esperado: np.ndarray, actual: np.ndarray) -> float:
+    """Population Stability Index entre dos distribuciones de proporciones."""
+    e = np.clip(esperado, EPSILON, None)
+    a = np.clip(actual, EPSILON, None)
+    return float(((a - e) * np.log(a / e)).sum())
+
+
+def _grupos_psi(proporciones: np.ndarray) -> np.ndarray:
+    """
+    Asigna cada celda de percentiles a un grupo con al menos MIN_PROPORCION_PSI de
+    la referencia (se agrupan celdas contiguas).
+    """
+    grupos = np.zeros(len(proporciones), dtype=np.intp)
+    grupo, acumulado = 0, 0.0
+    for i, p in enumerate(proporciones):
+        grupos[i] = grupo
+        acumulado += p
+        if acumulado >= MIN_PROPORCION_PSI and i < len(proporciones) - 1:
+            grupo, acumulado = grupo + 1, 0.0
+    # Si el último grupo queda por debajo del mínimo, se une al anterior
+    if acumulado < MIN_PROPORCION_PSI and grupo > 0:
+        grupos[grupos == grupo] = grupo - 1
+    return grupos
+
+
+class ReferenciaDrift:
+    """
+    Distribución de referencia (entrenamiento) de las variables del modelo.
+
+    Parámetros
+    ----------
+    datos : dict
+        Contenido de referencia_drift.json (ver `construir`).
+    """
+
+    def __init__(self, datos: Dict):
+        self.datos = datos
+        self.num_cols: List[str] = list(datos['numericas'])
+        self.cat_cols: List[str] = list(datos['categoricas'])
+        self.bordes = {c: np.asarray(v['bordes'], dtype=np.float64) for c, v in datos['numericas'].items()}
+        self.prop_num = {c: np.asarray(v['proporciones']) for c, v in datos['numericas'].items()}
+        self.vocabulario = {c: pd.Index(v['categorias']) for c, v in datos['categoricas'].items()}
+        self.prop_cat = {c: np.asarray(v['proporciones']) for c, v in datos['categoricas'].items()}
+        self.vocabulario_crudo = {c: pd.Index(v) for c, v in datos.get('vocabulario_crudo', {}).items()}
+        self.prop_clusters = np.asarray(datos['clusters']['proporciones'])
+        self.grupos = {c: _grupos_psi(p) for c, p in self.prop_num.items()}
+
+    @classmethod
+    def construir(
+        cls,
+        df: pd.DataFrame,
+        clusters: np.ndarray,
+        n_clusters: int,
+        num_cols: List[str],
+        cat_cols: List[str],
+        n_cuantiles: int = 100,
+        crudo: pd.DataFrame = None
+    ) -> 'ReferenciaDrift':
+        """
+        Calcula la referencia sobre los datos de entrenamiento.
+
+        Parámetros
+        ----------
+        df : pd.DataFrame
+            Datos con los que se entrenó el modelo.
+        clusters : np.ndarray
+            Clúster de cada fila de `df` (p.ej. kmeans.labels_).
+        n_clusters : int
+            Número de clústeres del modelo.
+        num_cols, cat_cols : list[str]
+            Variables numéricas y categóricas del modelo.
+        n_cuantiles : int, opcional
+            Celdas de percentiles por variable numérica (por defecto 100).
+        crudo : pd.DataFrame, opcional
+            Datos de entrenamiento antes de normalizar las categóricas (no hace falta
+            que estén alineados con `df`). Se guarda su vocabulario por variable
+            para contar como desconocidos solo los valores nunca vistos.
+        """
+        numericas = {}
+        cuantiles = df[num_cols].quantile(np.linspace(0, 1, n_cuantiles + 1)[1:-1])
+        for col in num_cols:
+            # Bordes interiores únicos: las variables discretas tienen menos celdas
+            bordes = np.unique(cuantiles[col].to_numpy(dtype=np.float64))
+            valores = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            valores = valores[~np.isnan(valores)]
+            conteos = np.bincount(np.searchsorted(bordes, valores, side='right'), minlength=len(bordes) + 1)
+            numericas[col] = {'bordes': bordes.tolist(), 'proporciones': (conteos / conteos.sum()).tolist()}
+
+        categoricas = {}
+        for col in cat_cols:
+            # Los nulos no son una categoría: se excluyen aquí y en MonitorDrift.actualizar
+            frecuencias = df[col].dropna().astype(str).value_counts(normalize=True)
+            categoricas[col] = {'categorias': frecuencias.index.tolist(), 'proporciones': frecuencias.tolist()}
+
+        vocabulario_crudo = {}
+        if crudo is not None:
+            vocabulario_crudo = {col: sorted(_limpiar_crudo(crudo[col]).unique().tolist())
+                                 for col in cat_cols if col in crudo.columns}
+
+        ocupacion = np.bincount(np.asarray(clusters), minlength=n_clusters)
+        return cls({
+            'formato_version': FORMATO_VERSION,
+            'creado': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'filas': int(len(df)),
+            'numericas': numericas,
+            'categoricas': categoricas,
+            'clusters': {'proporciones': (ocupacion / ocupacion.sum()).tolist()},
+            'vocabulario_crudo': vocabulario_crudo,
+        })
+
+    def guardar(self, ruta: str = referencia_drift_path) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.datos, f, ensure_ascii=False, indent=1)
+        return ruta
+
+    @classmethod
+    def cargar(cls, ruta: str = referencia_drift_path) -> 'ReferenciaDrift':
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        version = datos.get('formato_version')
+        if version is None or version > FORMATO_VERSION:
+            raise ValueError(
+                f"Versión de formato de la referencia de drift no soportada: {version} (máxima {FORMATO_VERSION})"
+            )
+        return cls(datos)
+
+
+class MonitorDrift:
+    """
+    Acumula, lote a lote, los recuentos por celda de las variables y de los
+    clústeres asignados, y calcula a partir de ellos la deriva frente a la referencia.
+
+    Parámetros
+    ----------
+    referencia : ReferenciaDrift
+        Distribución de entrenamiento.
+
+    Atributos
+    ---------
+    n_lotes : int
+        Lotes observados.
+    """
+
+    def __init__(self, referencia: ReferenciaDrift):
+        self.referencia = referencia
+        self.n_lotes = 0
+        self._acumulado = self._recuentos_vacios()
+        self._ultimo = self._recuentos_vacios()
+
+    def _recuentos_vacios(self) -> Dict[str, np.ndarray]:
+        ref = self.referencia
+        recuentos = {c: np.zeros(len(ref.bordes[c]) + 1, dtype=np.int64) for c in ref.num_cols}
+        # Una celda extra al final para las categorías desconocidas
+        recuentos.update({c: np.zeros(len(ref.vocabulario[c]) + 1, dtype=np.int64) for c in ref.cat_cols})
+        recuentos['__clusters__'] = np.zeros(len(ref.prop_clusters), dtype=np.int64)
+        # [desconocidos, total] de los valores crudos, para las variables con vocabulario crudo
+        recuentos.update({f'__crudo__{c}': np.zeros(2, dtype=np.int64) for c in ref.vocabulario_crudo})
+        return recuentos
+
+    def actualizar(self, df: pd.DataFrame, clusters: np.ndarray = None, crudo: pd.DataFrame = None) -> None:
+        """
+        Incorpora un lote evaluado. Los clústeres negativos (p.ej. los resueltos
+        por la compuerta 'Very High') no cuentan en la ocupación.
+
+        Parámetros
+        ----------
+        df : pd.DataFrame
+            Lote con las categóricas normalizadas como en el entrenamiento.
+        clusters : np.ndarray, opcional
+            Clúster asignado a cada fila.
+        crudo : pd.DataFrame, opcional
+            Categóricas del lote antes de normalizar; si la referencia tiene
+            vocabulario crudo, la tasa de desconocidas se calcula con ellas.
+        """
+        ref = self.referencia
+        lote = {}
+        for col in ref.num_cols:
+            valores = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            valores = valores[~np.isnan(valores)]
+            lote[col] = np.bincount(np.searchsorted(ref.bordes[col], valores, side='right'),
+                                    minlength=len(ref.bordes[col]) + 1)
+        for col in ref.cat_cols:
+            # Se agrega primero el lote (value_counts) y solo se buscan en el
+            # vocabulario los valores distintos, no cada fila. Los nulos se
+            # excluyen, como en la referencia
+            frecuencias = df[col].value_counts()
+            posiciones = ref.vocabulario[col].get_indexer(frecuencias.index.astype(str))
+            posiciones[posiciones < 0] = len(ref.vocabulario[col])
+            lote[col] = np.bincount(posiciones, frecuencias.to_numpy(), minlength=len(ref.vocabulario[col]) + 1).astype(np.int64)
+        ocupacion = np.zeros(len(ref.prop_clusters), dtype=np.int64)
+        if clusters is not None:
+            clusters = np.asarray(clusters)
+            ocupacion = np.bincount(clusters[clusters >= 0], minlength=len(ref.prop_clusters))
+        lote['__clusters__'] = ocupacion
+        for col, vocabulario in ref.vocabulario_crudo.items():
+            lote[f'__crudo__{col}'] = np.zeros(2, dtype=np.int64)
+            if crudo is not None and col in crudo.columns:
+                frecuencias = _limpiar_crudo(crudo[col]).value_counts()
+                nuevas = vocabulario.get_indexer(frecuencias.index) < 0
+                lote[f'__crudo__{col}'] = np.array([frecuencias.to_numpy()[nuevas].sum(), frecuencias.sum()])
+
+        for clave, recuento in lote.items():
+            self._acumulado[clave] += recuento
+        self._ultimo = lote
+        self.n_lotes += 1
+
+    def resumen(self, alcance: str = 'acumulado') -> pd.DataFrame:
+        """
+        Deriva por variable: PSI, KS (numéricas), tasa de categorías desconocidas
+        (categóricas) y nivel ('estable', 'moderado', 'importante').
+
+        Parámetros
+        ----------
+        alcance : str, opcional
+            'acumulado' (todos los lotes, por defecto) o 'ultimo_lote'.
+        """
+        ref = self.referencia
+        recuentos = self._acumulado if alcance == 'acumulado' else self._ultimo
+        filas = []
+        for col in ref.num_cols:
+            n = recuentos[col].sum()
+            if n == 0:
+                continue
+            actual = recuentos[col] / n
+            grupos = ref.grupos[col]
+            filas.append({
+                'variable': col, 'tipo': 'numerica', 'n': int(n),
+                'psi': psi(np.bincount(grupos, ref.prop_num[col]), np.bincount(grupos, actual)),
+                'ks': float(np.abs(np.cumsum(actual) - np.cumsum(ref.prop_num[col])).max()),
+                'tasa_desconocidas': np.nan,
+            })
+        for col in ref.cat_cols:
+            n = recuentos[col].sum()
+            if n == 0:
+                continue
+            actual = recuentos[col] / n
+            tasa = float(actual[-1])
+            clave = f'__crudo__{col}'
+            if clave in recuentos and recuentos[clave][1]:
+                # Con vocabulario crudo: valores nunca vistos en el entrenamiento,
+                # no todos los que la normalización lleva a 'OTRAS'
+                tasa = float(recuentos[clave][0] / recuentos[clave][1])
+            filas.append({
+                'variable': col, 'tipo': 'categorica', 'n': int(n),
+                'psi': psi(np.append(ref.prop_cat[col], 0.0), actual),
+                'ks': np.nan,
+                'tasa_desconocidas': tasa,
+            })
+        n = recuentos['__clusters__'].sum()
+        if n:
+            filas.append({
+                'variable': 'Cluster_KMeans', 'tipo': 'ocupacion', 'n': int(n),
+                'psi': psi(ref.prop_clusters, recuentos['__clusters__'] / n),
+                'ks': np.nan, 'tasa_desconocidas': np.nan,
+            })
+        tabla = pd.DataFrame(filas, columns=['variable', 'tipo', 'n', 'psi', 'ks', 'tasa_desconocidas'])
+        tabla['nivel'] = pd.cut(tabla['psi'], [-np.inf, PSI_MODERADO, PSI_IMPORTANTE, np.inf],
+                                labels=['estable', 'moderado', 'importante'])
+        return tabla
+
+    def ocupacion_clusters(self, alcance: str = 'acumulado') -> pd.DataFrame:
+        """Proporción de cada clúster en referencia y en los lotes observados."""
+        recuentos = (self._acumulado if alcance == 'acumulado' else self._ultimo)['__clusters__']
+        total = recuentos.sum()
+        return pd.DataFrame({
+            'referencia': self.referencia.prop_clusters,
+            'actual': recuentos / total if total else np.nan,
+            'n': recuentos,
+        }).rename_axis('Cluster_KMeans')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monitor de deriva frente a la población de entrenamiento.')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    ref = sub.add_parser('referencia', help='Calcula y guarda la referencia a partir de los datos de entrenamiento')
+    ref.add_argument('--datos', required=True, help="CSV de entrenamiento (se usan las filas 'Normal' si hay RISK_CATEGORY)")
+    ref.add_argument('--salida', default=referencia_drift_path)
+    ref.add_argument('--cuantiles', type=int, default=100)
+    ref.add_argument('--crudo', nargs='+', default=None,
+                     help='CSV de entrenamiento antes de normalizar MAKE (vocabulario crudo de las categóricas)')
+    args = parser.parse_args(argv)
+
+    from artefactos import cargar_artefactos
+    from kernel_kmeans import KernelKMeans
+
+    kernel = KernelKMeans.desde_artefactos(cargar_artefactos())
+    df = pd.read_csv(args.datos)
+    if 'RISK_CATEGORY' in df.columns:
+        df = df[df['RISK_CATEGORY'] == 'Normal']
+    crudo = None
+    if args.crudo:
+        crudo = pd.concat([pd.read_csv(ruta, usecols=lambda c: c in kernel.cat_cols) for ruta in args.crudo])
+    referencia = ReferenciaDrift.construir(df, kernel.predict(df), kernel.n_clusters,
+                                           kernel.num_cols, kernel.cat_cols, args.cuantiles, crudo)
+    print(f"Referencia de {len(df)} filas guardada en {referencia.guardar(args.salida)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,527 @@
+# ——————————————————————————————
+# Pipeline por etapas 01 → 02 → 03 (sin notebooks, con caché y etapas en paralelo)
+# ——————————————————————————————
+# El camino a producción consiste hoy en ejecutar a mano 01-EDA (une los CSV en
+# bruto), 02-Preproceso (escribe _pre.csv y _RISK.csv) y 03-Clustering_K-Means
+# (escribe los pickles), y cada notebook vuelve a leer CSV completos. Aquí cada
+# notebook es una función sobre las clases de data_utils:
+#
+#   union       01-EDA: lectura tipada de los CSV, concatenación, EFFECTIVE_YR
+#               de 2 a 4 dígitos y eliminación de duplicados exactos por huella
+#               de fila, con el informe de solapes (conciliacion.py).
+#   eda         Agregados del informe EDA (informe_eda.calcular_agregados).
+#   preproceso  02-Preproceso: CLAIM_PAID/HAS_CLAIM, ImputadorDistribucion,
+#               NormalizadorMarcas, MotorOutliers, SEX y EFFECTIVE_YR anómalos,
+#               ImputadorJerarquico y la compuerta z-score (RISK_CATEGORY).
+#   clustering  03-Clustering_K-Means: pipeline + KMeans + PCA sobre las filas
+#               'Normal'; guarda los tres pickles.
+#
+# Las etapas se pasan DataFrames tipados en memoria y, además, cada uno se guarda
+# en Parquet en la carpeta de trabajo: una etapa que no cambia no se ejecuta y
+# las siguientes leen su resultado de ahí. Una etapa se omite cuando su clave
+# (hash de los CSV de entrada, del código de los módulos que usa, de sus
+# parámetros y de las claves de las etapas previas) coincide con la de la última
+# ejecución registrada en etapas.json y sus ficheros siguen existiendo.
+#
+# Las etapas independientes (eda y preproceso, ambas tras union) se lanzan a la
+# vez en hilos. Por cada etapa se muestra el tiempo, la RSS al terminar y el pico
+# de RSS del proceso (compartido por las etapas que se ejecutan a la vez).
+#
+# Ejemplos:
+#   python pipeline_etapas.py --datos ../Data/motor_data11-14lats.csv ../Data/motor_data14-2018.csv
+#   python pipeline_etapas.py --datos ../Data/motor_data11-14lats.csv ../Data/motor_data14-2018.csv --forzar preproceso
+#   python pipeline_etapas.py --datos ../Data/motor_data11-14lats.csv ../Data/motor_data14-2018.csv --exportar-csv ../Data
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from instrumentacion import memoria_actual_mb, pico_memoria_mb
+
+# Ruta base relativa al propio módulo
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+trabajo_path = os.path.normpath(os.path.join(BASE_DIR, '..', 'Data', '.cache', 'pipeline'))
+
+# Registro de la última ejecución de cada etapa (clave y ficheros)
+MANIFIESTO = 'etapas.json'
+
+# Columnas imputadas por grupo en 02-Preproceso
+COLUMNAS_JERARQUICA = ['SEATS_NUM', 'PROD_YEAR', 'CARRYING_CAPACITY', 'CCM_TON']
+
+# Numéricas que no entran en la detección de outliers (indicador, clave y código)
+EXCLUIDAS_OUTLIERS = ['HAS_CLAIM', 'OBJECT_ID', 'INSR_TYPE']
+
+# CSV que escriben los notebooks (para --exportar-csv) y DataFrames de los que salen
+CSV_NOTEBOOKS = {
+    'motor_data_2011_2018_EDA.csv': ['union'],
+    'motor_data_2011_2018_pre.csv': ['pre'],
+    'motor_data_2011_2018_RISK.csv': ['risk'],
+    'motor_data_final_para_powerbi.csv': ['risk', 'clusters'],
+}
+
+
+# ------------------------------------------------------
+# Etapa union (01-EDA)
+# ------------------------------------------------------
+
+def anio_completo(serie: pd.Series) -> pd.Series:
+    """
+    EFFECTIVE_YR de dos dígitos a año completo como en 01-EDA
+    ('20' + zfill(2)), calculado sobre los valores distintos.
+    """
+    valores = pd.to_numeric(serie, errors='coerce')
+    unicos = pd.Series(valores.dropna().unique())
+    anios = pd.to_numeric('20' + unicos.astype('int64').astype(str).str.zfill(2), errors='coerce')
+    return valores.map(dict(zip(unicos, anios))).astype('Int32')
+
+
+def _etapa_union(ctx: 'ContextoPipeline') -> Dict[str, pd.DataFrame]:
+    from conciliacion import deduplicar
+    from data_utils import leer_csv_cacheado
+
+    partes = [leer_csv_cacheado(ruta) for ruta in ctx.datos]
+    fichero = np.repeat(np.arange(len(partes), dtype=np.int8), [len(p) for p in partes])
+    df = pd.concat(partes, ignore_index=True)
+    del partes
+    # Columnas categóricas con categorías distintas en cada CSV: concat las deja como texto
+    for col in ['MAKE', 'USAGE', 'TYPE_VEHICLE']:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    df['EFFECTIVE_YR'] = anio_completo(df['EFFECTIVE_YR'])
+    for col in ['PROD_YEAR', 'SEATS_NUM']:
+        df[col] = df[col].astype('Int64')
+    df, informe, solapes = deduplicar(df, fichero)
+    informe['ficheros'] = [os.path.abspath(ruta) for ruta in ctx.datos]
+    with open(os.path.join(ctx.trabajo, 'conciliacion.json'), 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=1)
+    print(f"[union] {informe['duplicados_exactos']} duplicados exactos "
+          f"({informe['duplicados_entre_ficheros']} entre ficheros), "
+          f"{informe['solapes']['grupos']} solapes OBJECT_ID + INSR_BEGIN")
+    return {'union': df, 'solapes': solapes}
+
+
+# ------------------------------------------------------
+# Etapa eda (agregados del informe)
+# ------------------------------------------------------
+
+def _etapa_eda(ctx: 'ContextoPipeline') -> Dict[str, pd.DataFrame]:
+    import joblib
+
+    from informe_eda import _columnas_por_tipo, calcular_agregados
+
+    df = ctx.frame('union').drop(columns='OBJECT_ID', errors='ignore')
+    num_cols, cat_cols, date_cols = _columnas_por_tipo(df)
+    agregados = calcular_agregados(df, num_cols, cat_cols, date_cols,
+                                   ctx.parametros['bins'], ctx.parametros['freq'])
+    joblib.dump(agregados, os.path.join(ctx.trabajo, 'eda_agregados.joblib'))
+    return {}
+
+
+# ------------------------------------------------------
+# Etapa preproceso (02-Preproceso)
+# ------------------------------------------------------
+
+def _reasignar_sexo(df: pd.DataFrame, rng: np.random.Generator) -> None:
+    """SEX == 2 pasa a 0/1 respetando la proporción de los valores válidos (in-place)."""
+    sexo = df['SEX']
+    dos = np.flatnonzero((sexo == 2).to_numpy(dtype=bool, na_value=False))
+    if not len(dos):
+        return
+    validos = sexo[sexo.isin([0, 1])]
+    n_fem = int(len(dos) * (validos == 0).mean())
+    nuevos = np.array([0] * n_fem + [1] * (len(dos) - n_fem))
+    rng.shuffle(nuevos)
+    df.iloc[dos, df.columns.get_loc('SEX')] = nuevos
+
+
+def _etapa_preproceso(ctx: 'ContextoPipeline') -> Dict[str, pd.DataFrame]:
+    from artefactos import CompuertaRiesgo
+    from data_utils import ImputadorJerarquico, MotorOutliers, NormalizadorMarcas, imputar_nulos_por_distribucion
+
+    df = ctx.frame('union').copy()
+    rng = np.random.default_rng(ctx.parametros['semilla'])
+
+    # CLAIM_PAID: nulo = sin siniestro; HAS_CLAIM indica si lo hubo
+    df['CLAIM_PAID'] = df['CLAIM_PAID'].fillna(0)
+    df['HAS_CLAIM'] = np.where(df['CLAIM_PAID'] > 0, 1, 0)
+    imputar_nulos_por_distribucion(df, [c for c in df.columns if c != 'CLAIM_PAID'])
+
+    # Indicadores de las categóricas que aún tengan nulos
+    for col in df.select_dtypes(include=['object', 'category', 'string']).columns:
+        if df[col].isna().any():
+            df[f"{col}_missing"] = df[col].isna().astype(int)
+
+    NormalizadorMarcas().fit_transform(df)
+
+    # Outliers IQR de las numéricas: solo se usan como registros a imputar
+    cols_num = df.select_dtypes(include='number').columns.drop(EXCLUIDAS_OUTLIERS, errors='ignore').tolist()
+    outliers = MotorOutliers(cols_num, metodo='iqr').fit(df).mascara(df)
+
+    _reasignar_sexo(df, rng)
+
+    # EFFECTIVE_YR fuera de rango: año de INSR_BEGIN
+    anomalos = ((df['EFFECTIVE_YR'] > 2025) | (df['EFFECTIVE_YR'] < 2005)).to_numpy(dtype=bool, na_value=False)
+    df.loc[anomalos, 'EFFECTIVE_YR'] = df.loc[anomalos, 'INSR_BEGIN'].dt.year
+
+    ImputadorJerarquico(COLUMNAS_JERARQUICA).fit_transform(df, outliers)
+
+    # Compuerta z-score: 'Very High' si alguna variable de riesgo supera el umbral
+    compuerta = CompuertaRiesgo(umbral=ctx.parametros['umbral_riesgo']).fit(df)
+    compuerta.guardar(os.path.join(ctx.modelos, 'compuerta_riesgo.json'))
+    risk = df.copy()
+    risk['RISK_CATEGORY'] = np.where(compuerta.muy_alto(df), 'Very High', 'Normal')
+    return {'pre': df, 'risk': risk}
+
+
+# ------------------------------------------------------
+# Etapa clustering (03-Clustering_K-Means)
+# ------------------------------------------------------
+
+def _etapa_clustering(ctx: 'ContextoPipeline') -> Dict[str, pd.DataFrame]:
+    import joblib
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import PCA
+
+    from seleccion_k import cat_features, construir_pipeline, num_features
+
+    risk = ctx.frame('risk')
+    normal = (risk['RISK_CATEGORY'] == 'Normal').to_numpy()
+    df_cluster = risk.loc[normal, num_features + cat_features]
+
+    pipeline = construir_pipeline()
+    X = pipeline.fit_transform(df_cluster)
+    kmeans = KMeans(n_clusters=ctx.parametros['k'], random_state=ctx.parametros['semilla'])
+    clusters = kmeans.fit_predict(X)
+    pca = PCA(n_components=2)
+    X_pca = pca.fit_transform(X.toarray() if hasattr(X, 'toarray') else X)
+
+    joblib.dump(kmeans, os.path.join(ctx.modelos, 'kmeans_model.pkl'))
+    joblib.dump(pipeline, os.path.join(ctx.modelos, 'preprocessing_pipeline.pkl'))
+    joblib.dump(pca, os.path.join(ctx.modelos, 'pca_model.pkl'))
+
+    # Resultado por fila del _RISK (NaN para los 'Very High'), como en el CSV de Power BI
+    columnas = {c: np.full(len(risk), np.nan, dtype=np.float32) for c in ['Cluster_KMeans', 'PCA1', 'PCA2']}
+    columnas['Cluster_KMeans'][normal] = clusters
+    columnas['PCA1'][normal] = X_pca[:, 0]
+    columnas['PCA2'][normal] = X_pca[:, 1]
+    asignaciones = pd.DataFrame(columnas)
+    return {'clusters': asignaciones}
+
+
+# ------------------------------------------------------
+# Definición de las etapas
+# ------------------------------------------------------
+# funcion:    recibe el contexto y devuelve los DataFrames que produce
+# previas:    etapas cuyo resultado necesita
+# modulos:    módulos cuyo código forma parte de la clave (además de este)
+# parametros: parámetros de la línea de comandos que forman parte de la clave
+# frames:     DataFrames que produce (se guardan como <nombre>.parquet)
+# ficheros:   otros ficheros que deja en la carpeta de trabajo o de modelos
+
+ETAPAS: Dict[str, Dict] = {
+    'union': {
+        'funcion': _etapa_union, 'previas': [], 'modulos': ['data_utils', 'conciliacion'],
+        'parametros': [], 'frames': ['union', 'solapes'], 'ficheros': ['conciliacion.json'],
+    },
+    'eda': {
+        'funcion': _etapa_eda, 'previas': ['union'], 'modulos': ['data_utils', 'informe_eda'],
+        'parametros': ['bins', 'freq'], 'frames': [], 'ficheros': ['eda_agregados.joblib'],
+    },
+    'preproceso': {
+        'funcion': _etapa_preproceso, 'previas': ['union'], 'modulos': ['data_utils', 'artefactos'],
+        'parametros': ['semilla', 'umbral_riesgo'], 'frames': ['pre', 'risk'],
+        'ficheros': ['modelos/compuerta_riesgo.json'],
+    },
+    'clustering': {
+        'funcion': _etapa_clustering, 'previas': ['preproceso'], 'modulos': ['seleccion_k'],
+        'parametros': ['k', 'semilla'], 'frames': ['clusters'],
+        'ficheros': ['modelos/kmeans_model.pkl', 'modelos/preprocessing_pipeline.pkl', 'modelos/pca_model.pkl'],
+    },
+}
+
+
+def con_previas(etapas: List[str]) -> List[str]:
+    """`etapas` más todas las etapas de las que dependen, en el orden de ETAPAS."""
+    necesarias, pendientes = set(), list(etapas)
+    while pendientes:
+        etapa = pendientes.pop()
+        if etapa not in ETAPAS:
+            raise ValueError(f"Etapa desconocida '{etapa}'. Opciones: {list(ETAPAS)}")
+        if etapa not in necesarias:
+            necesarias.add(etapa)
+            pendientes.extend(ETAPAS[etapa]['previas'])
+    return [e for e in ETAPAS if e in necesarias]
+
+
+# ------------------------------------------------------
+# Contexto compartido entre etapas
+# ------------------------------------------------------
+
+class ContextoPipeline:
+    """
+    DataFrames producidos hasta el momento (en memoria) y rutas de trabajo.
+    Los de etapas omitidas se leen de su Parquet la primera vez que se piden.
+
+    Parámetros
+    ----------
+    datos : list[str]
+        CSV en bruto de entrada.
+    trabajo : str
+        Carpeta de la caché columnar y del manifiesto.
+    parametros : dict
+        Parámetros de las etapas (bins, freq, semilla, umbral_riesgo, k).
+    """
+
+    def __init__(self, datos: List[str], trabajo: str, parametros: Dict):
+        self.datos = list(datos)
+        self.trabajo = trabajo
+        self.modelos = os.path.join(trabajo, 'modelos')
+        self.parametros = dict(parametros)
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._cerrojo = threading.Lock()
+
+    def ruta_frame(self, nombre: str) -> str:
+        return os.path.join(self.trabajo, f'{nombre}.parquet')
+
+    def frame(self, nombre: str) -> pd.DataFrame:
+        """DataFrame `nombre`, de memoria o de la caché columnar (no copiar: es compartido)."""
+        with self._cerrojo:
+            if nombre not in self._frames:
+                self._frames[nombre] = pd.read_parquet(self.ruta_frame(nombre))
+            return self._frames[nombre]
+
+    def guardar(self, frames: Dict[str, pd.DataFrame]) -> None:
+        """Guarda en memoria y en Parquet (escritura atómica) los DataFrames de una etapa."""
+        for nombre, df in frames.items():
+            temporal = self.ruta_frame(nombre) + '.tmp'
+            df.to_parquet(temporal, index=False)
+            os.replace(temporal, self.ruta_frame(nombre))
+            with self._cerrojo:
+                self._frames[nombre] = df
+
+
+# ------------------------------------------------------
+# Claves de las etapas y manifiesto
+# ------------------------------------------------------
+
+def _hash_modulo(modulo: str) -> str:
+    from data_utils import hash_fichero
+    return hash_fichero(os.path.join(BASE_DIR, f'{modulo}.py'))
+
+
+def clave_etapa(etapa: str, ctx: ContextoPipeline, claves_previas: Dict[str, str]) -> str:
+    """
+    Hash de todo lo que determina el resultado de `etapa`: código (este módulo y
+    los de `modulos`), parámetros, claves de las etapas previas y, para las
+    etapas sin previas, el contenido de los CSV de entrada.
+    """
+    from data_utils import hash_fichero
+
+    definicion = ETAPAS[etapa]
+    contenido = {
+        'etapa': etapa,
+        'codigo': {m: _hash_modulo(m) for m in ['pipeline_etapas'] + definicion['modulos']},
+        'parametros': {p: ctx.parametros[p] for p in definicion['parametros']},
+        'previas': {p: claves_previas[p] for p in definicion['previas']},
+    }
+    if not definicion['previas']:
+        contenido['datos'] = [hash_fichero(ruta) for ruta in ctx.datos]
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode()).hexdigest()
+
+
+def _ficheros_etapa(etapa: str, ctx: ContextoPipeline) -> List[str]:
+    definicion = ETAPAS[etapa]
+    return ([ctx.ruta_frame(f) for f in definicion['frames']]
+            + [os.path.join(ctx.trabajo, f) for f in definicion['ficheros']])
+
+
+def leer_manifiesto(trabajo: str) -> Dict:
+    ruta = os.path.join(trabajo, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_manifiesto(trabajo: str, manifiesto: Dict) -> None:
+    ruta = os.path.join(trabajo, MANIFIESTO)
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    os.replace(ruta + '.tmp', ruta)
+
+
+# ------------------------------------------------------
+# Ejecución
+# ------------------------------------------------------
+
+def _ejecutar_etapa(etapa: str, ctx: ContextoPipeline) -> Dict:
+    """Ejecuta una etapa, guarda sus DataFrames y devuelve su medida de tiempo y memoria."""
+    inicio = time.perf_counter()
+    frames = ETAPAS[etapa]['funcion'](ctx)
+    ctx.guardar(frames)
+    rss = memoria_actual_mb()
+    return {
+        'etapa': etapa,
+        'estado': 'ejecutada',
+        'segundos': time.perf_counter() - inicio,
+        'filas': max((len(df) for df in frames.values()), default=None),
+        'rss_mb': rss,
+        'pico_rss_mb': float(np.fmax(pico_memoria_mb(), rss)),
+    }
+
+
+def _mostrar(medida: Dict) -> None:
+    print(f"[{medida['etapa']}] {medida['estado']} en {medida['segundos']:.1f} s | "
+          f"RSS {medida['rss_mb']:.0f} MB | pico {medida['pico_rss_mb']:.0f} MB")
+
+
+def ejecutar_pipeline(
+    datos: List[str],
+    etapas: List[str] = None,
+    trabajo: str = trabajo_path,
+    forzar: List[str] = None,
+    procesos: int = 2,
+    bins: int = 30,
+    freq: str = 'Y',
+    semilla: int = 42,
+    umbral_riesgo: float = 3.0,
+    k: int = 5
+) -> pd.DataFrame:
+    """
+    Ejecuta las `etapas` (y las que necesitan) omitiendo las que no han cambiado.
+
+    Parámetros
+    ----------
+    datos : list[str]
+        CSV en bruto (p.ej. motor_data11-14lats.csv y motor_data14-2018.csv).
+    etapas : list[str], opcional
+        Etapas a obtener (por defecto todas).
+    trabajo : str, opcional
+        Carpeta de la caché columnar, los modelos y el manifiesto
+        (por defecto Data/.cache/pipeline).
+    forzar : list[str], opcional
+        Etapas que se ejecutan aunque su clave no haya cambiado.
+    procesos : int, opcional
+        Etapas que pueden ejecutarse a la vez (hilos; por defecto 2).
+    bins, freq : opcional
+        Parámetros de los agregados EDA.
+    semilla : int, opcional
+        Semilla del reparto de SEX == 2 y del K-Means.
+    umbral_riesgo : float, opcional
+        Desviaciones típicas de la compuerta 'Very High' (por defecto 3).
+    k : int, opcional
+        Número de clústeres (por defecto 5).
+
+    Devuelve
+    -------
+    pd.DataFrame
+        Una fila por etapa: estado ('ejecutada'/'omitida'), segundos, filas,
+        RSS al terminar y pico de RSS.
+    """
+    orden = con_previas(etapas or list(ETAPAS))
+    forzar = set(forzar or [])
+    ctx = ContextoPipeline(datos, trabajo, {'bins': bins, 'freq': freq, 'semilla': semilla,
+                                            'umbral_riesgo': umbral_riesgo, 'k': k})
+    os.makedirs(ctx.modelos, exist_ok=True)
+    manifiesto = leer_manifiesto(trabajo)
+
+    claves: Dict[str, str] = {}
+    medidas: Dict[str, Dict] = {}
+    pendientes = list(orden)
+    en_curso = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, procesos)) as pool:
+        while pendientes or en_curso:
+            # Lanzar (u omitir) todas las etapas cuyas previas ya han terminado
+            for etapa in [e for e in pendientes if all(p in medidas for p in ETAPAS[e]['previas'])]:
+                pendientes.remove(etapa)
+                claves[etapa] = clave_etapa(etapa, ctx, claves)
+                registro = manifiesto.get(etapa, {})
+                if (etapa not in forzar and registro.get('clave') == claves[etapa]
+                        and all(os.path.exists(r) for r in _ficheros_etapa(etapa, ctx))):
+                    medidas[etapa] = {'etapa': etapa, 'estado': 'omitida', 'segundos': 0.0,
+                                      'filas': registro.get('filas'), 'rss_mb': memoria_actual_mb(),
+                                      'pico_rss_mb': pico_memoria_mb()}
+                    _mostrar(medidas[etapa])
+                else:
+                    en_curso[pool.submit(_ejecutar_etapa, etapa, ctx)] = etapa
+            if not en_curso:
+                continue
+
+            hechas, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechas:
+                etapa = en_curso.pop(futuro)
+                medidas[etapa] = futuro.result()
+                _mostrar(medidas[etapa])
+                manifiesto[etapa] = {
+                    'clave': claves[etapa],
+                    'filas': medidas[etapa]['filas'],
+                    'segundos': round(medidas[etapa]['segundos'], 3),
+                    'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                }
+                _escribir_manifiesto(trabajo, manifiesto)
+
+    return pd.DataFrame([medidas[e] for e in orden],
+                        columns=['etapa', 'estado', 'segundos', 'filas', 'rss_mb', 'pico_rss_mb'])
+
+
+def exportar_csv(trabajo: str, dir_salida: str) -> List[str]:
+    """
+    Escribe en `dir_salida` los CSV con los nombres que usan los notebooks
+    (_EDA, _pre, _RISK y el de Power BI) a partir de la caché columnar. No se
+    reescriben los que ya son más recientes que sus Parquet de origen.
+    """
+    os.makedirs(dir_salida, exist_ok=True)
+    escritos = []
+    for fichero, frames in CSV_NOTEBOOKS.items():
+        origenes = [os.path.join(trabajo, f'{f}.parquet') for f in frames]
+        destino = os.path.join(dir_salida, fichero)
+        if not all(os.path.exists(o) for o in origenes):
+            continue
+        if os.path.exists(destino) and os.path.getmtime(destino) >= max(os.path.getmtime(o) for o in origenes):
+            continue
+        pd.concat([pd.read_parquet(o) for o in origenes], axis=1).to_csv(destino, index=False)
+        escritos.append(destino)
+    return escritos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pipeline 01 → 02 → 03 por etapas con caché.')
+    parser.add_argument('--datos', nargs='+', required=True, help='CSV en bruto de motor_data')
+    parser.add_argument('--etapas', nargs='*', default=None, choices=list(ETAPAS),
+                        help='Etapas a obtener (por defecto todas)')
+    parser.add_argument('--forzar', nargs='*', default=[], choices=list(ETAPAS),
+                        help='Etapas a ejecutar aunque no hayan cambiado')
+    parser.add_argument('--trabajo', default=trabajo_path,
+                        help='Carpeta de la caché y los modelos (por defecto Data/.cache/pipeline)')
+    parser.add_argument('--procesos', type=int, default=2, help='Etapas en paralelo (por defecto 2)')
+    parser.add_argument('--bins', type=int, default=30)
+    parser.add_argument('--freq', default='Y', help="Agrupación de las fechas ('Y', 'M', 'D')")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--umbral-riesgo', type=float, default=3.0)
+    parser.add_argument('--k', type=int, default=5, help='Número de clústeres (por defecto 5)')
+    parser.add_argument('--exportar-csv', default=None,
+                        help='Carpeta donde escribir los CSV de los notebooks (_EDA, _pre, _RISK, Power BI)')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    tabla = ejecutar_pipeline(args.datos, args.etapas, args.trabajo, args.forzar, args.procesos,
+                              args.bins, args.freq, args.semilla, args.umbral_riesgo, args.k)
+    print(tabla.round(2).to_string(index=False))
+    print(f"Total: {time.perf_counter() - inicio:.1f} s. Resultados en {args.trabajo}")
+    if args.exportar_csv:
+        for ruta in exportar_csv(args.trabajo, args.exportar_csv):
+            print(f"CSV escrito: {ruta}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+# ——————————————————————————————
+# Refresco incremental del K-Means (sin reentrenar desde cero)
+# ——————————————————————————————
+# Reentrenar en 03-Clustering_K-Means.ipynb obliga a recargar todo el _RISK.csv,
+# reajustar el pipeline y lanzar KMeans desde cero, aunque un nuevo año de pólizas
+# solo añade filas. Este módulo:
+#
+#   1. Parte de los centros de Modelos/kmeans_model.pkl y de cuántas filas de
+#      entrenamiento tiene cada clúster (kmeans.labels_, o el conteo del último
+#      refresco), de modo que el histórico pesa lo que pesaba.
+#   2. Lee solo los datos nuevos por bloques, los transforma con el pipeline
+#      guardado (el escalado no se reajusta) y actualiza los centros con pasadas
+#      mini-batch: cada centro se mueve hacia la media de sus filas con tasa
+#      1 / (filas acumuladas del clúster), como MiniBatchKMeans.
+#   3. Empareja los centros nuevos con los anteriores (algoritmo húngaro sobre las
+#      distancias) para que los IDs de clúster no cambien y el mapeo
+#      "clústeres 3 y 4 = Muy Alto" de 05-Evaluacion_Nuevo_Cliente.py siga valiendo.
+#   4. Informa del desplazamiento de cada centro y, con --historico, del tiempo y
+#      de la distancia frente a un reajuste completo.
+#
+# El modelo refrescado se guarda aparte (kmeans_model_refrescado.pkl) y, con
+# --exportar-artefactos, sus artefactos en Modelos/artefactos_refrescado: los
+# modelos por defecto (kmeans_model.pkl y Modelos/artefactos)
+# no se tocan, de modo que los motores 'sklearn' y 'numpy' siguen asignando los
+# mismos clústeres. Para evaluar con el refresco se usan las dos rutas nuevas
+# (`ScorerKMeans(ruta_kmeans=..., dir_artefactos=...)`).
+#
+# Ejemplos:
+#   python refresco_kmeans.py --nuevos ../Data/motor_data_2019_RISK.csv
+#   python refresco_kmeans.py --nuevos ../Data/motor_data_2019_RISK.csv --historico ../Data/motor_data_2011_2018_RISK.csv
+#   python refresco_kmeans.py --nuevos ../Data/motor_data_2019_RISK.csv --exportar-artefactos
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from artefactos import MODELOS_DIR, _cargar_pickles, guardar_artefactos
+
+kmeans_refrescado_path = os.path.join(MODELOS_DIR, 'kmeans_model_refrescado.pkl')
+artefactos_refrescado_dir = os.path.join(MODELOS_DIR, 'artefactos_refrescado')
+
+# Variables del clustering (las mismas que en 03-Clustering_K-Means.ipynb)
+features = ['SEX', 'INSURED_VALUE', 'PREMIUM', 'SEATS_NUM',
+            'CARRYING_CAPACITY', 'CCM_TON', 'CLAIM_PAID', 'MAKE', 'USAGE']
+
+
+def ruta_conteos(ruta_modelo: str) -> str:
+    """Fichero JSON con los conteos por clúster y el historial de refrescos de un modelo."""
+    return os.path.splitext(ruta_modelo)[0] + '_refresco.json'
+
+
+def conteos_iniciales(kmeans, ruta_modelo: str) -> np.ndarray:
+    """
+    Filas acumuladas por clúster: las del último refresco si existe su JSON, o las
+    del entrenamiento original (kmeans.labels_).
+    """
+    ruta = ruta_conteos(ruta_modelo)
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            return np.asarray(json.load(f)['conteos'], dtype=np.float64)
+    return np.bincount(kmeans.labels_, minlength=kmeans.n_clusters).astype(np.float64)
+
+
+def bloques_transformados(
+    ruta_csv: str,
+    pipeline,
+    chunksize: int = 200_000,
+    solo_normal: bool = True
+) -> Iterator[np.ndarray]:
+    """
+    Lee `ruta_csv` por bloques y devuelve cada bloque transformado con el pipeline
+    guardado, como matriz densa float64. Con `solo_normal`, si el CSV tiene
+    RISK_CATEGORY se usan solo las filas 'Normal' (como en el entrenamiento).
+    """
+    for bloque in pd.read_csv(ruta_csv, chunksize=chunksize):
+        if solo_normal and 'RISK_CATEGORY' in bloque.columns:
+            bloque = bloque[bloque['RISK_CATEGORY'] == 'Normal']
+        if bloque.empty:
+            continue
+        X = pipeline.transform(bloque[features])
+        yield np.asarray(X.toarray() if hasattr(X, 'toarray') else X, dtype=np.float64)
+
+
+def asignar(X: np.ndarray, centros: np.ndarray) -> np.ndarray:
+    """Índice del centro más cercano a cada fila de X."""
+    distancias = (centros ** 2).sum(axis=1) - 2.0 * X @ centros.T
+    return distancias.argmin(axis=1)
+
+
+def emparejar_centros(anteriores: np.ndarray, nuevos: np.ndarray) -> np.ndarray:
+    """
+    Permutación `p` tal que nuevos[p[j]] es el centro que corresponde al clúster j
+    anterior (asignación húngara de mínima distancia total).
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    coste = np.sqrt(((anteriores[:, None, :] - nuevos[None, :, :]) ** 2).sum(axis=2))
+    filas, columnas = linear_sum_assignment(coste)
+    return columnas[np.argsort(filas)]
+
+
+class RefrescoKMeans:
+    """
+    Actualización mini-batch de los centros de un K-Means ya entrenado.
+
+    Parámetros
+    ----------
+    centros : np.ndarray
+        Centros actuales (n_clusters, n_variables) en el espacio del pipeline.
+    conteos : np.ndarray
+        Filas acumuladas por clúster, que fijan el peso del histórico.
+    batch_size : int, opcional
+        Filas por mini-batch (por defecto 4096).
+    pasadas : int, opcional
+        Pasadas sobre los datos nuevos (por defecto 1). Como en MiniBatchKMeans,
+        cada pasada vuelve a sumar las filas a los conteos, lo que da más peso a
+        los datos nuevos.
+    semilla : int, opcional
+        Semilla del barajado de filas dentro de cada bloque.
+
+    Atributos
+    ---------
+    centros_ : np.ndarray
+        Centros actualizados, con los IDs de los centros de partida.
+    conteos_ : np.ndarray
+        Filas acumuladas por clúster tras el refresco.
+    filas_nuevas_ : int
+        Filas nuevas procesadas (por pasada).
+    """
+
+    def __init__(self, centros: np.ndarray, conteos: np.ndarray, batch_size: int = 4096,
+                 pasadas: int = 1, semilla: int = 42):
+        self.centros_iniciales = np.asarray(centros, dtype=np.float64)
+        self.conteos_iniciales = np.asarray(conteos, dtype=np.float64)
+        self.batch_size = batch_size
+        self.pasadas = pasadas
+        self.semilla = semilla
+
+    def _actualizar_batch(self, X: np.ndarray) -> None:
+        etiquetas = asignar(X, self.centros_)
+        m = np.bincount(etiquetas, minlength=len(self.centros_))
+        for j in np.flatnonzero(m):
+            self.conteos_[j] += m[j]
+            suma = X[etiquetas == j].sum(axis=0)
+            self.centros_[j] += (suma - m[j] * self.centros_[j]) / self.conteos_[j]
+
+    def fit(self, bloques) -> 'RefrescoKMeans':
+        """
+        Parámetros
+        ----------
+        bloques : callable
+            Función sin argumentos que devuelve un iterable de matrices (una
+            llamada por pasada), p.ej. `lambda: bloques_transformados(...)`.
+        """
+        rng = np.random.default_rng(self.semilla)
+        self.centros_ = self.centros_iniciales.copy()
+        self.conteos_ = self.conteos_iniciales.copy()
+        self.filas_nuevas_ = 0
+        for pasada in range(self.pasadas):
+            for X in bloques():
+                X = X[rng.permutation(len(X))]
+                for inicio in range(0, len(X), self.batch_size):
+                    self._actualizar_batch(X[inicio:inicio + self.batch_size])
+                if pasada == 0:
+                    self.filas_nuevas_ += len(X)
+
+        # Garantizar IDs estables aunque algún centro haya cruzado a otro
+        permutacion = emparejar_centros(self.centros_iniciales, self.centros_)
+        self.reordenado_ = bool((permutacion != np.arange(len(permutacion))).any())
+        self.centros_ = self.centros_[permutacion]
+        self.conteos_ = self.conteos_[permutacion]
+        return self
+
+    def desplazamientos(self) -> np.ndarray:
+        """Distancia euclídea entre cada centro inicial y su centro refrescado."""
+        return np.linalg.norm(self.centros_ - self.centros_iniciales, axis=1)
+
+
+def reajuste_completo(kmeans, rutas_csv, pipeline, chunksize: int = 200_000) -> Tuple[np.ndarray, float]:
+    """
+    Reajusta desde cero un KMeans con los mismos parámetros sobre todos los
+    `rutas_csv` (como el notebook) y devuelve sus centros emparejados con los de
+    `kmeans` y el tiempo total en segundos (lectura, transformación y ajuste, igual
+    que se mide el refresco).
+    """
+    from sklearn.base import clone
+
+    inicio = time.perf_counter()
+    X = np.vstack([X for ruta in rutas_csv for X in bloques_transformados(ruta, pipeline, chunksize)])
+    modelo = clone(kmeans).fit(X)
+    duracion = time.perf_counter() - inicio
+    centros = modelo.cluster_centers_
+    return centros[emparejar_centros(kmeans.cluster_centers_, centros)], duracion
+
+
+def guardar_refresco(kmeans, refresco: RefrescoKMeans, ruta_nuevos: str, ruta_salida: str,
+                     ruta_modelo: str) -> str:
+    """
+    Guarda una copia de `kmeans` con los centros refrescados y, a su lado, el JSON
+    con los conteos por clúster y el historial de refrescos (que continúa el del
+    modelo de partida, si lo tenía).
+    """
+    import copy
+
+    import joblib
+
+    modelo = copy.deepcopy(kmeans)
+    modelo.cluster_centers_ = refresco.centros_.astype(kmeans.cluster_centers_.dtype)
+    # Etiquetas, inercia e iteraciones son del ajuste original y no corresponden a
+    # los centros nuevos (los conteos por clúster van en el JSON del refresco)
+    for atributo in ('labels_', 'inertia_', 'n_iter_'):
+        if hasattr(modelo, atributo):
+            delattr(modelo, atributo)
+    joblib.dump(modelo, ruta_salida)
+
+    historial = []
+    if os.path.exists(ruta_conteos(ruta_modelo)):
+        with open(ruta_conteos(ruta_modelo), encoding='utf-8') as f:
+            historial = json.load(f)['historial']
+    historial.append({
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'datos': os.path.basename(ruta_nuevos),
+        'filas': int(refresco.filas_nuevas_),
+        'desplazamientos': refresco.desplazamientos().round(6).tolist(),
+        'reordenado': refresco.reordenado_,
+    })
+    with open(ruta_conteos(ruta_salida), 'w', encoding='utf-8') as f:
+        json.dump({'conteos': refresco.conteos_.tolist(), 'historial': historial}, f, indent=1)
+    return ruta_salida
+
+
+def refrescar(
+    ruta_nuevos: str,
+    dir_modelos: str = MODELOS_DIR,
+    ruta_modelo: str = None,
+    ruta_salida: str = kmeans_refrescado_path,
+    historico: str = None,
+    chunksize: int = 200_000,
+    batch_size: int = 4096,
+    pasadas: int = 1,
+    exportar_artefactos: str = None
+) -> Dict[str, object]:
+    """
+    Refresca el K-Means con los datos de `ruta_nuevos` y guarda el resultado.
+
+    Parámetros
+    ----------
+    ruta_nuevos : str
+        CSV con solo las pólizas nuevas (mismo formato que el _RISK.csv).
+    dir_modelos : str, opcional
+        Carpeta con preprocessing_pipeline.pkl, kmeans_model.pkl y pca_model.pkl.
+    ruta_modelo : str, opcional
+        K-Means de partida (por defecto <dir_modelos>/kmeans_model.pkl; puede ser
+        un modelo ya refrescado para encadenar refrescos).
+    ruta_salida : str, opcional
+        Pickle del modelo refrescado (por defecto Modelos/kmeans_model_refrescado.pkl).
+    historico : str, opcional
+        CSV histórico; si se indica, se reajusta desde cero sobre histórico + nuevos
+        para comparar tiempo y centros.
+    exportar_artefactos : str, opcional
+        Carpeta donde exportar también los artefactos del modelo refrescado (p.ej.
+        `artefactos_refrescado_dir`). No debe ser Modelos/artefactos: el motor
+        'numpy' quedaría con centros distintos de los de kmeans_model.pkl.
+
+    Devuelve
+    -------
+    dict
+        Tiempos, desplazamientos y, con `historico`, la comparación con el reajuste.
+    """
+    import joblib
+
+    pipeline, kmeans, pca = _cargar_pickles(dir_modelos)
+    if ruta_modelo is None:
+        ruta_modelo = os.path.join(dir_modelos, 'kmeans_model.pkl')
+    else:
+        kmeans = joblib.load(ruta_modelo)
+
+    inicio = time.perf_counter()
+    refresco = RefrescoKMeans(kmeans.cluster_centers_, conteos_iniciales(kmeans, ruta_modelo),
+                              batch_size=batch_size, pasadas=pasadas)
+    refresco.fit(lambda: bloques_transformados(ruta_nuevos, pipeline, chunksize))
+    informe = {
+        'filas_nuevas': refresco.filas_nuevas_,
+        'tiempo_incremental_s': time.perf_counter() - inicio,
+        'desplazamientos': refresco.desplazamientos(),
+        'reordenado': refresco.reordenado_,
+    }
+    guardar_refresco(kmeans, refresco, ruta_nuevos, ruta_salida, ruta_modelo)
+    if exportar_artefactos:
+        modelo = joblib.load(ruta_salida)
+        informe['artefactos'] = guardar_artefactos(pipeline, modelo, pca, exportar_artefactos)
+
+    if historico is not None:
+        centros, duracion = reajuste_completo(kmeans, [historico, ruta_nuevos], pipeline, chunksize)
+        informe['tiempo_reajuste_s'] = duracion
+        informe['distancia_a_reajuste'] = np.linalg.norm(refresco.centros_ - centros, axis=1)
+    return informe
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Refresco incremental del K-Means con datos nuevos.')
+    parser.add_argument('--nuevos', required=True, help='CSV con las pólizas nuevas')
+    parser.add_argument('--modelo', default=None,
+                        help='K-Means de partida (por defecto Modelos/kmeans_model.pkl)')
+    parser.add_argument('--salida', default=kmeans_refrescado_path,
+                        help='Pickle del modelo refrescado (por defecto Modelos/kmeans_model_refrescado.pkl)')
+    parser.add_argument('--historico', default=None,
+                        help='CSV histórico para comparar con un reajuste completo')
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--pasadas', type=int, default=1)
+    parser.add_argument('--exportar-artefactos', nargs='?', const=artefactos_refrescado_dir, default=None,
+                        help='Exportar los artefactos del modelo refrescado (por defecto en Modelos/artefactos_refrescado)')
+    args = parser.parse_args(argv)
+
+    informe = refrescar(args.nuevos, ruta_modelo=args.modelo, ruta_salida=args.salida,
+                        historico=args.historico, chunksize=args.chunksize,
+                        batch_size=args.batch_size, pasadas=args.pasadas,
+                        exportar_artefactos=args.exportar_artefactos)
+
+    print(f"Filas nuevas: {informe['filas_nuevas']} | refresco en {informe['tiempo_incremental_s']:.2f} s")
+    print(f"Modelo refrescado guardado en {args.salida}")
+    if 'artefactos' in informe:
+        print(f"Artefactos del modelo refrescado en {informe['artefactos']}")
+    if informe['reordenado']:
+        print('Aviso: los centros se han reordenado para conservar los IDs de clúster anteriores')
+    tabla = pd.DataFrame({'desplazamiento': informe['desplazamientos']}).rename_axis('Cluster_KMeans')
+    if 'tiempo_reajuste_s' in informe:
+        tabla['distancia_a_reajuste'] = informe['distancia_a_reajuste']
+        print(f"Reajuste completo en {informe['tiempo_reajuste_s']:.2f} s "
+              f"({informe['tiempo_reajuste_s'] / informe['tiempo_incremental_s']:.1f}x el refresco)")
+    print(tabla.round(4).to_string())
+
+
+if __name__ == '__main__':
+    main()
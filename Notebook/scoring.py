@@ -0,0 +1,273 @@
+# ——————————————————————————————
+# Evaluación (scoring) de clientes con el modelo K-Means
+# ——————————————————————————————
+# Este módulo concentra la lógica de evaluación que antes vivía solo en
+# 05-Evaluacion_Nuevo_Cliente.py, para que pueda reutilizarse desde el script
+# por lotes y desde el servicio HTTP (servicio_scoring.py) sin volver a cargar
+# los modelos en cada petición.
+
+import os
+from collections import Counter
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from artefactos import CLUSTERS_MUY_ALTO, CompuertaRiesgo, artefactos_dir, cargar_artefactos
+from data_utils import NormalizadorMarcas
+from instrumentacion import instrumentar, tramo
+from kernel_kmeans import KernelKMeans
+
+# Ruta base relativa al propio módulo
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Rutas por defecto de los modelos
+MODELOS_DIR = os.path.join(BASE_DIR, '..', 'Modelos')
+modelo_kmeans_path = os.path.join(MODELOS_DIR, 'kmeans_model.pkl')
+pipeline_path = os.path.join(MODELOS_DIR, 'preprocessing_pipeline.pkl')
+
+# Columnas que espera el modelo
+features = ['SEX', 'INSURED_VALUE', 'PREMIUM', 'SEATS_NUM',
+            'CARRYING_CAPACITY', 'CCM_TON', 'MAKE', 'USAGE', 'CLAIM_PAID']
+
+
+def tabla_nivel_riesgo(n_clusters: int, clusters_muy_alto=CLUSTERS_MUY_ALTO) -> np.ndarray:
+    """
+    Construye la tabla cluster -> nivel de riesgo, de modo que un bloque entero
+    se mapea con una sola consulta de array en lugar de evaluar fila a fila.
+
+    Parámetros
+    ----------
+    n_clusters : int
+        Número de clústeres del modelo K-Means.
+    clusters_muy_alto : list[int], opcional
+        Clústeres de riesgo 'Muy Alto' (por defecto los de los artefactos: 3 y 4).
+
+    Devuelve
+    -------
+    np.ndarray
+        Array de longitud `n_clusters` con 'Muy Alto' o 'Normal' en cada posición.
+    """
+    tabla = np.full(n_clusters, 'Normal', dtype=object)
+    tabla[list(clusters_muy_alto)] = 'Muy Alto'
+    return tabla
+
+
+def validar_columnas(columnas, avisar_extras: bool = True) -> None:
+    """
+    Verifica que la entrada trae todas las columnas que espera el modelo.
+    Lanza ValueError si falta alguna y, si `avisar_extras`, avisa de las
+    columnas adicionales.
+    """
+    faltantes = set(features) - set(columnas)
+    extras = set(columnas) - set(features)
+
+    if faltantes:
+        raise ValueError(f"Faltan las siguientes columnas en el nuevo cliente: {faltantes}")
+    if extras and avisar_extras:
+        print(f"Advertencia: El nuevo cliente tiene columnas adicionales que serán ignoradas: {extras}")
+
+
+MOTORES = ('numpy', 'sklearn')
+
+# Clúster asignado a los solicitantes que la compuerta z-score marca como 'Very High'
+CLUSTER_COMPUERTA = -1
+
+
+class ScorerKMeans:
+    """
+    Evaluador de clientes que carga los modelos una única vez y los mantiene en memoria.
+
+    Acepta un DataFrame (evaluación vectorizada de un bloque) o uno o varios
+    registros tipo dict (un solicitante o un micro-lote), siempre con una sola
+    evaluación por invocación.
+
+    Parámetros
+    ----------
+    motor : str, opcional
+        'numpy' (por defecto) usa el kernel de kernel_kmeans.py sobre los artefactos
+        ligeros de Modelos/artefactos, que da los mismos clústeres sin importar
+        scikit-learn; 'sklearn' usa `pipeline.transform` + `kmeans.predict` sobre
+        los pickles.
+    ruta_kmeans : str, opcional
+        Ruta del modelo K-Means serializado con joblib (motor 'sklearn').
+    ruta_pipeline : str, opcional
+        Ruta del pipeline de preprocesamiento serializado con joblib (motor 'sklearn').
+    dir_artefactos : str, opcional
+        Directorio de artefactos ligeros (motor 'numpy').
+    preparadores : list, opcional
+        Objetos ajustados con método `transform(df) -> df` (p.ej.
+        `data_utils.ImputadorJerarquico` o `data_utils.ImputadorDistribucion`) que se
+        aplican, en orden, a cada bloque antes de evaluarlo.
+    compuerta : artefactos.CompuertaRiesgo, opcional
+        Filtro z-score del preproceso. Si se indica, los solicitantes 'Very High'
+        no pasan por el K-Means: reciben Cluster_KMeans = -1 y Nivel_Riesgo
+        'Muy Alto', y la salida incluye la columna RISK_CATEGORY.
+    monitor : monitor_drift.MonitorDrift, opcional
+        Si se indica, cada bloque evaluado (ya preparado) y sus clústeres se
+        acumulan en el monitor de deriva.
+    normalizar_marcas : bool, opcional
+        Si True (por defecto), MAKE se normaliza como en el preproceso
+        (`data_utils.NormalizadorMarcas`, con el vocabulario de marcas del modelo):
+        las marcas raras o no vistas se evalúan como 'OTRAS' en lugar de como una
+        categoría desconocida.
+
+    Atributos
+    ---------
+    conteos : collections.Counter
+        Solicitantes por etapa: 'evaluados', 'compuerta_very_high',
+        'kmeans_normal' y 'kmeans_muy_alto'.
+    """
+
+    def __init__(
+        self,
+        motor: str = 'numpy',
+        ruta_kmeans: str = modelo_kmeans_path,
+        ruta_pipeline: str = pipeline_path,
+        dir_artefactos: str = artefactos_dir,
+        preparadores: List = None,
+        compuerta: CompuertaRiesgo = None,
+        monitor=None,
+        normalizar_marcas: bool = True
+    ):
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido '{motor}'. Opciones: {MOTORES}")
+        self.motor = motor
+        clusters_muy_alto = CLUSTERS_MUY_ALTO
+        if motor == 'numpy':
+            art = cargar_artefactos(dir_artefactos)
+            self.kernel = KernelKMeans.desde_artefactos(art)
+            n_clusters = self.kernel.n_clusters
+            clusters_muy_alto = art.clusters_muy_alto
+        else:
+            import joblib
+            self.kmeans = joblib.load(ruta_kmeans)
+            self.pipeline = joblib.load(ruta_pipeline)
+            n_clusters = self.kmeans.n_clusters
+        self.normalizador = None
+        if normalizar_marcas:
+            self.normalizador = NormalizadorMarcas.desde_categorias(self._categorias('MAKE'))
+        self.niveles = tabla_nivel_riesgo(n_clusters, clusters_muy_alto)
+        self.preparadores = list(preparadores or [])
+        self.compuerta = compuerta
+        self.monitor = monitor
+        self.conteos = Counter()
+
+    def _categorias(self, col: str) -> list:
+        """Vocabulario del OneHotEncoder del modelo para la variable `col`."""
+        if self.motor == 'numpy':
+            return list(self.kernel.categorias[col])
+        preprocesador = self.pipeline.named_steps['preprocessor']
+        encoder, cat_cols = [(t, cols) for nombre, t, cols in preprocesador.transformers_ if nombre == 'cat'][0]
+        return list(encoder.categories_[list(cat_cols).index(col)])
+
+    @instrumentar('scoring.preparar')
+    def preparar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica los preparadores ajustados y la normalización de MAKE (sobre una copia de `df`)."""
+        if not self.preparadores and self.normalizador is None:
+            return df
+        df = df.copy()
+        # Como en 02-Preproceso, MAKE se normaliza antes de imputar por grupos de MAKE
+        if self.normalizador is not None:
+            df = self.normalizador.transform(df)
+        for preparador in self.preparadores:
+            df = preparador.transform(df)
+        return df
+
+    def predecir_clusters(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Devuelve el clúster asignado a cada fila de `df` (columnas de `features`).
+        """
+        if self.motor == 'numpy':
+            with tramo('scoring.kernel.predict', len(df)):
+                return self.kernel.predict(df)
+        with tramo('scoring.pipeline.transform', len(df)):
+            X = self.pipeline.transform(df[features])
+        with tramo('scoring.kmeans.predict', len(df)):
+            return self.kmeans.predict(X)
+
+    @instrumentar('scoring.puntuar')
+    def puntuar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evalúa un bloque de clientes de forma vectorizada.
+
+        Parámetros
+        ----------
+        df : pd.DataFrame
+            Clientes a evaluar (con al menos las columnas de `features`).
+
+        Devuelve
+        -------
+        pd.DataFrame
+            Las columnas de `features` más 'Cluster_KMeans' y 'Nivel_Riesgo' por fila
+            (y 'RISK_CATEGORY' si hay compuerta).
+        """
+        resultado = self.preparar(df)[features].copy()
+        if self.compuerta is None:
+            clusters = self.predecir_clusters(resultado)
+            muy_alto = None
+        else:
+            # Los 'Very High' se resuelven con la compuerta y no llegan al K-Means
+            with tramo('scoring.compuerta', len(resultado)):
+                muy_alto = self.compuerta.muy_alto(resultado)
+            clusters = np.full(len(resultado), CLUSTER_COMPUERTA)
+            if not muy_alto.all():
+                clusters[~muy_alto] = self.predecir_clusters(resultado[~muy_alto])
+        resultado['Cluster_KMeans'] = clusters
+        resultado['Nivel_Riesgo'] = self._niveles(clusters, muy_alto)
+        if muy_alto is not None:
+            resultado['RISK_CATEGORY'] = np.where(muy_alto, 'Very High', 'Normal')
+        if self.monitor is not None:
+            with tramo('scoring.monitor', len(resultado)):
+                # El monitor compara MAKE normalizada (como la referencia) y usa la
+                # cruda solo para contar las marcas nunca vistas
+                crudo = df[[c for c in self.monitor.referencia.cat_cols if c in df.columns]]
+                self.monitor.actualizar(resultado, clusters, crudo)
+        return resultado
+
+    def _niveles(self, clusters: np.ndarray, muy_alto: np.ndarray = None) -> np.ndarray:
+        """Nivel de riesgo por fila y actualización de los conteos por etapa."""
+        if muy_alto is None:
+            niveles = self.niveles[clusters]
+            n_compuerta = 0
+        else:
+            niveles = np.where(muy_alto, 'Muy Alto', self.niveles[np.where(muy_alto, 0, clusters)])
+            n_compuerta = int(muy_alto.sum())
+        n_kmeans_muy_alto = int((niveles == 'Muy Alto').sum()) - n_compuerta
+        self.conteos['evaluados'] += len(clusters)
+        self.conteos['compuerta_very_high'] += n_compuerta
+        self.conteos['kmeans_muy_alto'] += n_kmeans_muy_alto
+        self.conteos['kmeans_normal'] += len(clusters) - n_compuerta - n_kmeans_muy_alto
+        return niveles
+
+    @instrumentar('scoring.puntuar_registros')
+    def puntuar_registros(self, registros: Union[Dict, List[Dict]]) -> List[Dict]:
+        """
+        Evalúa uno o varios solicitantes dados como dict (p.ej. cuerpo JSON).
+
+        Devuelve
+        -------
+        list[dict]
+            Un dict por solicitante con 'Cluster_KMeans' y 'Nivel_Riesgo' (y
+            'RISK_CATEGORY' si hay compuerta).
+        """
+        if isinstance(registros, dict):
+            registros = [registros]
+        if not registros:
+            return []
+        if self.motor == 'numpy' and not self.preparadores and self.compuerta is None and self.monitor is None:
+            for registro in registros:
+                validar_columnas(registro.keys(), avisar_extras=False)
+            if self.normalizador is not None:
+                registros = [{**r, 'MAKE': self.normalizador.normalizar_valor(r['MAKE'])} for r in registros]
+            with tramo('scoring.kernel.predict_registros', len(registros)):
+                clusters = self.kernel.predict_registros(registros)
+            return [
+                {'Cluster_KMeans': int(c), 'Nivel_Riesgo': n}
+                for c, n in zip(clusters, self._niveles(clusters))
+            ]
+        df = pd.DataFrame.from_records(registros)
+        validar_columnas(df.columns, avisar_extras=False)
+        resultado = self.puntuar(df)
+        columnas = ['Cluster_KMeans', 'Nivel_Riesgo'] + (['RISK_CATEGORY'] if self.compuerta is not None else [])
+        return resultado[columnas].to_dict('records')
@@ -0,0 +1,341 @@
+# ——————————————————————————————
+# Selección de K para K-Means (método del codo) en paralelo y reanudable
+# ——————————————————————————————
+# En 03-Clustering_K-Means.ipynb el codo se calcula ajustando KMeans(k) de forma
+# secuencial para k = 2..10, dos veces (todo el histórico y solo RISK_CATEGORY ==
+# 'Normal'), y rehaciendo `pipeline.fit_transform` cada vez. Aquí:
+#
+#   1. La matriz preprocesada se calcula una vez por fichero de datos y se guarda
+#      como .npy float32 en <carpeta del CSV>/.cache/ (se reutiliza mientras el CSV
+#      no cambie: el nombre lleva el hash del fichero).
+#   2. Cada K se ajusta en un proceso del pool; todos abren la misma matriz con
+#      np.load(mmap_mode='c'), así que no se serializa entre procesos. KMeans
+#      resta la media a X en el sitio, de modo que cada proceso en modo 'kmeans'
+#      acaba con una copia privada de las páginas de la matriz (una sola: se
+#      ajusta con copy_x=False sobre la proyección copy-on-write). `--memoria-mb`
+#      limita los procesos para que esas copias quepan en el presupuesto.
+#   3. Por cada K se anota inercia (sobre todas las filas), silueta (estimada en una
+#      muestra) y tiempo de ajuste en un CSV de resultados, en cuanto termina. Al
+#      relanzar, los K ya presentes para la misma matriz, modo, semilla y tamaños
+#      de muestra se saltan (con otros parámetros se vuelven a ajustar).
+#
+# Modos de ajuste: 'kmeans' (como el notebook), 'minibatch' (MiniBatchKMeans) y
+# 'submuestra' (KMeans sobre una muestra aleatoria de filas).
+#
+# Ejemplos:
+#   python seleccion_k.py --datos ../Data/motor_data_2011_2018_pre.csv --procesos 4
+#   python seleccion_k.py --datos ../Data/motor_data_2011_2018_RISK.csv --solo-normal --modo minibatch
+
+import argparse
+import inspect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Ruta base relativa al propio módulo
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+resultados_path = os.path.normpath(os.path.join(BASE_DIR, '..', 'Modelos', 'seleccion_k.csv'))
+
+# Variables del clustering (las mismas que en 03-Clustering_K-Means.ipynb)
+cat_features = ['MAKE', 'USAGE']
+num_features = ['SEX', 'INSURED_VALUE', 'PREMIUM', 'SEATS_NUM',
+                'CARRYING_CAPACITY', 'CCM_TON', 'CLAIM_PAID']
+
+MODOS = ('kmeans', 'minibatch', 'submuestra')
+
+# Columnas del fichero de resultados; (matriz, modo, k) identifica cada fila
+COLUMNAS_RESULTADOS = ['matriz', 'modo', 'k', 'inercia', 'silueta', 'segundos_ajuste',
+                       'n_filas', 'n_filas_ajuste', 'semilla', 'muestra_ajuste', 'muestra_silueta']
+
+# Parámetros de `ajustar_k` que, junto con la matriz y el modo, identifican una ejecución
+PARAMETROS_EJECUCION = ['semilla', 'muestra_ajuste', 'muestra_silueta']
+
+
+def construir_pipeline():
+    """Pipeline de preprocesamiento del notebook (StandardScaler + OneHotEncoder)."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', StandardScaler(), num_features),
+        ('cat', OneHotEncoder(handle_unknown='ignore'), cat_features)
+    ])
+    return Pipeline(steps=[('preprocessor', preprocessor)])
+
+
+def preparar_matriz(
+    ruta_csv: str,
+    solo_normal: bool = False,
+    dir_cache: str = None,
+    chunksize: int = 100_000
+) -> str:
+    """
+    Ajusta el pipeline sobre `ruta_csv` y guarda la matriz preprocesada como .npy
+    float32 (densa), escrita por bloques. Si ya existe para el mismo contenido del
+    CSV, no se recalcula.
+
+    Parámetros
+    ----------
+    ruta_csv : str
+        CSV preprocesado (p.ej. motor_data_2011_2018_pre.csv).
+    solo_normal : bool, opcional
+        Si True, solo las filas con RISK_CATEGORY == 'Normal'.
+    dir_cache : str, opcional
+        Carpeta de la matriz (por defecto <carpeta del CSV>/.cache).
+    chunksize : int, opcional
+        Filas por bloque al transformar y escribir.
+
+    Devuelve
+    -------
+    str
+        Ruta del fichero .npy.
+    """
+    from data_utils import hash_fichero
+
+    if dir_cache is None:
+        dir_cache = os.path.join(os.path.dirname(os.path.abspath(ruta_csv)), '.cache')
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0] + ('-normal' if solo_normal else '')
+    ruta_x = os.path.join(dir_cache, f"X_{nombre}-{hash_fichero(ruta_csv)[:16]}.npy")
+    if os.path.exists(ruta_x):
+        return ruta_x
+
+    columnas = num_features + cat_features + (['RISK_CATEGORY'] if solo_normal else [])
+    df = pd.read_csv(ruta_csv, usecols=columnas)
+    if solo_normal:
+        df = df[df['RISK_CATEGORY'] == 'Normal']
+
+    pipeline = construir_pipeline().fit(df)
+    n_columnas = pipeline.transform(df.iloc[:1]).shape[1]
+
+    os.makedirs(dir_cache, exist_ok=True)
+    temporal = ruta_x + '.tmp.npy'
+    X = np.lib.format.open_memmap(temporal, mode='w+', dtype=np.float32, shape=(len(df), n_columnas))
+    for inicio in range(0, len(df), chunksize):
+        bloque = pipeline.transform(df.iloc[inicio:inicio + chunksize])
+        X[inicio:inicio + chunksize] = bloque.toarray() if hasattr(bloque, 'toarray') else bloque
+    X.flush()
+    del X
+    os.replace(temporal, ruta_x)
+    return ruta_x
+
+
+def _inercia(modelo, X: np.ndarray, chunksize: int = 200_000) -> float:
+    """Inercia de `modelo` sobre todas las filas de X, calculada por bloques."""
+    return float(-sum(modelo.score(X[i:i + chunksize]) for i in range(0, len(X), chunksize)))
+
+
+def ajustar_k(
+    ruta_x: str,
+    k: int,
+    modo: str = 'kmeans',
+    muestra_ajuste: int = 100_000,
+    muestra_silueta: int = 10_000,
+    semilla: int = 42,
+    hilos: int = 1
+) -> Dict:
+    """
+    Ajusta un modelo con `k` clústeres sobre la matriz memory-mapped de `ruta_x`.
+    Pensada para ejecutarse en un proceso del pool: limita los hilos de BLAS/OpenMP
+    a `hilos` para no sobresuscribir la CPU. En modo 'kmeans' el proceso ocupa,
+    además de las páginas compartidas de la matriz, una copia privada de su tamaño
+    (KMeans la centra en el sitio; ver `memoria_por_proceso`).
+
+    Devuelve
+    -------
+    dict
+        Una fila del fichero de resultados.
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+    from threadpoolctl import threadpool_limits
+
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido '{modo}'. Opciones: {MODOS}")
+
+    # Copy-on-write: con copy_x=False KMeans centra X en páginas privadas del
+    # proceso sin tocar el fichero, en lugar de hacer otra copia entera
+    X = np.load(ruta_x, mmap_mode='c')
+    rng = np.random.default_rng(semilla)
+    with threadpool_limits(hilos):
+        if modo == 'submuestra' and muestra_ajuste < len(X):
+            X_ajuste = X[np.sort(rng.choice(len(X), muestra_ajuste, replace=False))]
+        else:
+            X_ajuste = X
+        # La muestra de la silueta se copia antes del ajuste, que centra X en el sitio
+        indices = np.sort(rng.choice(len(X), min(muestra_silueta, len(X)), replace=False))
+        X_muestra = np.array(X[indices])
+
+        if modo == 'minibatch':
+            modelo = MiniBatchKMeans(n_clusters=k, random_state=semilla, batch_size=4096)
+        else:
+            modelo = KMeans(n_clusters=k, random_state=semilla, copy_x=False)
+
+        inicio = time.perf_counter()
+        modelo.fit(X_ajuste)
+        segundos = time.perf_counter() - inicio
+
+        # La inercia se informa siempre sobre todas las filas para que los modos sean comparables
+        inercia = float(modelo.inertia_) if modo == 'kmeans' else _inercia(modelo, X)
+
+        etiquetas = modelo.predict(X_muestra)
+        silueta = silhouette_score(X_muestra, etiquetas) if len(np.unique(etiquetas)) > 1 else np.nan
+
+    return {
+        'matriz': os.path.basename(ruta_x),
+        'modo': modo,
+        'k': int(k),
+        'inercia': inercia,
+        'silueta': float(silueta),
+        'segundos_ajuste': segundos,
+        'n_filas': len(X),
+        'n_filas_ajuste': len(X_ajuste),
+        'semilla': semilla,
+        'muestra_ajuste': muestra_ajuste,
+        'muestra_silueta': muestra_silueta,
+    }
+
+
+def memoria_por_proceso(ruta_x: str, modo: str = 'kmeans', muestra_ajuste: int = 100_000) -> float:
+    """
+    MB privados que ocupa la matriz en cada proceso de `ajustar_k`: la matriz
+    entera en modo 'kmeans', la submuestra en 'submuestra' y nada en 'minibatch'
+    (sin contar las páginas compartidas del fichero ni la muestra de la silueta).
+    """
+    X = np.load(ruta_x, mmap_mode='r')
+    if modo == 'kmeans':
+        filas = len(X)
+    elif modo == 'submuestra':
+        filas = min(muestra_ajuste, len(X))
+    else:
+        filas = 0
+    return filas * X.shape[1] * X.dtype.itemsize / 2 ** 20
+
+
+def seleccionar_k(
+    ruta_x: str,
+    ks: Iterable[int] = range(2, 11),
+    modo: str = 'kmeans',
+    procesos: int = None,
+    ruta_resultados: str = resultados_path,
+    memoria_mb: float = None,
+    **kwargs_ajuste
+) -> pd.DataFrame:
+    """
+    Ajusta la rejilla de K en paralelo y añade cada resultado a `ruta_resultados`
+    según termina. Los K que ya figuran en ese fichero para la misma matriz, modo
+    y parámetros de `PARAMETROS_EJECUCION` no se vuelven a ajustar.
+
+    Parámetros
+    ----------
+    ruta_x : str
+        Matriz .npy de `preparar_matriz`.
+    ks : iterable de int, opcional
+        Valores de K (por defecto 2..10, como el notebook).
+    modo : str, opcional
+        'kmeans', 'minibatch' o 'submuestra'.
+    procesos : int, opcional
+        Procesos del pool (por defecto, uno por CPU).
+    ruta_resultados : str, opcional
+        CSV de resultados (por defecto Modelos/seleccion_k.csv).
+    memoria_mb : float, opcional
+        Presupuesto de memoria privada del pool: los procesos se limitan a
+        memoria_mb / `memoria_por_proceso` (al menos uno). Sin límite por defecto.
+    **kwargs_ajuste
+        Se pasan a `ajustar_k` (muestra_ajuste, muestra_silueta, semilla, hilos).
+
+    Devuelve
+    -------
+    pd.DataFrame
+        Resultados de la matriz, el modo y los parámetros, ordenados por K.
+    """
+    matriz = os.path.basename(ruta_x)
+    firma = inspect.signature(ajustar_k).parameters
+    parametros = {p: kwargs_ajuste.get(p, firma[p].default) for p in PARAMETROS_EJECUCION}
+
+    def misma_ejecucion(df: pd.DataFrame) -> pd.Series:
+        mascara = (df['matriz'] == matriz) & (df['modo'] == modo)
+        for p, valor in parametros.items():
+            mascara &= df[p] == valor
+        return mascara
+
+    if os.path.exists(ruta_resultados):
+        previos = pd.read_csv(ruta_resultados)
+    else:
+        previos = pd.DataFrame(columns=COLUMNAS_RESULTADOS)
+    hechos = set(previos.loc[misma_ejecucion(previos), 'k'].astype(int))
+    pendientes = [k for k in ks if k not in hechos]
+    if hechos & set(ks):
+        print(f"K ya evaluados (se saltan): {sorted(hechos & set(ks))}")
+
+    if pendientes and memoria_mb is not None:
+        por_proceso = memoria_por_proceso(ruta_x, modo, parametros['muestra_ajuste'])
+        maximo = max(1, int(memoria_mb // por_proceso)) if por_proceso else len(pendientes)
+        if maximo < (procesos or os.cpu_count()):
+            print(f"Procesos limitados a {maximo} ({por_proceso:.0f} MB por proceso, presupuesto {memoria_mb:.0f} MB)")
+            procesos = maximo
+
+    if pendientes:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_resultados)), exist_ok=True)
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {pool.submit(ajustar_k, ruta_x, k, modo, **kwargs_ajuste): k for k in pendientes}
+            for futuro in as_completed(futuros):
+                fila = futuro.result()
+                # Cada K se guarda en cuanto termina, para poder reanudar si se interrumpe
+                pd.DataFrame([fila], columns=COLUMNAS_RESULTADOS).to_csv(
+                    ruta_resultados, mode='a', header=not os.path.exists(ruta_resultados), index=False
+                )
+                print(f"k={fila['k']}: inercia={fila['inercia']:.1f} silueta={fila['silueta']:.3f} "
+                      f"({fila['segundos_ajuste']:.1f} s)")
+
+    resultados = pd.read_csv(ruta_resultados)
+    resultados = resultados[misma_ejecucion(resultados)]
+    return resultados.sort_values('k').reset_index(drop=True)
+
+
+def graficar_codo(resultados: pd.DataFrame, ax=None):
+    """Gráfico del codo (inercia) con la silueta en un segundo eje."""
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        _, ax = plt.subplots(figsize=(8, 5))
+    ax.plot(resultados['k'], resultados['inercia'], marker='o')
+    ax.set_xlabel('Número de Clústeres')
+    ax.set_ylabel('Inercia')
+    ax.set_title('Método del Codo para Selección de K')
+    ax2 = ax.twinx()
+    ax2.plot(resultados['k'], resultados['silueta'], marker='s', color='tab:red', linestyle='--')
+    ax2.set_ylabel('Silueta (muestra)')
+    return ax
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Selección de K para K-Means en paralelo y reanudable.')
+    parser.add_argument('--datos', required=True, help='CSV preprocesado')
+    parser.add_argument('--solo-normal', action='store_true',
+                        help="Usar solo las filas con RISK_CATEGORY == 'Normal'")
+    parser.add_argument('--k', type=int, nargs=2, default=[2, 10], metavar=('MIN', 'MAX'))
+    parser.add_argument('--modo', choices=MODOS, default='kmeans')
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--muestra-ajuste', type=int, default=100_000,
+                        help="Filas para el modo 'submuestra'")
+    parser.add_argument('--muestra-silueta', type=int, default=10_000)
+    parser.add_argument('--resultados', default=resultados_path)
+    parser.add_argument('--memoria-mb', type=float, default=None,
+                        help="Memoria privada máxima del pool en MB (en modo 'kmeans' cada proceso "
+                             "ocupa una copia de la matriz); limita --procesos")
+    args = parser.parse_args(argv)
+
+    ruta_x = preparar_matriz(args.datos, args.solo_normal)
+    resultados = seleccionar_k(ruta_x, range(args.k[0], args.k[1] + 1), args.modo, args.procesos,
+                               args.resultados, args.memoria_mb, muestra_ajuste=args.muestra_ajuste,
+                               muestra_silueta=args.muestra_silueta)
+    print(resultados.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
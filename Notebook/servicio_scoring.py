@@ -0,0 +1,342 @@
+# ——————————————————————————————
+# Servicio local HTTP/JSON de evaluación de clientes
+# ——————————————————————————————
+# Servicio asyncio (solo librería estándar + los modelos) que carga el pipeline
+# y el K-Means UNA vez al arrancar y los mantiene en memoria (por defecto con el
+# kernel NumPy de kernel_kmeans.py). Las peticiones concurrentes se agrupan
+# (coalescen) en un único micro-lote, que se evalúa con una sola llamada.
+# Como en 05-Evaluacion_Nuevo_Cliente.py, antes del K-Means se aplica la compuerta
+# z-score de Modelos/artefactos/compuerta_riesgo.json si existe (--sin-compuerta la
+# desactiva), para que un solicitante reciba el mismo nivel en los dos caminos.
+#
+# Endpoints:
+#   POST /puntuar   cuerpo: un solicitante (objeto JSON) o una lista de solicitantes
+#   GET  /metricas  contadores y latencias p50/p99 (ms), más los tramos medidos
+#                   (preparar, compuerta, predict...) si se arranca con --instrumentar
+#   GET  /metricas/prometheus  lo mismo en el formato de texto de Prometheus
+#   GET  /salud     comprobación de vida
+#
+# Ejemplo:
+#   python servicio_scoring.py --puerto 8080
+#   curl -X POST localhost:8080/puntuar -d '{"SEX": 1, "INSURED_VALUE": 250000, ...}'
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+import instrumentacion
+from artefactos import CompuertaRiesgo, compuerta_path
+from scoring import MOTORES, ScorerKMeans, validar_columnas
+from seleccion_k import num_features
+
+ESTADOS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def validar_registro(registro: Dict) -> None:
+    """
+    Comprueba un solicitante antes de encolarlo: que trae todas las columnas y que
+    las numéricas son números finitos. Lanza ValueError si no.
+    """
+    if not isinstance(registro, dict):
+        raise ValueError('Cada solicitante debe ser un objeto JSON')
+    validar_columnas(registro.keys(), avisar_extras=False)
+    for col in num_features:
+        valor = registro[col]
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"{col} debe ser numérico (recibido: {valor!r})") from None
+        if not math.isfinite(numero):
+            raise ValueError(f"{col} debe ser un número finito (recibido: {valor!r})")
+
+
+class EstadisticasLatencia:
+    """
+    Contadores de peticiones y latencias recientes (ventana deslizante).
+
+    Parámetros
+    ----------
+    ventana : int, opcional
+        Número de latencias recientes sobre las que se calculan los percentiles.
+    """
+
+    def __init__(self, ventana: int = 10_000):
+        self.latencias_ms = deque(maxlen=ventana)
+        self.peticiones = 0
+        self.solicitantes = 0
+        self.lotes = 0
+        self.errores = 0
+
+    def registrar(self, latencia_s: float, n_solicitantes: int) -> None:
+        self.latencias_ms.append(latencia_s * 1000)
+        self.peticiones += 1
+        self.solicitantes += n_solicitantes
+
+    def resumen(self) -> Dict:
+        if self.latencias_ms:
+            p50, p99 = np.percentile(np.fromiter(self.latencias_ms, dtype=float), [50, 99])
+        else:
+            p50 = p99 = float('nan')
+        return {
+            'peticiones': self.peticiones,
+            'solicitantes': self.solicitantes,
+            'lotes_evaluados': self.lotes,
+            'solicitantes_por_lote': self.solicitantes / self.lotes if self.lotes else 0.0,
+            'errores': self.errores,
+            'latencia_p50_ms': round(float(p50), 4),
+            'latencia_p99_ms': round(float(p99), 4),
+        }
+
+    def prometheus(self) -> str:
+        """`resumen()` como gauges de Prometheus (motor_servicio_<clave>)."""
+        lineas = []
+        for clave, valor in self.resumen().items():
+            metrica = f'{instrumentacion.PREFIJO_METRICAS}_servicio_{clave}'
+            lineas += [f'# TYPE {metrica} gauge', f'{metrica} {valor:.6g}']
+        return '\n'.join(lineas) + '\n'
+
+
+class CoalescedorLotes:
+    """
+    Agrupa las peticiones concurrentes en micro-lotes.
+
+    Cada petición deja sus registros en una cola y espera su resultado. Una tarea
+    de fondo toma la primera petición pendiente, recoge las que lleguen durante
+    `espera_max_ms` (hasta `lote_max` solicitantes) y las evalúa todas con una
+    única llamada al scorer.
+
+    Parámetros
+    ----------
+    scorer : ScorerKMeans
+        Evaluador con los modelos ya cargados.
+    lote_max : int, opcional
+        Máximo de solicitantes por micro-lote.
+    espera_max_ms : float, opcional
+        Tiempo máximo que se espera a nuevas peticiones antes de evaluar el lote.
+    """
+
+    def __init__(self, scorer: ScorerKMeans, estadisticas: EstadisticasLatencia,
+                 lote_max: int = 1024, espera_max_ms: float = 1.0):
+        self.scorer = scorer
+        self.estadisticas = estadisticas
+        self.lote_max = lote_max
+        self.espera_max_s = espera_max_ms / 1000
+        self.cola: asyncio.Queue = asyncio.Queue()
+        self._tarea = None
+
+    def iniciar(self) -> None:
+        self._tarea = asyncio.get_running_loop().create_task(self._bucle())
+
+    async def puntuar(self, registros: List[Dict]) -> List[Dict]:
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((registros, futuro))
+        return await futuro
+
+    async def _bucle(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pendientes = [await self.cola.get()]
+            n = len(pendientes[0][0])
+            limite = loop.time() + self.espera_max_s
+            while n < self.lote_max:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.cola.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                pendientes.append(item)
+                n += len(item[0])
+
+            lote = [r for registros, _ in pendientes for r in registros]
+            try:
+                resultados = self.scorer.puntuar_registros(lote)
+            except Exception:
+                # Si el micro-lote falla, se evalúa cada petición por separado para
+                # que el error solo llegue a la que lo provoca
+                for registros, futuro in pendientes:
+                    try:
+                        resultado = self.scorer.puntuar_registros(registros)
+                    except Exception as exc:
+                        if not futuro.done():
+                            futuro.set_exception(exc)
+                    else:
+                        self.estadisticas.lotes += 1
+                        if not futuro.done():
+                            futuro.set_result(resultado)
+                continue
+            self.estadisticas.lotes += 1
+
+            inicio = 0
+            for registros, futuro in pendientes:
+                fin = inicio + len(registros)
+                if not futuro.done():
+                    futuro.set_result(resultados[inicio:fin])
+                inicio = fin
+
+
+class ServicioScoring:
+    """
+    Servidor HTTP/1.1 mínimo (con keep-alive) sobre asyncio.
+    """
+
+    def __init__(self, scorer: ScorerKMeans, lote_max: int = 1024, espera_max_ms: float = 1.0):
+        self.estadisticas = EstadisticasLatencia()
+        self.coalescedor = CoalescedorLotes(scorer, self.estadisticas, lote_max, espera_max_ms)
+
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, _ = linea.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._responder(writer, 400, {'error': 'Petición mal formada'})
+                    break
+
+                cabeceras = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    clave, _, valor = h.decode('latin-1').partition(':')
+                    cabeceras[clave.strip().lower()] = valor.strip()
+
+                try:
+                    longitud = int(cabeceras.get('content-length', 0) or 0)
+                    if longitud < 0:
+                        raise ValueError
+                except ValueError:
+                    # Sin una longitud válida no se sabe dónde acaba el cuerpo: se responde y se cierra
+                    await self._responder(writer, 400, {'error': 'Content-Length no válido'})
+                    break
+                cuerpo = await reader.readexactly(longitud) if longitud else b''
+
+                estado, respuesta = await self._despachar(metodo, ruta, cuerpo)
+                await self._responder(writer, estado, respuesta)
+                if cabeceras.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _despachar(self, metodo: str, ruta: str, cuerpo: bytes):
+        ruta = ruta.split('?', 1)[0]
+        if ruta == '/salud':
+            return 200, {'estado': 'ok'}
+        if ruta == '/metricas':
+            metricas = self.estadisticas.resumen()
+            if instrumentacion.activa():
+                metricas['tramos'] = instrumentacion.resumen()
+            return 200, metricas
+        if ruta == '/metricas/prometheus':
+            texto = self.estadisticas.prometheus()
+            if instrumentacion.activa():
+                texto += instrumentacion.exportar_prometheus()
+            return 200, texto
+        if ruta != '/puntuar':
+            return 404, {'error': f'Ruta desconocida: {ruta}'}
+        if metodo != 'POST':
+            return 405, {'error': 'Usa POST en /puntuar'}
+
+        inicio = time.perf_counter()
+        try:
+            datos = json.loads(cuerpo or b'null')
+            if not isinstance(datos, (dict, list)):
+                raise ValueError('Se espera un objeto JSON o una lista de objetos')
+            unico = isinstance(datos, dict)
+            registros = [datos] if unico else datos
+            # Se valida cada petición antes de encolarla para que un registro
+            # incorrecto no haga fallar al resto del micro-lote
+            for registro in registros:
+                validar_registro(registro)
+            resultados = await self.coalescedor.puntuar(registros)
+        except ValueError as exc:
+            self.estadisticas.errores += 1
+            return 400, {'error': str(exc)}
+        except Exception as exc:
+            self.estadisticas.errores += 1
+            return 500, {'error': str(exc)}
+        self.estadisticas.registrar(time.perf_counter() - inicio, len(registros))
+        return 200, resultados[0] if unico else resultados
+
+    @staticmethod
+    async def _responder(writer: asyncio.StreamWriter, estado: int, datos) -> None:
+        # Las cadenas (métricas de Prometheus) se envían como texto plano
+        if isinstance(datos, str):
+            cuerpo, tipo = datos.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            cuerpo, tipo = json.dumps(datos, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+        cabecera = (
+            f'HTTP/1.1 {estado} {ESTADOS_HTTP.get(estado, "")}\r\n'
+            f'Content-Type: {tipo}\r\n'
+            f'Content-Length: {len(cuerpo)}\r\n'
+            '\r\n'
+        ).encode('latin-1')
+        writer.write(cabecera + cuerpo)
+        await writer.drain()
+
+    async def servir(self, host: str = '127.0.0.1', puerto: int = 8080) -> None:
+        self.coalescedor.iniciar()
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        print(f'Servicio de scoring escuchando en http://{host}:{puerto}')
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servicio HTTP/JSON local de evaluación de clientes.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--lote-max', type=int, default=1024,
+                        help='Máximo de solicitantes por micro-lote')
+    parser.add_argument('--espera-max-ms', type=float, default=1.0,
+                        help='Espera máxima para agrupar peticiones concurrentes (ms)')
+    parser.add_argument('--motor', choices=MOTORES, default='numpy',
+                        help='Kernel NumPy exportado (por defecto) o pipeline sklearn')
+    parser.add_argument('--compuerta', default=compuerta_path,
+                        help="Compuerta z-score (JSON) para resolver los 'Very High' antes del K-Means "
+                             "(por defecto Modelos/artefactos/compuerta_riesgo.json, como en 05-Evaluacion_Nuevo_Cliente.py)")
+    parser.add_argument('--sin-compuerta', action='store_true',
+                        help="No aplicar la compuerta 'Very High' antes del K-Means")
+    parser.add_argument('--sin-normalizar-marcas', action='store_true',
+                        help="No agrupar las marcas raras o no vistas en 'OTRAS'")
+    parser.add_argument('--instrumentar', action='store_true',
+                        help='Medir las etapas del scoring y publicarlas en /metricas')
+    parser.add_argument('--perfilar', action='store_true',
+                        help='Activar además el perfilador por muestreo (implica --instrumentar)')
+    args = parser.parse_args(argv)
+
+    if args.instrumentar or args.perfilar:
+        instrumentacion.activar(perfilar=args.perfilar)
+
+    # Los modelos se cargan una única vez, antes de aceptar peticiones
+    # Misma compuerta por defecto que la evaluación por lotes: si no existe se avisa y se evalúa sin ella
+    compuerta = None if args.sin_compuerta else args.compuerta
+    if compuerta is not None and not os.path.exists(compuerta):
+        print(f"Advertencia: no existe la compuerta {compuerta}; se evalúa sin filtro 'Very High'")
+        compuerta = None
+    compuerta = CompuertaRiesgo.cargar(compuerta) if compuerta else None
+    scorer = ScorerKMeans(motor=args.motor, compuerta=compuerta,
+                          normalizar_marcas=not args.sin_normalizar_marcas)
+    servicio = ServicioScoring(scorer, lote_max=args.lote_max, espera_max_ms=args.espera_max_ms)
+    try:
+        asyncio.run(servicio.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# ——————————————————————————————
+# Benchmark: parseo de fechas fila a fila vs vectorizado
+# ——————————————————————————————
+# Compara el parseo original (`normalize_date` + `pd.to_datetime` por celda, vía
+# `apply`) con `data_utils.parsear_fechas` sobre columnas sintéticas con la misma
+# repetición que INSR_BEGIN/INSR_END (unas 2.500 fechas distintas en 2011-2018)
+# y los formatos que admite `normalize_date`. Comprueba además que ambos
+# resultados son idénticos.
+#
+# Ejemplo:
+#   python benchmarks/bench_fechas.py --filas 800000
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Notebook'))
+import data_utils as du  # noqa: E402
+
+MESES_TEXTO = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic',
+               'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+
+def generar_fechas(n_filas: int, semilla: int = 42) -> pd.Series:
+    """
+    Fechas entre 2011-07-01 y 2018-06-30 en formatos mezclados
+    (5-ene-14, 05-JAN-2014, 5/1/14, 05/01/2014) con un 1% de nulos y basura.
+    """
+    rng = np.random.default_rng(semilla)
+    dias = pd.Timestamp('2011-07-01') + pd.to_timedelta(rng.integers(0, 2556, n_filas), unit='D')
+    d, m, y = dias.day.to_numpy(), dias.month.to_numpy(), dias.year.to_numpy()
+    formato = rng.integers(0, 4, n_filas)
+    idioma = rng.integers(0, 2, n_filas) * 12
+
+    valores = np.empty(n_filas, dtype=object)
+    for f in range(4):
+        sel = formato == f
+        dd, mm, yy, ii = d[sel], m[sel], y[sel], idioma[sel]
+        if f == 0:
+            valores[sel] = [f"{a}-{MESES_TEXTO[b - 1 + i]}-{c % 100:02d}" for a, b, c, i in zip(dd, mm, yy, ii)]
+        elif f == 1:
+            valores[sel] = [f"{a:02d}-{MESES_TEXTO[b - 1 + i]}-{c}" for a, b, c, i in zip(dd, mm, yy, ii)]
+        elif f == 2:
+            valores[sel] = [f"{a}/{b}/{c % 100:02d}" for a, b, c in zip(dd, mm, yy)]
+        else:
+            valores[sel] = [f"{a:02d}/{b:02d}/{c}" for a, b, c in zip(dd, mm, yy)]
+
+    ruido = rng.random(n_filas)
+    valores[ruido < 0.005] = None
+    valores[(ruido >= 0.005) & (ruido < 0.01)] = 'sin fecha'
+    return pd.Series(valores)
+
+
+def parsear_fila_a_fila(serie: pd.Series) -> pd.Series:
+    """Implementación original de convertir_columnas_a_datetime (apply por celda)."""
+    def parse_val(x):
+        norm = du.normalize_date(str(x))
+        if norm is None:
+            return pd.NaT
+        return pd.to_datetime(norm, format='%d/%m/%Y', errors='coerce')
+    return serie.apply(parse_val)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark del parseo de fechas.')
+    parser.add_argument('--filas', type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    serie = generar_fechas(args.filas)
+
+    inicio = time.perf_counter()
+    referencia = parsear_fila_a_fila(serie)
+    t_fila = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    vectorizado = du.parsear_fechas(serie)
+    t_vect = time.perf_counter() - inicio
+
+    assert referencia.equals(vectorizado), "El parseo vectorizado no coincide con el original"
+    print(f"{args.filas} filas | fila a fila: {t_fila:.2f} s | vectorizado: {t_vect:.3f} s | "
+          f"x{t_fila / t_vect:.0f} | resultados idénticos")
+
+
+if __name__ == '__main__':
+    main()
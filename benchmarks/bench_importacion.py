@@ -0,0 +1,99 @@
+# ——————————————————————————————
+# Benchmark: tiempo de importación del núcleo de data_utils
+# ——————————————————————————————
+# Importa `data_utils` en procesos nuevos (sin módulos en caché del intérprete,
+# aunque sí con los .pyc en disco) y mide solo la importación, descontando el
+# arranque de Python. Falla (código de salida 1) si:
+#   - el mejor tiempo de `--repeticiones` supera `--presupuesto-ms`, o
+#   - la importación del núcleo carga alguno de los módulos pesados de la capa
+#     de gráficos (matplotlib, scipy), o
+#   - las funciones de gráficos dejan de resolverse desde data_utils.
+#
+# Ejemplo:
+#   python benchmarks/bench_importacion.py --presupuesto-ms 600 --repeticiones 5
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DIR_NOTEBOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Notebook')
+
+# Módulos que no deben cargarse al importar el núcleo
+MODULOS_PROHIBIDOS = ('matplotlib', 'scipy', 'graficos_eda')
+
+# Código que se ejecuta en cada proceso hijo: mide la importación y lista los módulos cargados
+MEDICION = '''
+import json, sys, time
+inicio = time.perf_counter()
+import data_utils
+ms = (time.perf_counter() - inicio) * 1000
+prohibidos = sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[1].split(',')))
+print(json.dumps({'ms': ms, 'prohibidos': prohibidos}))
+'''
+
+# Comprobación de que la capa de gráficos sigue accesible desde data_utils
+RESOLUCION = '''
+import data_utils
+print(all(callable(getattr(data_utils, nombre)) for nombre in data_utils.GRAFICOS))
+'''
+
+
+def medir_importacion(repeticiones: int = 5) -> dict:
+    """
+    Importa data_utils en `repeticiones` procesos nuevos.
+
+    Devuelve
+    -------
+    dict
+        'tiempos_ms' (lista), 'mejor_ms' y 'prohibidos' (módulos pesados cargados).
+    """
+    tiempos, prohibidos = [], set()
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-W', 'ignore', '-c', MEDICION, ','.join(MODULOS_PROHIBIDOS)],
+                                cwd=DIR_NOTEBOOK, capture_output=True, text=True, check=True)
+        medida = json.loads(salida.stdout.strip().splitlines()[-1])
+        tiempos.append(medida['ms'])
+        prohibidos.update(medida['prohibidos'])
+    return {'tiempos_ms': tiempos, 'mejor_ms': min(tiempos), 'prohibidos': sorted(prohibidos)}
+
+
+def graficos_resolubles() -> bool:
+    """True si todas las funciones de data_utils.GRAFICOS se resuelven bajo demanda."""
+    salida = subprocess.run([sys.executable, '-W', 'ignore', '-c', RESOLUCION],
+                            cwd=DIR_NOTEBOOK, capture_output=True, text=True)
+    return salida.returncode == 0 and salida.stdout.strip() == 'True'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación de data_utils")
+    parser.add_argument('--presupuesto-ms', type=float, default=600.0,
+                        help="Máximo permitido para el mejor tiempo de importación (ms)")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    resultado = medir_importacion(args.repeticiones)
+    resolubles = graficos_resolubles()
+
+    print(f"import data_utils: mejor {resultado['mejor_ms']:.1f} ms "
+          f"(mediciones: {', '.join(f'{t:.1f}' for t in resultado['tiempos_ms'])}) | "
+          f"presupuesto {args.presupuesto_ms:.0f} ms")
+
+    errores = []
+    if resultado['mejor_ms'] > args.presupuesto_ms:
+        errores.append(f"la importación supera el presupuesto ({resultado['mejor_ms']:.1f} > {args.presupuesto_ms:.0f} ms)")
+    if resultado['prohibidos']:
+        errores.append(f"el núcleo carga módulos de la capa de gráficos: {', '.join(resultado['prohibidos'])}")
+    if not resolubles:
+        errores.append("las funciones de gráficos no se resuelven desde data_utils")
+
+    for error in errores:
+        print(f"ERROR: {error}")
+    if errores:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# ——————————————————————————————
+# Generador sintético de pólizas con el esquema de motor_data
+# ——————————————————————————————
+# Los CSV de Data/ son punteros LFS en muchas copias del repositorio, así que los
+# benchmarks generan sus propios datos con el mismo esquema que motor_data11-14lats
+# y motor_data14-2018:
+#
+#   SEX, INSR_BEGIN, INSR_END, EFFECTIVE_YR, INSR_TYPE, INSURED_VALUE, PREMIUM,
+#   OBJECT_ID, PROD_YEAR, SEATS_NUM, CARRYING_CAPACITY, TYPE_VEHICLE, CCM_TON,
+#   MAKE, USAGE, CLAIM_PAID
+#
+# con distribuciones parecidas a las del EDA (01-EDAMotor_data11-14lats.ipynb):
+# importes log-normales con ceros y cola larga, ~25% de nulos en
+# CARRYING_CAPACITY, ~92% en CLAIM_PAID, fechas en formatos mezclados
+# (08-AUG-13, 5-ene-14, 5/1/14, 05/01/2014), marcas con variantes sucias
+# ('toyota', 'TOYOTA JAPAN') y varias pólizas por vehículo (OBJECT_ID repetido con
+# los mismos atributos). Todo vectorizado: 10M filas se generan por bloques sin
+# bucles por fila.
+#
+# Ejemplos:
+#   python benchmarks/generador_motor_data.py --filas 1000000 --salida /tmp/motor_data_1M.csv
+#   python benchmarks/generador_motor_data.py --filas 10000000 --salida /tmp/motor_data_10M.csv --chunksize 1000000
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_fechas import MESES_TEXTO
+
+COLUMNAS = ['SEX', 'INSR_BEGIN', 'INSR_END', 'EFFECTIVE_YR', 'INSR_TYPE', 'INSURED_VALUE', 'PREMIUM',
+            'OBJECT_ID', 'PROD_YEAR', 'SEATS_NUM', 'CARRYING_CAPACITY', 'TYPE_VEHICLE', 'CCM_TON',
+            'MAKE', 'USAGE', 'CLAIM_PAID']
+
+# (tipo, peso, asientos típicos, capacidad de carga mediana, cilindrada mediana)
+TIPOS_VEHICULO = [
+    ('Pick-up', 0.30, 4, 6, 2494),
+    ('Automobile', 0.18, 4, 5, 1500),
+    ('Truck', 0.16, 2, 120, 6000),
+    ('Motor-cycle', 0.12, 1, 0, 150),
+    ('Station Wagones', 0.08, 7, 7, 2700),
+    ('Bus', 0.06, 30, 40, 4200),
+    ('Tanker', 0.03, 2, 200, 8000),
+    ('Tractor', 0.03, 1, 50, 5000),
+    ('Trailers and semitrailers', 0.02, 0, 300, 0),
+    ('Special construction', 0.02, 1, 100, 7000),
+]
+
+MARCAS = {
+    'TOYOTA': 0.26, 'ISUZU': 0.14, 'NISSAN': 0.07, 'BAJAJ': 0.06, 'MITSUBISHI': 0.05,
+    'IVECO': 0.04, 'SINO HOWO': 0.03, 'FIAT': 0.03, 'YAMAHA': 0.025, 'TVS': 0.02,
+    'SUZUKI': 0.02, 'BISHOFTU': 0.015, 'MESFIN': 0.012, 'BAJAJI': 0.011,
+}
+# Variantes sucias que el preproceso corrige (mayúsculas, espacios, reemplazos)
+VARIANTES_MARCA = ['toyota', ' TOYOTA ', 'TOYOTA JAPAN', 'Isuzu', 'nissan ']
+N_MARCAS_RARAS = 250
+
+USOS = {
+    'Own Goods': 0.28, 'Private': 0.25, 'General Cartage': 0.12, 'Fare Paying Passengers': 0.09,
+    'Taxi': 0.07, 'Own service': 0.06, 'Car Hires': 0.04, 'Others': 0.03,
+    'Agricultural Own Farm': 0.02, 'Agricultural Any Farm': 0.01, 'Special Construction': 0.01,
+    'Ambulance': 0.005, 'Learnes': 0.004, 'Fire fighting': 0.001,
+}
+
+ORIGEN_FECHAS = pd.Timestamp('2011-07-01')
+DIAS_FECHAS = 2557  # hasta 2018-06-30 (más un año de vigencia para INSR_END)
+
+
+def _tabla_formatos(n_dias: int) -> np.ndarray:
+    """
+    Texto de cada día desde ORIGEN_FECHAS en los 6 formatos generados:
+    DD-MON-YY (inglés), D-mes-YY (español), DD-MON-YYYY, D/M/YY, DD/MM/YYYY y
+    DD-MON-YY con el mes en mayúsculas españolas.
+    """
+    dias = ORIGEN_FECHAS + pd.to_timedelta(np.arange(n_dias), unit='D')
+    tabla = np.empty((n_dias, 6), dtype=object)
+    for i, d in enumerate(dias):
+        mes_es, mes_en = MESES_TEXTO[d.month - 1], MESES_TEXTO[12 + d.month - 1]
+        yy = d.year % 100
+        tabla[i] = [f"{d.day:02d}-{mes_en}-{yy:02d}", f"{d.day}-{mes_es}-{yy:02d}",
+                    f"{d.day:02d}-{mes_en}-{d.year}", f"{d.day}/{d.month}/{yy:02d}",
+                    f"{d.day:02d}/{d.month:02d}/{d.year}", f"{d.day:02d}-{mes_es.upper()}-{yy:02d}"]
+    return tabla
+
+
+_TABLA_FECHAS = None
+
+
+def _fechas_texto(dias: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Texto de las fechas (días desde ORIGEN_FECHAS) con un formato aleatorio por fila."""
+    global _TABLA_FECHAS
+    if _TABLA_FECHAS is None:
+        _TABLA_FECHAS = _tabla_formatos(DIAS_FECHAS + 366)
+    formato = rng.choice(6, len(dias), p=[0.55, 0.15, 0.1, 0.08, 0.1, 0.02])
+    return _TABLA_FECHAS[dias, formato]
+
+
+def _vehiculos(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Atributos fijos de `n` vehículos (una fila por OBJECT_ID)."""
+    pesos = np.array([t[1] for t in TIPOS_VEHICULO])
+    tipo = rng.choice(len(TIPOS_VEHICULO), n, p=pesos / pesos.sum())
+    asientos = np.array([t[2] for t in TIPOS_VEHICULO])[tipo]
+    carga = np.array([t[3] for t in TIPOS_VEHICULO])[tipo]
+    cilindrada = np.array([t[4] for t in TIPOS_VEHICULO])[tipo]
+
+    # Marcas frecuentes, cola larga de marcas raras (< 1%) y variantes sucias
+    nombres = list(MARCAS) + [f'MARCA_{i:03d}' for i in range(N_MARCAS_RARAS)] + VARIANTES_MARCA
+    pesos_marca = np.r_[list(MARCAS.values()),
+                        np.full(N_MARCAS_RARAS, 0.2 / N_MARCAS_RARAS),
+                        np.full(len(VARIANTES_MARCA), 0.02 / len(VARIANTES_MARCA))]
+    marca = np.asarray(nombres, dtype=object)[rng.choice(len(nombres), n, p=pesos_marca / pesos_marca.sum())]
+    marca[rng.random(n) < 1e-5] = None
+
+    usos = np.asarray(list(USOS), dtype=object)
+    pesos_uso = np.array(list(USOS.values()))
+    uso = usos[rng.choice(len(usos), n, p=pesos_uso / pesos_uso.sum())]
+
+    prod_year = np.clip(np.round(2018 - rng.gamma(2.0, 5.0, n)), 1950, 2018)
+    seats = np.where(rng.random(n) < 0.85, asientos, np.round(asientos * rng.lognormal(0, 0.8, n)))
+    seats = np.clip(seats, 0, 199).astype(float)
+    carring = np.round(carga * rng.lognormal(0, 1.0, n))
+    carring[rng.random(n) < 0.08] = 0
+    ccm = np.round(cilindrada * rng.lognormal(0, 0.35, n))
+    ccm[rng.random(n) < 0.03] = 0
+    ccm = np.clip(ccm, 0, 20000)
+
+    return pd.DataFrame({
+        'SEX': rng.choice(3, n, p=[0.50, 0.43, 0.07]),
+        'INSR_TYPE': rng.choice([1201, 1202, 1204], n, p=[0.35, 0.62, 0.03]),
+        'PROD_YEAR': prod_year, 'SEATS_NUM': seats, 'CARRYING_CAPACITY': carring,
+        'TYPE_VEHICLE': np.asarray([t[0] for t in TIPOS_VEHICULO], dtype=object)[tipo],
+        'CCM_TON': ccm, 'MAKE': marca, 'USAGE': uso,
+        # Valor asegurado del vehículo: ~30% a 0, resto log-normal (mediana ~400k) con cola larga
+        'VALOR_BASE': np.where(rng.random(n) < 0.3, 0.0, np.minimum(rng.lognormal(np.log(4e5), 1.2, n), 2.5e8)),
+    })
+
+
+def generar_motor_data(
+    n_filas: int,
+    semilla: int = 42,
+    polizas_por_vehiculo: float = 3.0,
+    duplicados: float = 0.002,
+    id_inicial: int = 5_000_017_899
+) -> pd.DataFrame:
+    """
+    Genera `n_filas` pólizas sintéticas con el esquema de motor_data.
+
+    Parámetros
+    ----------
+    n_filas : int
+        Número de filas.
+    semilla : int, opcional
+        Semilla del generador aleatorio.
+    polizas_por_vehiculo : float, opcional
+        Pólizas medias por OBJECT_ID (renovaciones anuales del mismo vehículo).
+    duplicados : float, opcional
+        Proporción de filas que son copia exacta de otra (como en los CSV originales).
+    id_inicial : int, opcional
+        Primer OBJECT_ID (para generar bloques sin solapes de vehículos).
+
+    Devuelve
+    -------
+    pd.DataFrame
+        Columnas de `COLUMNAS`, con los tipos que da `pd.read_csv` sobre los originales
+        (fechas y EFFECTIVE_YR como texto).
+    """
+    rng = np.random.default_rng(semilla)
+    n_vehiculos = max(1, int(n_filas / polizas_por_vehiculo))
+    vehiculos = _vehiculos(n_vehiculos, rng)
+    fila_vehiculo = np.sort(rng.integers(0, n_vehiculos, n_filas))
+    df = vehiculos.iloc[fila_vehiculo].reset_index(drop=True)
+    df.insert(0, 'OBJECT_ID', id_inicial + fila_vehiculo.astype(np.int64))
+
+    # Vigencia: mayoría anual; algunas pólizas cortas (ajustes de fin de periodo)
+    inicio = rng.integers(0, DIAS_FECHAS - 365, n_filas)
+    duracion = np.where(rng.random(n_filas) < 0.9, 364, rng.integers(1, 364, n_filas))
+    df['INSR_BEGIN'] = _fechas_texto(inicio, rng)
+    df['INSR_END'] = _fechas_texto(inicio + duracion, rng)
+    anio_inicio = (ORIGEN_FECHAS + pd.to_timedelta(inicio, unit='D')).year.to_numpy()
+    efectivo = pd.Series(anio_inicio % 100).map('{:02d}'.format).to_numpy(dtype=object)
+    efectivo[rng.random(n_filas) < 0.0015] = None
+    df['EFFECTIVE_YR'] = efectivo
+
+    # Importes: el valor asegurado se deprecia y la prima es proporcional con ruido
+    valor = df.pop('VALOR_BASE').to_numpy() * rng.uniform(0.85, 1.0, n_filas)
+    df['INSURED_VALUE'] = np.round(valor, 2)
+    prima = np.where(valor > 0, valor * rng.lognormal(np.log(0.012), 0.5, n_filas),
+                     rng.lognormal(np.log(800), 1.0, n_filas))
+    prima[duracion < 364] *= duracion[duracion < 364] / 365
+    prima = np.round(np.minimum(prima, 7.6e6), 3)
+    prima[rng.random(n_filas) < 3e-5] = np.nan
+    df['PREMIUM'] = prima
+
+    # Siniestros: ~7.5% de pólizas, log-normal con cola larga
+    siniestro = np.full(n_filas, np.nan)
+    con_siniestro = rng.random(n_filas) < 0.075
+    siniestro[con_siniestro] = np.round(rng.lognormal(np.log(35000), 1.6, con_siniestro.sum()), 2)
+    df['CLAIM_PAID'] = siniestro
+
+    # Nulos de los atributos del vehículo (tasas del EDA)
+    for col, tasa in [('PROD_YEAR', 2e-4), ('SEATS_NUM', 3e-4), ('CARRYING_CAPACITY', 0.25), ('CCM_TON', 1e-5)]:
+        df.loc[rng.random(n_filas) < tasa, col] = np.nan
+
+    if duplicados > 0:
+        origen = np.flatnonzero(rng.random(n_filas) < duplicados)
+        destino = rng.integers(0, n_filas, len(origen))
+        filas = np.arange(n_filas)
+        filas[destino] = origen
+        df = df.iloc[filas].reset_index(drop=True)
+
+    return df[COLUMNAS]
+
+
+def escribir_csv(ruta: str, n_filas: int, semilla: int = 42, chunksize: int = 1_000_000, **kwargs) -> str:
+    """
+    Escribe `n_filas` pólizas en `ruta` por bloques de `chunksize` filas (cada
+    bloque con su semilla y sus propios OBJECT_ID), sin tener todo en memoria.
+    """
+    for i, inicio in enumerate(range(0, n_filas, chunksize)):
+        n = min(chunksize, n_filas - inicio)
+        bloque = generar_motor_data(n, semilla + i, id_inicial=5_000_017_899 + inicio, **kwargs)
+        bloque.to_csv(ruta, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Genera pólizas sintéticas con el esquema de motor_data.')
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--salida', required=True, help='CSV de salida')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    escribir_csv(args.salida, args.filas, args.semilla, args.chunksize)
+    print(f"{args.filas} filas escritas en {args.salida} ({os.path.getsize(args.salida) / 2**20:.1f} MB, "
+          f"{time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
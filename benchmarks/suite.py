@@ -0,0 +1,291 @@
+# ——————————————————————————————
+# Suite de benchmarks de extremo a extremo (data_utils + clustering + scoring)
+# ——————————————————————————————
+# Genera pólizas sintéticas (generador_motor_data.py) de varios tamaños y mide,
+# etapa a etapa y en el orden de los notebooks, tiempo y memoria de:
+#
+#   lectura_csv            pd.read_csv del CSV generado
+#   fechas                 data_utils.parsear_fechas (INSR_BEGIN, INSR_END)
+#   imputacion             CLAIM_PAID -> 0 e ImputadorDistribucion (02-Preproceso)
+#   marcas                 NormalizadorMarcas
+#   outliers               MotorOutliers (IQR) sobre las variables numéricas
+#   imputacion_jerarquica  ImputadorJerarquico con la máscara de outliers
+#   estadisticas           estadisticas_personalizadas
+#   preprocesado           pipeline StandardScaler + OneHotEncoder (CSR float32)
+#   kmeans                 KMeans(5) sobre la matriz dispersa
+#   scoring                ScorerKMeans.puntuar por bloques de 50.000 filas
+#
+# La memoria se muestrea en un hilo durante cada etapa: `pico_mb` es la RSS
+# máxima observada e `incremento_mb` lo que crece respecto al inicio de la etapa.
+# Los resultados se escriben en JSON (benchmarks/resultados/) con el commit y las
+# versiones de las librerías, y con --comparar se muestran los cocientes frente a
+# un JSON anterior.
+#
+# Ejemplos:
+#   python benchmarks/suite.py --filas 10000 100000
+#   python benchmarks/suite.py --filas 1000000 --etapas fechas outliers estadisticas
+#   python benchmarks/suite.py --filas 100000 --comparar benchmarks/resultados/20261017-120000-abc1234.json
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'Notebook'))
+import data_utils as du  # noqa: E402
+from instrumentacion import memoria_actual_mb  # noqa: E402
+from generador_motor_data import generar_motor_data  # noqa: E402
+
+resultados_dir = os.path.join(BENCH_DIR, 'resultados')
+
+NUMERICAS = ['INSURED_VALUE', 'PREMIUM', 'PROD_YEAR', 'SEATS_NUM', 'CARRYING_CAPACITY', 'CCM_TON', 'CLAIM_PAID']
+COLUMNAS_JERARQUICA = ['SEATS_NUM', 'PROD_YEAR', 'CARRYING_CAPACITY', 'CCM_TON']
+
+
+class MuestreadorMemoria:
+    """
+    Muestrea la RSS del proceso en un hilo mientras dura el bloque `with`.
+
+    Atributos
+    ---------
+    inicio_mb, pico_mb : float
+        RSS al entrar y máxima observada (incluida la del final).
+    """
+
+    def __init__(self, intervalo: float = 0.005):
+        self.intervalo = intervalo
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico_mb = max(self.pico_mb, memoria_actual_mb())
+
+    def __enter__(self):
+        self.inicio_mb = self.pico_mb = memoria_actual_mb()
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
+        self.pico_mb = max(self.pico_mb, memoria_actual_mb())
+        return False
+
+
+# ------------------------------------------------------
+# Etapas: cada una recibe y actualiza el contexto compartido
+# ------------------------------------------------------
+
+def _lectura_csv(ctx: Dict) -> None:
+    ctx['df'] = pd.read_csv(ctx['ruta_csv'])
+
+
+def _fechas(ctx: Dict) -> None:
+    for col in ['INSR_BEGIN', 'INSR_END']:
+        ctx['df'][col] = du.parsear_fechas(ctx['df'][col])
+
+
+def _imputacion(ctx: Dict) -> None:
+    df = ctx['df']
+    df['CLAIM_PAID'] = df['CLAIM_PAID'].fillna(0)
+    df['HAS_CLAIM'] = np.where(df['CLAIM_PAID'] > 0, 1, 0)
+    du.imputar_nulos_por_distribucion(df, [c for c in df.columns if c != 'CLAIM_PAID'])
+
+
+def _marcas(ctx: Dict) -> None:
+    du.NormalizadorMarcas().fit_transform(ctx['df'])
+
+
+def _outliers(ctx: Dict) -> None:
+    ctx['outliers'] = du.MotorOutliers(NUMERICAS, 'iqr').fit(ctx['df']).mascara(ctx['df'])
+
+
+def _imputacion_jerarquica(ctx: Dict) -> None:
+    du.ImputadorJerarquico(COLUMNAS_JERARQUICA).fit_transform(ctx['df'], ctx.get('outliers'))
+
+
+def _estadisticas(ctx: Dict) -> None:
+    # estadisticas_personalizadas imprime un resumen que no interesa aquí
+    with contextlib.redirect_stdout(io.StringIO()):
+        du.estadisticas_personalizadas(ctx['df'][NUMERICAS])
+
+
+def _preprocesado(ctx: Dict) -> None:
+    from seleccion_k import construir_pipeline
+
+    pipeline = construir_pipeline().set_params(preprocessor__sparse_threshold=1.0)
+    ctx['X'] = pipeline.fit_transform(ctx['df']).tocsr().astype(np.float32)
+
+
+def _kmeans(ctx: Dict) -> None:
+    from sklearn.cluster import KMeans
+
+    KMeans(n_clusters=5, random_state=42, copy_x=False).fit(ctx['X'])
+
+
+def _scoring(ctx: Dict) -> None:
+    from scoring import ScorerKMeans
+
+    scorer = ctx.setdefault('scorer', ScorerKMeans())
+    df = ctx['df']
+    for inicio in range(0, len(df), 50_000):
+        scorer.puntuar(df.iloc[inicio:inicio + 50_000])
+
+
+ETAPAS: Dict[str, Callable[[Dict], None]] = {
+    'lectura_csv': _lectura_csv,
+    'fechas': _fechas,
+    'imputacion': _imputacion,
+    'marcas': _marcas,
+    'outliers': _outliers,
+    'imputacion_jerarquica': _imputacion_jerarquica,
+    'estadisticas': _estadisticas,
+    'preprocesado': _preprocesado,
+    'kmeans': _kmeans,
+    'scoring': _scoring,
+}
+
+# Etapas que necesitan el resultado de otras (si se piden sin ellas, se ejecutan sin medir)
+DEPENDENCIAS = {
+    'imputacion_jerarquica': ['outliers'],
+    'preprocesado': ['imputacion', 'marcas'],
+    'kmeans': ['preprocesado'],
+    'scoring': ['imputacion', 'marcas'],
+}
+
+
+def _con_dependencias(etapas: List[str]) -> set:
+    necesarias, pendientes = set(), list(etapas)
+    while pendientes:
+        etapa = pendientes.pop()
+        if etapa not in necesarias:
+            necesarias.add(etapa)
+            pendientes.extend(DEPENDENCIAS.get(etapa, []))
+    return necesarias
+
+
+# ------------------------------------------------------
+# Ejecución y resultados
+# ------------------------------------------------------
+
+def ejecutar(filas: int, etapas: List[str], repeticiones: int = 1, semilla: int = 42) -> List[Dict]:
+    """
+    Ejecuta las `etapas` (en el orden de ETAPAS) sobre `filas` pólizas sintéticas.
+    Con varias repeticiones se queda el mejor tiempo y el mayor pico de memoria.
+    """
+    necesarias = _con_dependencias(etapas)
+    orden = [e for e in ETAPAS if e in necesarias]
+    base = generar_motor_data(filas, semilla)
+    medidas: Dict[str, Dict] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_csv = os.path.join(tmp, 'motor_data.csv')
+        if 'lectura_csv' in necesarias:
+            base.to_csv(ruta_csv, index=False)
+        for _ in range(repeticiones):
+            ctx = {'df': base.copy(), 'ruta_csv': ruta_csv}
+            for etapa in orden:
+                with MuestreadorMemoria() as memoria:
+                    inicio = time.perf_counter()
+                    ETAPAS[etapa](ctx)
+                    segundos = time.perf_counter() - inicio
+                if etapa not in etapas:
+                    continue
+                previa = medidas.get(etapa)
+                medidas[etapa] = {
+                    'etapa': etapa,
+                    'filas': filas,
+                    'segundos': segundos if previa is None else min(segundos, previa['segundos']),
+                    'pico_mb': memoria.pico_mb if previa is None else max(memoria.pico_mb, previa['pico_mb']),
+                    'incremento_mb': (memoria.pico_mb - memoria.inicio_mb if previa is None
+                                      else max(memoria.pico_mb - memoria.inicio_mb, previa['incremento_mb'])),
+                }
+    for medida in medidas.values():
+        medida['filas_seg'] = medida['filas'] / medida['segundos'] if medida['segundos'] > 0 else None
+    return [medidas[e] for e in orden if e in medidas]
+
+
+def metadatos() -> Dict:
+    """Commit, fecha, máquina y versiones de las librerías de la ejecución."""
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def guardar_resultados(resultados: List[Dict], meta: Dict, dir_salida: str = resultados_dir) -> str:
+    """Escribe los resultados en <dir_salida>/<fecha>-<commit>.json y devuelve la ruta."""
+    os.makedirs(dir_salida, exist_ok=True)
+    sello = datetime.now().strftime('%Y%m%d-%H%M%S')
+    ruta = os.path.join(dir_salida, f"{sello}-{meta['commit'] or 'sin-commit'}.json")
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'metadatos': meta, 'resultados': resultados}, f, indent=1)
+    return ruta
+
+
+def comparar(ruta_base: str, resultados: List[Dict]) -> pd.DataFrame:
+    """
+    Cocientes actual / base de tiempo y pico de memoria por (etapa, filas);
+    > 1 indica que la ejecución actual es más lenta o usa más memoria.
+    """
+    with open(ruta_base, encoding='utf-8') as f:
+        base = pd.DataFrame(json.load(f)['resultados'])
+    actual = pd.DataFrame(resultados)
+    tabla = actual.merge(base, on=['etapa', 'filas'], suffixes=('', '_base'))
+    tabla['ratio_tiempo'] = tabla['segundos'] / tabla['segundos_base']
+    tabla['ratio_pico'] = tabla['pico_mb'] / tabla['pico_mb_base']
+    return tabla[['etapa', 'filas', 'segundos_base', 'segundos', 'ratio_tiempo', 'ratio_pico']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de extremo a extremo con datos sintéticos.')
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000],
+                        help='Tamaños a medir (p.ej. 10000 100000 1000000 10000000)')
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--salida', default=resultados_dir, help='Carpeta de resultados JSON')
+    parser.add_argument('--comparar', default=None, help='JSON de una ejecución anterior')
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for filas in args.filas:
+        for medida in ejecutar(filas, args.etapas, args.repeticiones):
+            print(f"{medida['filas']:>10} {medida['etapa']:<22} {medida['segundos']:9.3f} s "
+                  f"pico {medida['pico_mb']:8.1f} MB (+{medida['incremento_mb']:.1f})")
+            resultados.append(medida)
+
+    ruta = guardar_resultados(resultados, metadatos(), args.salida)
+    print(f"Resultados guardados en {ruta}")
+    if args.comparar:
+        print(comparar(args.comparar, resultados).round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()